@@ -1,16 +1,61 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
+import { useApi } from '../../services/api';
+
+// Extra payments simulated in one request; the calculator picks the closest one
+const EXTRA_PAYMENT_STEP = 5;
+const MAX_EXTRA_PAYMENT = 1000;
 
 const DebtHelper = ({ data }) => {
   const { debt } = data;
   const [showDetails, setShowDetails] = useState(false);
+  const [monthlyPayment, setMonthlyPayment] = useState(250);
+  const [plan, setPlan] = useState(null);
+  
+  const api = useApi();
   
   // Sample debt breakdown - in a real app, this would come from the backend
   const debtDetails = [
-    { type: 'Federal Student Loans', amount: 10000, interestRate: 4.5 },
-    { type: 'Private Student Loan', amount: 2000, interestRate: 5.8 },
-    { type: 'Credit Card', amount: 500, interestRate: 15.99 },
+    { type: 'Federal Student Loans', amount: 10000, interestRate: 4.5, minimumPayment: 110 },
+    { type: 'Private Student Loan', amount: 2000, interestRate: 5.8, minimumPayment: 40 },
+    { type: 'Credit Card', amount: 500, interestRate: 15.99, minimumPayment: 25 },
   ];
   
+  const minimumTotal = debtDetails.reduce((sum, debt) => sum + debt.minimumPayment, 0);
+  
+  // Simulate every extra payment the calculator can show once, so changing
+  // the monthly payment needs no further requests
+  useEffect(() => {
+    const extraPayments = [];
+    for (let extra = 0; extra <= MAX_EXTRA_PAYMENT; extra += EXTRA_PAYMENT_STEP) {
+      extraPayments.push(extra);
+    }
+    
+    api.simulateDebtPayoff({
+      debts: debtDetails.map(debt => ({
+        name: debt.type,
+        balance: debt.amount,
+        apr: debt.interestRate,
+        minimum_payment: debt.minimumPayment
+      })),
+      extraPayments,
+      strategies: ['avalanche']
+    }).then(setPlan).catch(() => setPlan(null));
+  }, []);
+  
+  // Scenario for the entered monthly payment (avalanche order)
+  const extraIndex = Math.min(
+    Math.max(Math.round((monthlyPayment - minimumTotal) / EXTRA_PAYMENT_STEP), 0),
+    MAX_EXTRA_PAYMENT / EXTRA_PAYMENT_STEP
+  );
+  const scenario = plan ? plan.strategies.avalanche.scenarios[extraIndex] : null;
+  
+  // Format a number of months as years and months
+  const formatDuration = (months) => {
+    const years = Math.floor(months / 12);
+    const rest = months % 12;
+    return `${years} year${years === 1 ? '' : 's'}, ${rest} month${rest === 1 ? '' : 's'}`;
+  };
+  
   // Calculate monthly interest
   const calculateMonthlyInterest = (amount, rate) => {
     return (amount * (rate / 100)) / 12;
@@ -97,18 +142,24 @@ const DebtHelper = ({ data }) => {
             id="monthly-payment"
             className="mt-1 w-full rounded-md border border-gray-300 p-2 text-sm focus:border-primary-500 focus:outline-none focus:ring-1 focus:ring-primary-500"
             placeholder="250"
-            defaultValue="250"
+            min={minimumTotal}
+            value={monthlyPayment}
+            onChange={(e) => setMonthlyPayment(Number(e.target.value))}
           />
         </div>
         
         <div className="mb-3 flex justify-between text-sm">
           <div className="text-gray-700">Estimated payoff time:</div>
-          <div className="font-medium text-gray-900">5 years, 2 months</div>
+          <div className="font-medium text-gray-900">
+            {scenario ? (scenario.paid_off ? formatDuration(scenario.months) : 'Not paid off') : '—'}
+          </div>
         </div>
         
         <div className="flex justify-between text-sm">
           <div className="text-gray-700">Total interest paid:</div>
-          <div className="font-medium text-red-600">$1,845</div>
+          <div className="font-medium text-red-600">
+            {scenario ? `$${Math.round(scenario.total_interest).toLocaleString()}` : '—'}
+          </div>
         </div>
         
         <button className="mt-3 w-full rounded-md bg-gradient-to-r from-red-600 to-orange-600 py-2 text-sm font-medium text-white hover:from-red-700 hover:to-orange-700">
@@ -1,48 +1,38 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
+import { useApi } from '../../services/api';
 
-// Sample scholarship data - in a real app, this would come from an API
-const sampleScholarships = [
-  {
-    id: 1,
-    name: "Future Leaders Scholarship",
-    amount: 5000,
-    deadline: "2023-05-30",
-    eligibility: "Full-time students with GPA 3.5+",
-    category: "Merit",
-    link: "#"
-  },
-  {
-    id: 2,
-    name: "Diversity in STEM Grant",
-    amount: 3500,
-    deadline: "2023-06-15",
-    eligibility: "Underrepresented students in STEM fields",
-    category: "Diversity",
-    link: "#"
-  },
-  {
-    id: 3,
-    name: "First Generation Student Award",
-    amount: 2500,
-    deadline: "2023-07-01",
-    eligibility: "First generation college students",
-    category: "Need-based",
-    link: "#"
-  },
-  {
-    id: 4,
-    name: "Community Service Scholarship",
-    amount: 1500,
-    deadline: "2023-06-20",
-    eligibility: "Students with 100+ volunteer hours",
-    category: "Service",
-    link: "#"
-  }
-];
+const PAGE_SIZE = 4;
 
 const ScholarshipFinder = () => {
   const [filter, setFilter] = useState('all');
   const [searchQuery, setSearchQuery] = useState('');
+  const [scholarships, setScholarships] = useState([]);
+  const [nextOffset, setNextOffset] = useState(null);
+  
+  const api = useApi();
+  
+  // Search the backend catalog; category and text filtering happen server-side
+  const loadScholarships = async (offset = 0) => {
+    try {
+      const data = await api.searchScholarships({
+        query: searchQuery,
+        category: filter === 'all' ? null : filter,
+        limit: PAGE_SIZE,
+        offset
+      });
+      setScholarships(previous => offset ? [...previous, ...data.scholarships] : data.scholarships);
+      setNextOffset(data.next_offset);
+    } catch (error) {
+      setScholarships([]);
+      setNextOffset(null);
+    }
+  };
+  
+  // Debounce typing so every keystroke doesn't trigger a request
+  useEffect(() => {
+    const timer = setTimeout(() => loadScholarships(0), 200);
+    return () => clearTimeout(timer);
+  }, [filter, searchQuery]);
   
   // Format date to readable format
   const formatDate = (dateString) => {
@@ -59,16 +49,6 @@ const ScholarshipFinder = () => {
     return diffDays;
   };
 
-  // Filter scholarships based on category and search query
-  const filteredScholarships = sampleScholarships.filter(scholarship => {
-    const matchesFilter = filter === 'all' || scholarship.category.toLowerCase() === filter.toLowerCase();
-    const matchesSearch = searchQuery === '' || 
-      scholarship.name.toLowerCase().includes(searchQuery.toLowerCase()) ||
-      scholarship.eligibility.toLowerCase().includes(searchQuery.toLowerCase());
-    
-    return matchesFilter && matchesSearch;
-  });
-
   return (
     <div className="rounded-xl bg-white p-6 shadow-md">
       <div className="mb-4 flex items-center">
@@ -136,8 +116,8 @@ const ScholarshipFinder = () => {
 
       {/* Scholarships List */}
       <div className="space-y-3">
-        {filteredScholarships.length > 0 ? (
-          filteredScholarships.map((scholarship) => (
+        {scholarships.length > 0 ? (
+          scholarships.map((scholarship) => (
             <div key={scholarship.id} className="rounded-lg border border-gray-100 bg-gray-50 p-4 transition-all hover:border-blue-200 hover:bg-blue-50">
               <div className="mb-2 flex items-center justify-between">
                 <h3 className="font-medium text-gray-900">{scholarship.name}</h3>
@@ -181,11 +161,15 @@ const ScholarshipFinder = () => {
       </div>
       
       {/* View More Button */}
+      {nextOffset !== null && (
       <div className="mt-4">
-        <button className="w-full rounded-md border border-gray-300 bg-white py-2 text-sm font-medium text-gray-700 hover:bg-gray-50">
+        <button
+          onClick={() => loadScholarships(nextOffset)}
+          className="w-full rounded-md border border-gray-300 bg-white py-2 text-sm font-medium text-gray-700 hover:bg-gray-50">
           View More Scholarships
         </button>
       </div>
+      )}
       
       {/* AI Recommendation */}
       <div className="mt-4 rounded-lg bg-blue-50 p-4">
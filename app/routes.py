@@ -1,31 +1,305 @@
-from flask import request, jsonify
-from utils.validators import validate_user_data, validate_insights_request
-import firebase_admin
+from quart import request, jsonify, Response, stream_with_context, g
+from utils.validators import validate_user_data, validate_insights_request, validate_expense_data
+from utils.importers import detect_import_format, iter_import_rows
+from utils.pagination import parse_fields
+from utils.schema import parse_iso_datetime
+import firebase_admin.firestore
 from firebase_admin import auth
+from werkzeug.exceptions import RequestEntityTooLarge
+import hmac
 import json
-import traceback
+import math
+import time
+import uuid
+import asyncio
+import logging
+import itertools
+import tempfile
+import weakref
+import threading
+from datetime import datetime, timezone
+from functools import wraps
 
-def register_routes(app, encryption_service, firebase_service, openai_service):
+from utils.admission import AdmissionController
+from utils.metrics import metrics, http_latency, http_in_flight, http_errors
+from utils.log import hash_uid
+from utils.lazy import is_ready, requires_services
+
+logger = logging.getLogger(__name__)
+
+# Largest page size accepted by paginated list endpoints
+MAX_PAGE_SIZE = 100
+
+# Client addresses treated as internal when no METRICS_TOKEN is configured
+_LOOPBACK = ('127.0.0.1', '::1')
+
+def _prefixed(prefix, stats):
+    """
+    Turn a stats dict into gauge values named <prefix>_<key>, skipping non-numeric values
+    """
+    return {
+        f"{prefix}_{key}": float(value)
+        for key, value in stats.items()
+        if isinstance(value, (int, float))
+    }
+
+def _collector(prefix, service, get_stats):
+    """
+    Build a scrape-time collector that skips services still initializing
+    """
+    return lambda: _prefixed(prefix, get_stats()) if is_ready(service) else {}
+
+def _too_many_requests(retry_after):
+    """
+    Build a 429 response telling the client when to retry
+    """
+    return jsonify({
+        "error": "Too Many Requests",
+        "message": f"Insight request limit reached, retry in {retry_after}s",
+        "retry_after": retry_after
+    }), 429, {'Retry-After': str(retry_after)}
+
+def _release_once(release):
+    """
+    Wrap a release callback so that only its first call has an effect
+    """
+    lock = threading.Lock()
+    released = False
+    
+    def release_once():
+        nonlocal released
+        with lock:
+            if released:
+                return
+            released = True
+        release()
+    return release_once
+
+def _hold_while_running(release):
+    """
+    Count the work keeping an admission slot busy and call release once
+    when the count drops to zero; it starts at one for the request itself
+    
+    Returns:
+        tuple: (hold, settle) callbacks that add and remove one unit of work
+    """
+    lock = threading.Lock()
+    count = 1
+    release = _release_once(release)
+    
+    def hold():
+        nonlocal count
+        with lock:
+            count += 1
+    
+    def settle():
+        nonlocal count
+        with lock:
+            count -= 1
+            if count:
+                return
+        release()
+    return hold, settle
+
+def _non_negative_arg(name):
+    """
+    Read an optional finite, non-negative number from the query string
+    
+    Raises:
+        ValueError: If the value is not a number, not finite or negative
+    """
+    value = request.args.get(name, default='', type=str)
+    if not value:
+        return None
+    try:
+        parsed = float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number")
+    if not math.isfinite(parsed) or parsed < 0:
+        raise ValueError(f"{name} must be a finite, non-negative number")
+    return parsed
+
+async def _spool_body(body, max_bytes, memory_bytes):
+    """
+    Copy a request body into a temporary file chunk by chunk, keeping at
+    most memory_bytes in memory
+
+    Returns:
+        SpooledTemporaryFile: The body, rewound, or None if it is larger than max_bytes
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=memory_bytes)
+    size = 0
+    async for chunk in body:
+        size += len(chunk)
+        if size > max_bytes:
+            spooled.close()
+            return None
+        spooled.write(chunk)
+    spooled.seek(0)
+    return spooled
+
+def register_routes(app, encryption_service, firebase_service, openai_service, auth_service=None,
+                    analytics_service=None, admission_controller=None, scholarship_service=None,
+                    debt_service=None):
     """
     Register all API routes for the application
+
+    Views are coroutines served on the worker's event loop, so a request
+    waiting on OpenAI or Firestore holds no thread. firebase_service must be
+    an AsyncFirebaseService; CPU-heavy work (token verification on a cache
+    miss, bulk import parsing) runs on worker threads.
+
+    The insights endpoints go through admission_controller (per-uid token
+    buckets plus an in-flight cap) and answer 429 instead of queueing.
     """
+    if auth_service is None:
+        from services.auth_service import AuthService
+        auth_service = AuthService()
+    if analytics_service is None:
+        from services.analytics_service import AnalyticsService
+        analytics_service = AnalyticsService(firebase_service)
+    if scholarship_service is None:
+        from services.scholarship_service import ScholarshipService
+        scholarship_service = ScholarshipService(app.config['SCHOLARSHIPS_PATH'])
+    if debt_service is None:
+        from services.debt_service import DebtPayoffService
+        debt_service = DebtPayoffService()
+    if admission_controller is None:
+        admission_controller = AdmissionController(
+            rate_per_minute=app.config.get('INSIGHTS_RATE_PER_MINUTE', 10),
+            burst=app.config.get('INSIGHTS_BURST', 5),
+            max_in_flight=app.config.get('INSIGHTS_MAX_IN_FLIGHT', 64)
+        )
+    
+    # Caps the OpenAI calls a single batch request fans out at once
+    batch_concurrency = app.config.get('INSIGHTS_BATCH_WORKERS', 4)
+
+    @app.before_request
+    async def start_request_timer():
+        g.request_start = time.perf_counter()
+        # Correlates every log line written while handling this request
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+        http_in_flight.inc()
+
+    @app.after_request
+    async def record_request_metrics(response):
+        start = g.pop('request_start', None)
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            http_latency.observe(time.perf_counter() - start, request.method, route, response.status_code)
+            if response.status_code >= 500:
+                http_errors.inc(request.method, route)
+        if 'request_id' in g:
+            response.headers['X-Request-ID'] = g.request_id
+        return response
+
+    @app.teardown_request
+    async def finish_request(error=None):
+        http_in_flight.dec()
+
+    # Service-level stats exported as gauges at scrape time. They belong to this
+    # app, not the process-wide registry, so building another app (tests, a
+    # second create_app()) never duplicates or leaks them
+    collectors = [
+        lambda: _prefixed('velora_insights_admission', admission_controller.get_stats()),
+        _collector('velora_insights_cache', openai_service, lambda: openai_service.get_cache_stats()),
+        _collector('velora_openai_limiter', openai_service,
+                   lambda: openai_service.get_concurrency_stats()['async_limiter']),
+        _collector('velora_scholarships', scholarship_service, lambda: scholarship_service.get_stats()),
+        _collector('velora_insights_prompt', openai_service, lambda: openai_service.get_prompt_stats()),
+        _collector('velora_write_queue', firebase_service, lambda: firebase_service.get_write_queue_stats()),
+        _collector('velora_profile_cache', firebase_service, lambda: firebase_service.get_profile_cache_stats()),
+        _collector('velora_auth_cache', auth_service, lambda: auth_service.get_stats())
+    ]
+
+    def require_internal(view):
+        """
+        Allow operational endpoints only with the METRICS_TOKEN bearer token,
+        or, when no token is configured, from a direct loopback connection
+        """
+        @wraps(view)
+        async def wrapper(*args, **kwargs):
+            token = app.config.get('METRICS_TOKEN')
+            if token:
+                supplied = request.headers.get('Authorization', '').replace('Bearer ', '')
+                allowed = hmac.compare_digest(supplied.encode(), token.encode())
+            else:
+                # A request relayed by a local reverse proxy also arrives from loopback
+                allowed = request.remote_addr in _LOOPBACK and 'X-Forwarded-For' not in request.headers
+            if not allowed:
+                return jsonify({"error": "Forbidden"}), 403
+            return await view(*args, **kwargs)
+
+        return wrapper
+
+    def require_auth(view):
+        """
+        Verify the Firebase ID token from the Authorization header and pass
+        the user ID to the wrapped view as `uid`
+        """
+        @wraps(view)
+        async def wrapper(*args, **kwargs):
+            # Verify the Firebase ID token
+            id_token = request.headers.get('Authorization', '').replace('Bearer ', '')
+            if not id_token:
+                return jsonify({"error": "No authorization token provided"}), 401
+
+            try:
+                # Verify token (cached per token until it expires) and get user ID;
+                # only a cache miss may do I/O, so only that goes to a thread
+                with metrics.span('auth.verify_id_token'):
+                    decoded_token = auth_service.get_cached_claims(id_token)
+                    if decoded_token is None:
+                        decoded_token = await asyncio.to_thread(auth_service.verify_id_token, id_token)
+            except auth.InvalidIdTokenError:
+                return jsonify({"error": "Invalid or expired token"}), 401
+            except Exception as e:
+                logger.error("Error verifying token in %s: %s", view.__name__, e)
+                return jsonify({"error": "Server error", "message": str(e)}), 500
+
+            g.uid_hash = hash_uid(decoded_token['uid'])
+            return await view(*args, uid=decoded_token['uid'], **kwargs)
+
+        return wrapper
+
+    @app.route('/api/metrics', methods=['GET'])
+    @requires_services()
+    @require_internal
+    async def get_metrics():
+        """
+        Expose latency histograms, in-flight gauges and error counters in
+        Prometheus text format
+        """
+        return Response(metrics.render(collectors), mimetype='text/plain; version=0.0.4')
+
+    @app.route('/api/insights/admission', methods=['GET'])
+    @requires_services()
+    @require_internal
+    async def get_admission_stats():
+        """
+        Get insights admission control statistics (limits, in-flight
+        requests, admitted/rejected counts, tracked buckets)
+        """
+        return jsonify(admission_controller.get_stats()), 200
 
     @app.route('/api/users/register', methods=['POST'])
-    def register_user():
+    @requires_services('encryption', 'firebase')
+    async def register_user():
         """
         Register a new user with encrypted sensitive data
         """
         try:
             # Get request data
-            data = request.json
+            data = await request.get_json()
             
             # Validate the data
             validation_errors = validate_user_data(data)
             if validation_errors:
                 return jsonify({"error": "Validation Error", "details": validation_errors}), 400
             
-            # Create Firebase auth user
-            user = auth.create_user(
+            # Create Firebase auth user (blocking Admin SDK call)
+            user = await asyncio.to_thread(
+                auth.create_user,
                 email=data['email'],
                 password=data['password'],
                 display_name=f"{data['firstName']} {data['lastName']}"
@@ -49,7 +323,7 @@ def register_routes(app, encryption_service, firebase_service, openai_service):
             }
             
             # Save to Firestore
-            firebase_service.create_user(user.uid, user_data)
+            await firebase_service.create_user(user.uid, user_data)
             
             return jsonify({
                 "message": "User registered successfully",
@@ -59,59 +333,38 @@ def register_routes(app, encryption_service, firebase_service, openai_service):
         except auth.EmailAlreadyExistsError:
             return jsonify({"error": "Email already exists"}), 400
         except Exception as e:
-            print(f"Error in register_user: {e}")
-            traceback.print_exc()
+            logger.exception("Error in register_user: %s", e)
             return jsonify({"error": "Server error", "message": str(e)}), 500
 
     @app.route('/api/users/profile', methods=['GET'])
-    def get_user_profile():
+    @requires_services('auth', 'firebase')
+    @require_auth
+    async def get_user_profile(uid):
         """
         Get user profile (requires authentication)
         """
         try:
-            # Verify the Firebase ID token
-            id_token = request.headers.get('Authorization', '').replace('Bearer ', '')
-            if not id_token:
-                return jsonify({"error": "No authorization token provided"}), 401
-                
-            # Verify token and get user ID
-            decoded_token = auth.verify_id_token(id_token)
-            uid = decoded_token['uid']
-            
-            # Get user data from Firestore
-            user_data = firebase_service.get_user(uid)
+            # Get user data (cached, without sensitive fields)
+            user_data = await firebase_service.get_user_profile(uid)
             if not user_data:
                 return jsonify({"error": "User not found"}), 404
                 
-            # Remove sensitive data from response
-            if 'ssn_encrypted' in user_data:
-                del user_data['ssn_encrypted']
-                
             return jsonify(user_data), 200
             
-        except auth.InvalidIdTokenError:
-            return jsonify({"error": "Invalid or expired token"}), 401
         except Exception as e:
-            print(f"Error in get_user_profile: {e}")
+            logger.error("Error in get_user_profile: %s", e)
             return jsonify({"error": "Server error", "message": str(e)}), 500
 
     @app.route('/api/users/profile', methods=['PATCH'])
-    def update_user_profile():
+    @requires_services('auth', 'encryption', 'firebase')
+    @require_auth
+    async def update_user_profile(uid):
         """
         Update user profile (requires authentication)
         """
         try:
-            # Verify the Firebase ID token
-            id_token = request.headers.get('Authorization', '').replace('Bearer ', '')
-            if not id_token:
-                return jsonify({"error": "No authorization token provided"}), 401
-                
-            # Verify token and get user ID
-            decoded_token = auth.verify_id_token(id_token)
-            uid = decoded_token['uid']
-            
             # Get update data
-            data = request.json
+            data = await request.get_json()
             
             # Don't allow email updates (Firebase Auth handles this separately)
             if 'email' in data:
@@ -123,39 +376,34 @@ def register_routes(app, encryption_service, firebase_service, openai_service):
                 del data['ssn']
                 
             # Update in Firestore
-            firebase_service.update_user(uid, data)
+            await firebase_service.update_user(uid, data)
             
             return jsonify({"message": "Profile updated successfully"}), 200
             
-        except auth.InvalidIdTokenError:
-            return jsonify({"error": "Invalid or expired token"}), 401
         except Exception as e:
-            print(f"Error in update_user_profile: {e}")
+            logger.error("Error in update_user_profile: %s", e)
             return jsonify({"error": "Server error", "message": str(e)}), 500
 
     @app.route('/api/insights', methods=['POST'])
-    def get_ai_insights():
+    @requires_services('auth', 'firebase', 'openai')
+    @require_auth
+    async def get_ai_insights(uid):
         """
         Get AI-powered financial insights from OpenAI
         """
         try:
-            # Verify the Firebase ID token
-            id_token = request.headers.get('Authorization', '').replace('Bearer ', '')
-            if not id_token:
-                return jsonify({"error": "No authorization token provided"}), 401
-                
-            # Verify token and get user ID
-            decoded_token = auth.verify_id_token(id_token)
-            uid = decoded_token['uid']
-            
             # Get request data
-            data = request.json
+            data = await request.get_json()
             
             # Validate the request
             validation_errors = validate_insights_request(data)
             if validation_errors:
                 return jsonify({"error": "Validation Error", "details": validation_errors}), 400
             
+            retry_after = admission_controller.try_acquire(uid)
+            if retry_after:
+                return _too_many_requests(retry_after)
+            
             # Call OpenAI service to get insights
             budget = data.get('budget', 0)
             spent = data.get('spent', 0)
@@ -163,12 +411,15 @@ def register_routes(app, encryption_service, firebase_service, openai_service):
             debt = data.get('debt', 0)
             topic = data.get('topic', 'budgeting')
             
-            ai_response = openai_service.get_financial_insights(
+            # The in-flight slot is held until the OpenAI call finishes, which may be
+            # after answering with local insights when it misses the deadline
+            ai_response = await openai_service.get_financial_insights_async(
                 budget=budget,
                 spent=spent,
                 goal=goal,
                 debt=debt,
-                topic=topic
+                topic=topic,
+                on_settled=_release_once(admission_controller.release)
             )
             
             # Save the AI response to Firestore
@@ -178,121 +429,493 @@ def register_routes(app, encryption_service, firebase_service, openai_service):
                 "created_at": firebase_admin.firestore.SERVER_TIMESTAMP
             }
             
-            firebase_service.save_ai_tip(uid, ai_tip_data)
+            # Persisted in the background; the response doesn't depend on it
+            await firebase_service.queue_ai_tip(uid, ai_tip_data)
             
             return jsonify({
                 "insights": ai_response,
-                "timestamp": firebase_admin.firestore.SERVER_TIMESTAMP
+                # SERVER_TIMESTAMP is a write sentinel and cannot be sent as JSON
+                "timestamp": datetime.now(timezone.utc).isoformat()
             }), 200
             
-        except auth.InvalidIdTokenError:
-            return jsonify({"error": "Invalid or expired token"}), 401
         except Exception as e:
-            print(f"Error in get_ai_insights: {e}")
+            logger.error("Error in get_ai_insights: %s", e)
             return jsonify({"error": "Server error", "message": str(e)}), 500
 
-    @app.route('/api/insights/history', methods=['GET'])
-    def get_insights_history():
+    @app.route('/api/insights/batch', methods=['POST'])
+    @requires_services('auth', 'firebase', 'openai')
+    @require_auth
+    async def get_ai_insights_batch(uid):
         """
-        Get history of AI insights for the user
+        Get AI-powered financial insights for several requests at once
         """
+        settle = None
         try:
-            # Verify the Firebase ID token
-            id_token = request.headers.get('Authorization', '').replace('Bearer ', '')
-            if not id_token:
-                return jsonify({"error": "No authorization token provided"}), 401
+            # Get request data
+            data = await request.get_json() or {}
+            items = data.get('requests')
+            
+            max_items = app.config.get('INSIGHTS_BATCH_MAX_ITEMS', 50)
+            if not isinstance(items, list) or not items:
+                return jsonify({"error": "requests must be a non-empty list"}), 400
+            if len(items) > max_items:
+                return jsonify({"error": f"Too many requests in batch (max {max_items})"}), 400
+            
+            # Each item costs a token; large batches push later requests back
+            retry_after = admission_controller.try_acquire(uid, cost=len(items))
+            if retry_after:
+                return _too_many_requests(retry_after)
+            # The in-flight slot is held until every OpenAI call the batch started has
+            # finished, including those still running after a missed deadline
+            hold, settle = _hold_while_running(admission_controller.release)
+            
+            # Validate every item up front; only valid ones are sent to OpenAI
+            results = [None] * len(items)
+            pending = {}
+            semaphore = asyncio.Semaphore(batch_concurrency)
+            
+            async def get_insights(item):
+                async with semaphore:
+                    hold()
+                    return await openai_service.get_financial_insights_async(
+                        budget=item.get('budget', 0),
+                        spent=item.get('spent', 0),
+                        goal=item.get('goal', 0),
+                        debt=item.get('debt', 0),
+                        topic=item.get('topic', 'budgeting'),
+                        on_settled=settle
+                    )
+            
+            for index, item in enumerate(items):
+                if not isinstance(item, dict):
+                    results[index] = {"index": index, "error": "Validation Error", "details": {"request": "Must be an object"}}
+                    continue
+                
+                validation_errors = validate_insights_request(item)
+                if validation_errors:
+                    results[index] = {"index": index, "error": "Validation Error", "details": validation_errors}
+                    continue
                 
-            # Verify token and get user ID
-            decoded_token = auth.verify_id_token(id_token)
-            uid = decoded_token['uid']
+                pending[index] = get_insights(item)
             
-            # Get limit from query params
-            limit = request.args.get('limit', default=10, type=int)
+            responses = await asyncio.gather(*pending.values(), return_exceptions=True)
+            
+            # Collect responses and persist them with a single batched write
+            ai_tips = []
+            for index, ai_response in zip(pending, responses):
+                if isinstance(ai_response, Exception):
+                    results[index] = {"index": index, "error": "Server error", "message": str(ai_response)}
+                    continue
+                
+                results[index] = {"index": index, "insights": ai_response}
+                ai_tips.append({
+                    "response": ai_response,
+                    "request_data": items[index],
+                    "created_at": firebase_admin.firestore.SERVER_TIMESTAMP
+                })
+            
+            if ai_tips:
+                await firebase_service.save_ai_tips_batch(uid, ai_tips)
+            
+            return jsonify({"results": results}), 200
+            
+        except Exception as e:
+            logger.error("Error in get_ai_insights_batch: %s", e)
+            return jsonify({"error": "Server error", "message": str(e)}), 500
+        finally:
+            if settle is not None:
+                settle()
+
+    @app.route('/api/insights/stream', methods=['POST'])
+    @requires_services('auth', 'firebase', 'openai')
+    @require_auth
+    async def stream_ai_insights(uid):
+        """
+        Stream AI-powered financial insights as server-sent events, one
+        event per response section
+        """
+        try:
+            # Get request data
+            data = await request.get_json()
+            
+            # Validate the request
+            validation_errors = validate_insights_request(data)
+            if validation_errors:
+                return jsonify({"error": "Validation Error", "details": validation_errors}), 400
+            
+            retry_after = admission_controller.try_acquire(uid)
+            if retry_after:
+                return _too_many_requests(retry_after)
+            
+            # The in-flight slot is held until the stream ends. A body that is never
+            # iterated (client gone before streaming starts) never runs the
+            # generator's finally, so the slot is also freed when the body is
+            # collected, and right away if building the response fails
+            release = _release_once(admission_controller.release)
+            try:
+                events = openai_service.stream_financial_insights_async(
+                    budget=data.get('budget', 0),
+                    spent=data.get('spent', 0),
+                    goal=data.get('goal', 0),
+                    debt=data.get('debt', 0),
+                    topic=data.get('topic', 'budgeting')
+                )
+                
+                @stream_with_context
+                async def generate():
+                    final_response = None
+                    try:
+                        async for event, payload in events:
+                            if event in ('done', 'error'):
+                                final_response = payload
+                            yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+                    finally:
+                        release()
+                    
+                    # Save the AI response once the stream has finished
+                    if final_response is not None:
+                        await firebase_service.queue_ai_tip(uid, {
+                            "response": final_response,
+                            "request_data": data,
+                            "created_at": firebase_admin.firestore.SERVER_TIMESTAMP
+                        })
+                
+                body = generate()
+                weakref.finalize(body, release)
+                return Response(
+                    body,
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+                )
+            except Exception:
+                release()
+                raise
+            
+        except Exception as e:
+            logger.error("Error in stream_ai_insights: %s", e)
+            return jsonify({"error": "Server error", "message": str(e)}), 500
+
+    @app.route('/api/insights/history', methods=['GET'])
+    @requires_services('auth', 'firebase')
+    @require_auth
+    async def get_insights_history(uid):
+        """
+        Get history of AI insights for the user
+        """
+        try:
+            # Get limit, cursor and projection from query params
+            limit = min(max(request.args.get('limit', default=10, type=int), 1), MAX_PAGE_SIZE)
+            cursor = request.args.get('cursor', default=None, type=str)
+            fields = parse_fields(request.args.get('fields', default=None, type=str))
             
             # Get insights history from Firestore
-            history = firebase_service.get_ai_tips_history(uid, limit)
+            try:
+                history, next_cursor = await firebase_service.get_ai_tips_history(
+                    uid, limit, cursor=cursor, fields=fields
+                )
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
             
-            return jsonify({"history": history}), 200
+            return jsonify({"history": history, "next_cursor": next_cursor}), 200
             
-        except auth.InvalidIdTokenError:
-            return jsonify({"error": "Invalid or expired token"}), 401
         except Exception as e:
-            print(f"Error in get_insights_history: {e}")
+            logger.error("Error in get_insights_history: %s", e)
             return jsonify({"error": "Server error", "message": str(e)}), 500
 
     @app.route('/api/expenses', methods=['POST'])
-    def add_expense():
+    @requires_services('auth', 'firebase', 'analytics')
+    @require_auth
+    async def add_expense(uid):
         """
         Add a new expense
         """
         try:
-            # Verify the Firebase ID token
-            id_token = request.headers.get('Authorization', '').replace('Bearer ', '')
-            if not id_token:
-                return jsonify({"error": "No authorization token provided"}), 401
-                
-            # Verify token and get user ID
-            decoded_token = auth.verify_id_token(id_token)
-            uid = decoded_token['uid']
-            
             # Get expense data
-            data = request.json
+            data = await request.get_json()
             
-            # Validate expense data (should be expanded)
-            if 'amount' not in data or 'category' not in data:
-                return jsonify({"error": "Amount and category are required"}), 400
+            # Validate expense data
+            validation_errors = validate_expense_data(data)
+            if validation_errors:
+                return jsonify({"error": "Validation Error", "details": validation_errors}), 400
                 
             # Add timestamp
             data['created_at'] = firebase_admin.firestore.SERVER_TIMESTAMP
             
             # Save to Firestore
-            expense_id = firebase_service.add_expense(uid, data)
+            expense_id = await firebase_service.add_expense(uid, data)
+            analytics_service.invalidate(uid)
             
             return jsonify({
                 "message": "Expense added successfully",
                 "expense_id": expense_id
             }), 201
             
-        except auth.InvalidIdTokenError:
-            return jsonify({"error": "Invalid or expired token"}), 401
         except Exception as e:
-            print(f"Error in add_expense: {e}")
+            logger.error("Error in add_expense: %s", e)
             return jsonify({"error": "Server error", "message": str(e)}), 500
 
-    @app.route('/api/expenses', methods=['GET'])
-    def get_expenses():
+    @app.route('/api/expenses/import', methods=['POST'])
+    @requires_services('auth', 'firebase', 'analytics')
+    @require_auth
+    async def import_expenses(uid):
         """
-        Get user expenses with filtering options
+        Bulk import expenses from a CSV or NDJSON upload
         """
+        stream = None
         try:
-            # Verify the Firebase ID token
-            id_token = request.headers.get('Authorization', '').replace('Bearer ', '')
-            if not id_token:
-                return jsonify({"error": "No authorization token provided"}), 401
+            max_bytes = app.config.get('EXPENSE_IMPORT_MAX_BYTES', 16 * 1024 * 1024)
+            
+            def too_large():
+                return jsonify({"error": f"Upload too large (max {max_bytes} bytes)"}), 413
+            
+            if request.content_length is not None and request.content_length > max_bytes:
+                return too_large()
+
+            # Accept either a multipart file upload or a raw request body; neither
+            # is held in memory whole (the form parser spools file parts itself)
+            upload = None
+            try:
+                if request.mimetype == 'multipart/form-data':
+                    upload = (await request.files).get('file')
+                    if not upload:
+                        return jsonify({"error": "No file uploaded"}), 400
+                    stream = upload.stream
+                else:
+                    stream = await _spool_body(
+                        request.body, max_bytes, app.config.get('EXPENSE_IMPORT_SPOOL_BYTES', 1024 * 1024)
+                    )
+                    if stream is None:
+                        return too_large()
+            except RequestEntityTooLarge:
+                return too_large()
+
+            fmt = detect_import_format(
+                upload.mimetype if upload else request.content_type,
+                filename=upload.filename if upload else None,
+                explicit=request.args.get('format')
+            )
+            if not fmt:
+                return jsonify({"error": "Unsupported format. Upload CSV or NDJSON"}), 400
+            
+            max_rows = app.config.get('EXPENSE_IMPORT_MAX_ROWS', 100000)
+            max_errors = app.config.get('EXPENSE_IMPORT_MAX_REPORTED_ERRORS', 100)
+            
+            accepted = 0
+            rejected = 0
+            failed = 0
+            errors = []
+            # (row number, expense) tuples waiting to be written
+            pending = []
+            # Why the import ended early, if it did
+            stop_reason = None
+            
+            def reject(row_number, details):
+                nonlocal rejected
+                rejected += 1
+                if len(errors) < max_errors:
+                    errors.append({"row": row_number, "details": details})
+            
+            async def write_pending():
+                # Saved rows are a prefix of pending: the first failed commit stops the write
+                nonlocal accepted, failed, pending, stop_reason
+                saved = len(await firebase_service.add_expenses_batch(uid, [expense for _, expense in pending]))
+                accepted += saved
+                failed += len(pending) - saved
+                if saved < len(pending):
+                    stop_reason = f"Saving expenses failed; rows from {pending[saved][0]} on were not imported"
+                pending = []
+            
+            rows = iter_import_rows(stream, fmt)
+            
+            def parse_chunk():
+                # Parsing and validation are CPU-bound; keep them off the event loop
+                return [
+                    (row_number, row, parse_error, None if parse_error else validate_expense_data(row))
+                    for row_number, row, parse_error in itertools.islice(rows, 500)
+                ]
+            
+            while stop_reason is None:
+                chunk = await asyncio.to_thread(parse_chunk)
+                if not chunk:
+                    break
                 
-            # Verify token and get user ID
-            decoded_token = auth.verify_id_token(id_token)
-            uid = decoded_token['uid']
+                for row_number, row, parse_error, validation_errors in chunk:
+                    if accepted + failed + len(pending) + rejected >= max_rows:
+                        stop_reason = f"Too many rows (max {max_rows}); rows from {row_number} on were not imported"
+                        break
+                    
+                    if parse_error:
+                        reject(row_number, {"row": parse_error})
+                        continue
+                    
+                    if validation_errors:
+                        reject(row_number, validation_errors)
+                        continue
+                    
+                    # Use the transaction date when given so history ordering stays meaningful
+                    expense = dict(row)
+                    expense['amount'] = float(row['amount'])
+                    if row.get('date'):
+                        expense['created_at'] = parse_iso_datetime(row['date'])
+                    else:
+                        expense['created_at'] = firebase_admin.firestore.SERVER_TIMESTAMP
+                    pending.append((row_number, expense))
+                
+                # Write in Firestore-sized batches so memory stays constant
+                if len(pending) >= 500:
+                    await write_pending()
+            
+            if pending:
+                await write_pending()
+            analytics_service.invalidate(uid)
+            
+            result = {
+                "message": "Import finished",
+                "accepted": accepted,
+                "rejected": rejected,
+                "failed": failed,
+                "errors": errors
+            }
+            if stop_reason:
+                # Rows written before the stop stay written; report them as a partial success
+                result.update({"message": "Import stopped", "error": stop_reason})
+                return jsonify(result), 207
+            return jsonify(result), 200
             
+        except Exception as e:
+            logger.error("Error in import_expenses: %s", e)
+            return jsonify({"error": "Server error", "message": str(e)}), 500
+        finally:
+            if stream is not None:
+                stream.close()
+
+    @app.route('/api/expenses', methods=['GET'])
+    @requires_services('auth', 'firebase')
+    @require_auth
+    async def get_expenses(uid):
+        """
+        Get user expenses with filtering options
+        """
+        try:
             # Get query parameters
-            limit = request.args.get('limit', default=20, type=int)
+            limit = min(max(request.args.get('limit', default=20, type=int), 1), MAX_PAGE_SIZE)
             category = request.args.get('category', default=None, type=str)
             start_date = request.args.get('start_date', default=None, type=str)
             end_date = request.args.get('end_date', default=None, type=str)
+            cursor = request.args.get('cursor', default=None, type=str)
+            fields = parse_fields(request.args.get('fields', default=None, type=str))
             
             # Get expenses from Firestore
-            expenses = firebase_service.get_expenses(
-                uid, 
-                limit=limit,
-                category=category,
-                start_date=start_date,
-                end_date=end_date
+            try:
+                expenses, next_cursor = await firebase_service.get_expenses(
+                    uid, 
+                    limit=limit,
+                    category=category,
+                    start_date=start_date,
+                    end_date=end_date,
+                    cursor=cursor,
+                    fields=fields
+                )
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            
+            return jsonify({"expenses": expenses, "next_cursor": next_cursor}), 200
+            
+        except Exception as e:
+            logger.error("Error in get_expenses: %s", e)
+            return jsonify({"error": "Server error", "message": str(e)}), 500
+
+    @app.route('/api/analytics/spending', methods=['GET'])
+    @requires_services('auth', 'analytics', 'firebase')
+    @require_auth
+    async def get_spending_analytics(uid):
+        """
+        Get spending trends, month-end forecast, category burn rates and
+        unusual transactions
+        """
+        try:
+            # Get query parameters
+            days = min(max(request.args.get('days', default=90, type=int), 1), 366)
+            weeks = min(max(request.args.get('weeks', default=26, type=int), 1), 104)
+            try:
+                budget = _non_negative_arg('budget')
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            
+            analytics = await analytics_service.get_spending_analytics_async(
+                uid,
+                days=days,
+                weeks=weeks,
+                budget=budget
             )
             
-            return jsonify({"expenses": expenses}), 200
+            return jsonify(analytics), 200
+            
+        except Exception as e:
+            logger.error("Error in get_spending_analytics: %s", e)
+            return jsonify({"error": "Server error", "message": str(e)}), 500
+
+    @app.route('/api/scholarships', methods=['GET'])
+    @requires_services('scholarships')
+    async def search_scholarships():
+        """
+        Search the scholarship catalog by text and eligibility, ranked and
+        paginated (served from in-memory indexes, no LLM call)
+        """
+        try:
+            limit = min(max(request.args.get('limit', default=20, type=int), 1), MAX_PAGE_SIZE)
+            offset = max(request.args.get('offset', default=0, type=int), 0)
+            
+            try:
+                min_amount = _non_negative_arg('min_amount')
+                results = scholarship_service.search(
+                    query=request.args.get('q', default=None, type=str),
+                    need=request.args.get('need', default=None, type=str),
+                    major=request.args.get('major', default=None, type=str),
+                    state=request.args.get('state', default=None, type=str),
+                    category=request.args.get('category', default=None, type=str),
+                    deadline_after=request.args.get('deadline_after', default=None, type=str),
+                    deadline_before=request.args.get('deadline_before', default=None, type=str),
+                    min_amount=min_amount,
+                    sort=request.args.get('sort', default='relevance', type=str),
+                    limit=limit,
+                    offset=offset
+                )
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            
+            return jsonify(results), 200
+            
+        except Exception as e:
+            logger.error("Error in search_scholarships: %s", e)
+            return jsonify({"error": "Server error", "message": str(e)}), 500
+
+    @app.route('/api/debt/payoff', methods=['POST'])
+    @requires_services('auth', 'debt')
+    @require_auth
+    async def simulate_debt_payoff(uid):
+        """
+        Simulate paying off several debts under avalanche, snowball or custom
+        ordering for many extra-payment amounts at once
+        """
+        try:
+            data = await request.get_json() or {}
+            
+            # NumPy simulation runs on a worker thread so the event loop stays responsive
+            try:
+                plan = await asyncio.to_thread(
+                    debt_service.simulate,
+                    data.get('debts'),
+                    extra_payments=data.get('extra_payments', [0]),
+                    strategies=data.get('strategies', ['avalanche', 'snowball']),
+                    order=data.get('order'),
+                    schedule_extra=data.get('schedule_extra')
+                )
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            
+            return jsonify(plan), 200
             
-        except auth.InvalidIdTokenError:
-            return jsonify({"error": "Invalid or expired token"}), 401
         except Exception as e:
-            print(f"Error in get_expenses: {e}")
+            logger.error("Error in simulate_debt_payoff: %s", e)
             return jsonify({"error": "Server error", "message": str(e)}), 500
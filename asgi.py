@@ -0,0 +1,14 @@
+"""
+Production ASGI entry point
+
+    gunicorn asgi:app            # settings are read from gunicorn.conf.py
+
+The app (route table, lazy service proxies) is built once in the gunicorn
+master (preload_app) and inherited by every worker. Services, their network
+clients and background threads are built per worker by the warm-up that the
+post_fork hook starts; async clients bind to the worker's event loop on
+first use.
+"""
+from main import create_app
+
+app = create_app(start_clients=False)
@@ -0,0 +1,40 @@
+"""
+Microbenchmark for the compiled validators in utils/validators.py
+
+Usage:
+    python -m benchmarks.bench_validators [--number N]
+"""
+import argparse
+import timeit
+
+from utils.validators import (
+    validate_user_data, validate_insights_request, validate_expense_data,
+    validate_expense_batch
+)
+from benchmarks.fixtures import USER, INSIGHTS_REQUEST, EXPENSE
+
+
+def per_record_us(func, arg, number):
+    seconds = min(timeit.repeat(lambda: func(arg), number=number, repeat=5))
+    return seconds / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--number', type=int, default=20000, help='Calls per timing run')
+    args = parser.parse_args()
+
+    rows = [dict(EXPENSE) for _ in range(1000)]
+
+    print(f"{'validator':<32}{'us/record':>12}")
+    print(f"{'validate_user_data':<32}{per_record_us(validate_user_data, USER, args.number):>12.2f}")
+    print(f"{'validate_insights_request':<32}{per_record_us(validate_insights_request, INSIGHTS_REQUEST, args.number):>12.2f}")
+    print(f"{'validate_expense_data':<32}{per_record_us(validate_expense_data, EXPENSE, args.number):>12.2f}")
+
+    batch_runs = max(args.number // 1000, 1)
+    batch_us = per_record_us(validate_expense_batch, rows, batch_runs) / len(rows)
+    print(f"{'validate_expense_batch (1k rows)':<32}{batch_us:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""
+Realistic inputs shared by the benchmarks
+"""
+
+USER = {
+    "firstName": "Maya",
+    "lastName": "Lopez",
+    "email": "maya.lopez@university.edu",
+    "password": "correct-horse-battery",
+    "phone": "(555) 123-4567",
+    "ssn": "123-45-6789",
+    "budget": "800",
+    "savingsGoal": "200"
+}
+
+INSIGHTS_REQUEST = {
+    "budget": 800,
+    "spent": 345.5,
+    "goal": 200,
+    "debt": 12500,
+    "topic": "student loans"
+}
+
+EXPENSE = {
+    "amount": "12.75",
+    "category": "Food",
+    "description": "Groceries",
+    "date": "2024-03-14"
+}
+
+SSN = "123-45-6789"
+
+ENCRYPTION_PASSPHRASE = "velora benchmark passphrase"
+
+AI_RESPONSE = """Hey there! Here's your personalized plan for this week:
+
+BUDGET_TIP: You've used about 43% of your $800 budget, so aim to keep this week's spending under $110 by planning meals around what's already in your fridge.
+SAVINGS_TIP: Move $5 into savings every time you skip a takeout order - it adds up to $20-30 a month without feeling like a sacrifice.
+EXPLANATION: Student loans are money you borrow for school that you repay with interest later; federal loans usually have lower, fixed rates and flexible repayment plans.
+SCHOLARSHIP: Look into the Federal Pell Grant and your state's need-based grant program - both are aimed at students with demonstrated financial need.
+EARN_EXTRA: Sign up as a peer tutor at your campus learning center or on an online platform; many students earn $15-25 an hour in subjects they already know well.
+
+You're doing great - small, consistent steps make the biggest difference!"""
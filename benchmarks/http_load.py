@@ -0,0 +1,169 @@
+"""
+HTTP load test for comparing server setups
+
+Drives a fixed number of concurrent keep-alive clients against one endpoint
+for a fixed duration and reports throughput and latency percentiles.
+Optionally runs background clients against a second endpoint at the same
+time, e.g. slow LLM-backed requests, to measure their effect on the
+foreground route.
+
+Throughput: compare the development server with the production gunicorn
+setup on the same machine (FLASK_ENV=production, same .env):
+
+    # 1. Development server (single process)
+    FLASK_DEBUG=false python main.py
+    python -m benchmarks.http_load --url http://127.0.0.1:5000/api/health
+
+    # 2. gunicorn uvicorn workers (gunicorn.conf.py)
+    gunicorn asgi:app
+    python -m benchmarks.http_load --url http://127.0.0.1:5000/api/health
+
+    # 2b. Without gunicorn/uvicorn, serve the same ASGI app with Hypercorn
+    hypercorn asgi:app --bind 127.0.0.1:5000 --workers 1
+
+Measured 2026-10-17 on a 1-vCPU x86_64 VM (Python 3.11.7, Quart 0.22,
+Hypercorn 0.18), 32 clients for 10 s, load generator on the same core,
+no Firebase credentials (the routes below need none):
+
+    server                       endpoint                   req/s   p50 ms   p99 ms
+    python main.py (dev server)  /api/health                566-597  52-56  109-119
+    hypercorn asgi:app, 1 worker /api/health                789-831  38-40   63-79
+    python main.py (dev server)  /api/scholarships?q=grant      522     59      114
+    hypercorn asgi:app, 1 worker /api/scholarships?q=grant      705     45       96
+
+Not measured here: gunicorn with uvicorn workers (neither is installed),
+more than one worker (one core), and the pre-ASGI Flask dev server
+(flask-cors is not installed, so the baseline tree does not start).
+
+Tail latency under LLM load: keep 200 insight requests in flight and
+measure a non-LLM route. __N__ in the background body is replaced by a
+per-request counter so every request misses the insights cache:
+
+    python -m benchmarks.http_load \
+        --url http://127.0.0.1:5000/api/users/profile --concurrency 16 \
+        --background-url http://127.0.0.1:5000/api/insights --background-concurrency 200 \
+        --background-body '{"budget": 1__N__000, "spent": 100, "goal": 50, "debt": 0, "topic": "budgeting"}' \
+        --header 'Authorization: Bearer <token>'
+
+Run it against the threaded build (before the async route layer) and the
+current one with the same flags and compare the foreground p99: with thread
+workers the profile requests queue behind the in-flight completions, on the
+event loop they do not.
+
+Not measured yet: both routes need a verified Firebase ID token and
+/api/insights needs an OpenAI key, and the benchmark host had neither
+credentials nor outbound network. Record the foreground p99 of both
+builds here once it has been run against a staging project.
+
+Use --header 'Authorization: Bearer <token>' for authenticated endpoints.
+Run the load generator on a different core or machine than the server when
+possible.
+"""
+import time
+import argparse
+import itertools
+import threading
+import http.client
+from urllib.parse import urlsplit
+
+_request_counter = itertools.count()
+
+
+def worker(url, headers, deadline, latencies, errors, method='GET', body=None):
+    parts = urlsplit(url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    connection = None
+
+    while time.perf_counter() < deadline:
+        if connection is None:
+            connection = connection_class(parts.hostname, parts.port, timeout=30)
+        payload = body.replace('__N__', str(next(_request_counter))).encode() if body else None
+        start = time.perf_counter()
+        try:
+            connection.request(method, path, body=payload, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 500:
+                errors.append(response.status)
+            else:
+                latencies.append(time.perf_counter() - start)
+            if response.getheader('Connection', '').lower() == 'close':
+                connection.close()
+                connection = None
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            connection.close()
+            connection = None
+
+    if connection is not None:
+        connection.close()
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(int(len(sorted_values) * fraction), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:5000/api/health', help='Endpoint to load')
+    parser.add_argument('--concurrency', type=int, default=32, help='Concurrent clients')
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds to run')
+    parser.add_argument('--header', action='append', default=[], help="Extra header, 'Name: value'")
+    parser.add_argument('--background-url', help='Endpoint loaded in the background (POST)')
+    parser.add_argument('--background-concurrency', type=int, default=100, help='Concurrent background clients')
+    parser.add_argument('--background-body', default='{}', help='JSON body; __N__ is replaced by a counter')
+    args = parser.parse_args()
+
+    headers = dict(header.split(':', 1) for header in args.header)
+    headers = {name.strip(): value.strip() for name, value in headers.items()}
+
+    deadline = time.perf_counter() + args.duration
+    latencies, errors = [], []
+    threads = [
+        threading.Thread(target=worker, args=(args.url, headers, deadline, latencies, errors))
+        for _ in range(args.concurrency)
+    ]
+
+    background_latencies, background_errors = [], []
+    if args.background_url:
+        background_headers = dict(headers, **{'Content-Type': 'application/json'})
+        threads += [
+            threading.Thread(
+                target=worker,
+                args=(args.background_url, background_headers, deadline, background_latencies,
+                      background_errors, 'POST', args.background_body),
+                daemon=True
+            )
+            for _ in range(args.background_concurrency)
+        ]
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    report(args.url, args.concurrency, latencies, errors, elapsed)
+    if args.background_url:
+        print()
+        report(args.background_url, args.background_concurrency, background_latencies, background_errors, elapsed)
+
+
+def report(url, concurrency, latencies, errors, elapsed):
+    latencies.sort()
+    print(f"url          {url}")
+    print(f"concurrency  {concurrency}")
+    print(f"requests     {len(latencies)}")
+    print(f"errors       {len(errors)}")
+    print(f"req/s        {len(latencies) / elapsed:.1f}")
+    for label, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99)):
+        print(f"{label} (ms)     {percentile(latencies, fraction) * 1000:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""
+Microbenchmark suite for the CPU-side code on the request path
+
+Runs each benchmark, writes a machine-readable JSON report and compares the
+results against recorded baselines. Comparisons use the fastest run (min_ns),
+which is far less sensitive to scheduler noise than the median. Exits with
+status 1 when a benchmark is slower than its baseline by more than the
+tolerance.
+
+Usage:
+    python -m benchmarks.run                      # run and compare with baselines
+    python -m benchmarks.run --report report.json # also write a JSON report
+    python -m benchmarks.run --update-baseline    # record new baselines
+    python -m benchmarks.run --filter encryption  # only matching benchmarks
+
+Baselines are machine-specific; record them on the machine that runs the
+comparison (e.g. the CI runner) with --update-baseline.
+"""
+import os
+import sys
+import json
+import time
+import timeit
+import platform
+import argparse
+import statistics
+
+from benchmarks import fixtures
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baselines.json')
+
+
+def _openai_service():
+    from services.openai_service import OpenAIService
+    return OpenAIService(api_key='benchmark', cache_ttl=0)
+
+
+def _encryption_service():
+    from services.encryption_service import EncryptionService
+    return EncryptionService(encryption_key=fixtures.ENCRYPTION_PASSPHRASE, previous_keys=[])
+
+
+def bench_create_financial_prompt():
+    service = _openai_service()
+    data = fixtures.INSIGHTS_REQUEST
+    return lambda: service._create_financial_prompt(
+        data['budget'], data['spent'], data['goal'], data['debt'], data['topic']
+    )
+
+
+def bench_parse_ai_response():
+    service = _openai_service()
+    return lambda: service._parse_ai_response(fixtures.AI_RESPONSE)
+
+
+def bench_encrypt():
+    service = _encryption_service()
+    return lambda: service.encrypt(fixtures.SSN)
+
+
+def bench_decrypt():
+    service = _encryption_service()
+    token = service.encrypt(fixtures.SSN)
+    return lambda: service.decrypt(token)
+
+
+def bench_derive_key():
+    service = _encryption_service()
+    return lambda: service._derive_key(fixtures.ENCRYPTION_PASSPHRASE)
+
+
+def bench_validate_user_data():
+    from utils.validators import validate_user_data
+    return lambda: validate_user_data(fixtures.USER)
+
+
+def bench_validate_insights_request():
+    from utils.validators import validate_insights_request
+    return lambda: validate_insights_request(fixtures.INSIGHTS_REQUEST)
+
+
+def bench_validate_expense_data():
+    from utils.validators import validate_expense_data
+    return lambda: validate_expense_data(fixtures.EXPENSE)
+
+
+BENCHMARKS = {
+    "openai.create_financial_prompt": bench_create_financial_prompt,
+    "openai.parse_ai_response": bench_parse_ai_response,
+    "encryption.encrypt": bench_encrypt,
+    "encryption.decrypt": bench_decrypt,
+    "encryption.derive_key": bench_derive_key,
+    "validators.validate_user_data": bench_validate_user_data,
+    "validators.validate_insights_request": bench_validate_insights_request,
+    "validators.validate_expense_data": bench_validate_expense_data,
+}
+
+
+def measure(func, repeat=7, min_time=0.2):
+    """
+    Time func and return nanoseconds per call
+
+    Args:
+        func (callable): Zero-argument function to time
+        repeat (int, optional): Number of timing runs
+        min_time (float, optional): Minimum seconds per timing run
+
+    Returns:
+        dict: Median/min/max nanoseconds per call, calls per run and runs
+    """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    # autorange targets 0.2s; scale up for a steadier result if asked
+    number = max(int(number * min_time / 0.2), 1)
+
+    per_call = [seconds / number * 1e9 for seconds in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "median_ns": statistics.median(per_call),
+        "min_ns": min(per_call),
+        "max_ns": max(per_call),
+        "number": number,
+        "repeat": repeat
+    }
+
+
+def load_baselines(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f).get("benchmarks", {})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the hot-path microbenchmarks")
+    parser.add_argument('--report', help='Write a JSON report to this path')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Baseline file to compare against')
+    parser.add_argument('--update-baseline', action='store_true', help='Record the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.3,
+                        help='Allowed slowdown relative to baseline (0.3 = 30%%)')
+    parser.add_argument('--filter', default='', help='Only run benchmarks whose name contains this')
+    parser.add_argument('--repeat', type=int, default=7, help='Timing runs per benchmark')
+    args = parser.parse_args(argv)
+
+    baselines = load_baselines(args.baseline)
+    results = {}
+    regressions = []
+
+    print(f"{'benchmark':<40}{'min':>14}{'baseline':>14}{'change':>10}")
+    for name, setup in BENCHMARKS.items():
+        if args.filter not in name:
+            continue
+
+        result = measure(setup(), repeat=args.repeat)
+        baseline = baselines.get(name, {}).get("min_ns")
+        if baseline:
+            result["baseline_ns"] = baseline
+            result["change"] = result["min_ns"] / baseline - 1
+            result["regression"] = result["change"] > args.tolerance
+            if result["regression"]:
+                regressions.append(name)
+        results[name] = result
+
+        baseline_text = f"{baseline / 1000:>11.2f} us" if baseline else f"{'-':>14}"
+        change_text = f"{result['change']:>+9.1%}" if baseline else f"{'-':>10}"
+        flag = "  REGRESSION" if result.get("regression") else ""
+        print(f"{name:<40}{result['min_ns'] / 1000:>11.2f} us{baseline_text}{change_text}{flag}")
+
+    report = {
+        "created_at": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "tolerance": args.tolerance,
+        "benchmarks": results,
+        "regressions": regressions
+    }
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    if args.update_baseline:
+        merged = load_baselines(args.baseline)
+        merged.update({
+            name: {"min_ns": round(result["min_ns"], 1), "median_ns": round(result["median_ns"], 1)}
+            for name, result in results.items()
+        })
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                "created_at": report["created_at"],
+                "python": report["python"],
+                "machine": report["machine"],
+                "benchmarks": merged
+            }, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Baselines written to {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+Import-time and cold-start measurement
+
+Runs fresh interpreters so nothing is cached in-process, and reports:
+
+  * import cost per top-level package (self time summed from -X importtime)
+    and the slowest individual modules (cumulative time)
+  * cold-start phases: import main, create_app(), first /api/health response,
+    and time until the background warm-up reports every service ready
+
+Exits with status 1 when importing main plus create_app() exceeds the budget,
+so startup regressions can fail CI.
+
+Usage:
+    python -m benchmarks.startup                    # report and check the default budget
+    python -m benchmarks.startup --budget-ms 300    # stricter budget
+    python -m benchmarks.startup --report startup.json
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import main + create_app() must stay under this on the reference machine
+STARTUP_BUDGET_MS = 500
+
+COLD_START_SCRIPT = """
+import asyncio, json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+app = main.create_app(start_clients=False)
+created = time.perf_counter()
+
+async def run():
+    client = app.test_client()
+    await client.get('/api/health')
+    first_response = time.perf_counter()
+    await asyncio.to_thread(main.init_clients(app).join, {warm_up_timeout})
+    warmed = time.perf_counter()
+    readiness = await (await client.get('/api/health')).get_json()
+    return first_response, warmed, readiness
+
+first_response, warmed, readiness = asyncio.run(run())
+print(json.dumps({{
+    "import_ms": (imported - start) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "first_response_ms": (first_response - start) * 1000,
+    "warm_up_ms": (warmed - first_response) * 1000,
+    "ready": readiness["ready"],
+    "services": readiness["services"]
+}}))
+"""
+
+
+def measure_imports(module):
+    """
+    Import a module in a fresh interpreter under -X importtime
+
+    Returns:
+        list: (module name, self us, cumulative us) tuples
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        entries.append((name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def measure_cold_start(warm_up_timeout):
+    """
+    Time the startup phases in a fresh interpreter
+
+    Returns:
+        dict: Phase timings in milliseconds and the final readiness report
+    """
+    result = subprocess.run(
+        [sys.executable, '-c', COLD_START_SCRIPT.format(warm_up_timeout=warm_up_timeout)],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"cold start failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='main', help='Module to import')
+    parser.add_argument('--top', type=int, default=15, help='Rows to show per table')
+    parser.add_argument('--budget-ms', type=float, default=STARTUP_BUDGET_MS,
+                        help='Budget for import + create_app()')
+    parser.add_argument('--warm-up-timeout', type=float, default=60.0, help='Seconds to wait for warm-up')
+    parser.add_argument('--report', help='Write a JSON report to this path')
+    args = parser.parse_args()
+
+    entries = measure_imports(args.module)
+    by_package = defaultdict(int)
+    for name, self_us, _ in entries:
+        by_package[name.split('.')[0]] += self_us
+
+    print(f"{'package':<40}{'self ms':>10}")
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<40}{self_us / 1000:>10.1f}")
+
+    print(f"\n{'module':<56}{'cumulative ms':>16}")
+    for name, _, cumulative_us in sorted(entries, key=lambda entry: -entry[2])[:args.top]:
+        print(f"{name[:55]:<56}{cumulative_us / 1000:>16.1f}")
+
+    cold_start = measure_cold_start(args.warm_up_timeout)
+    print()
+    for phase in ('import_ms', 'create_app_ms', 'first_response_ms', 'warm_up_ms'):
+        print(f"{phase:<24}{cold_start[phase]:>10.1f}")
+    for name, state in cold_start['services'].items():
+        seconds = state.get('init_seconds')
+        timing = f"{seconds * 1000:.1f} ms" if seconds is not None else "-"
+        print(f"  {name:<20}{state['state']:<10}{timing}")
+
+    startup_ms = cold_start['import_ms'] + cold_start['create_app_ms']
+    within_budget = startup_ms <= args.budget_ms
+    print(f"\nstartup {startup_ms:.1f} ms (budget {args.budget_ms:.0f} ms): {'OK' if within_budget else 'OVER BUDGET'}")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({
+                "packages_ms": {package: self_us / 1000 for package, self_us in by_package.items()},
+                "cold_start": cold_start,
+                "budget_ms": args.budget_ms
+            }, f, indent=2)
+
+    sys.exit(0 if within_budget else 1)
+
+
+if __name__ == '__main__':
+    main()
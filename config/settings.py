@@ -18,6 +18,51 @@ class BaseConfig:
     
     # OpenAI Configuration
     OPENAI_MODEL = 'gpt-3.5-turbo'
+    OPENAI_MAX_ASYNC_CONCURRENCY = int(os.environ.get('OPENAI_MAX_ASYNC_CONCURRENCY', 128))
+    
+    # Insights cache configuration
+    INSIGHTS_CACHE_TTL = int(os.environ.get('INSIGHTS_CACHE_TTL', 3600))
+    INSIGHTS_CACHE_MAX_ENTRIES = int(os.environ.get('INSIGHTS_CACHE_MAX_ENTRIES', 2048))
+    INSIGHTS_CACHE_MAX_BYTES = int(os.environ.get('INSIGHTS_CACHE_MAX_BYTES', 8 * 1024 * 1024))
+    
+    # Seconds to wait for OpenAI (around its p95) before answering with local insights; 0 waits indefinitely
+    INSIGHTS_DEADLINE_SECONDS = float(os.environ.get('INSIGHTS_DEADLINE_SECONDS', 6.0))
+    
+    # Seconds spending analytics stay cached. Each worker has its own cache and
+    # only the worker that saved an expense drops its entry, so this bounds how
+    # stale another worker's answer can be
+    ANALYTICS_CACHE_TTL = int(os.environ.get('ANALYTICS_CACHE_TTL', 60))
+    
+    # Profile cache configuration
+    PROFILE_CACHE_TTL = int(os.environ.get('PROFILE_CACHE_TTL', 60))
+    PROFILE_CACHE_MAX_ENTRIES = int(os.environ.get('PROFILE_CACHE_MAX_ENTRIES', 10000))
+    
+    # Bearer token for /api/metrics and /api/insights/admission; without one
+    # they only answer direct (not proxied) requests from loopback
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    
+    # Insights admission control (per uid, and per worker for the in-flight cap);
+    # the rate must be positive and the burst at least 1
+    INSIGHTS_RATE_PER_MINUTE = float(os.environ.get('INSIGHTS_RATE_PER_MINUTE', 10))
+    INSIGHTS_BURST = int(os.environ.get('INSIGHTS_BURST', 5))
+    INSIGHTS_MAX_IN_FLIGHT = int(os.environ.get('INSIGHTS_MAX_IN_FLIGHT', 64))
+    
+    # Batch insights configuration
+    INSIGHTS_BATCH_MAX_ITEMS = 50
+    INSIGHTS_BATCH_WORKERS = int(os.environ.get('INSIGHTS_BATCH_WORKERS', 4))
+    
+    # Scholarship catalog (JSON file or SQLite database with a `scholarships` table)
+    SCHOLARSHIPS_PATH = os.environ.get(
+        'SCHOLARSHIPS_PATH',
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'scholarships.json')
+    )
+    
+    # Bulk expense import configuration
+    EXPENSE_IMPORT_MAX_ROWS = 100000
+    EXPENSE_IMPORT_MAX_BYTES = int(os.environ.get('EXPENSE_IMPORT_MAX_BYTES', 16 * 1024 * 1024))
+    # Upload bytes kept in memory before the spooled copy moves to a temporary file
+    EXPENSE_IMPORT_SPOOL_BYTES = 1024 * 1024
+    EXPENSE_IMPORT_MAX_REPORTED_ERRORS = 100
 
 class DevelopmentConfig(BaseConfig):
     """Development configuration settings."""
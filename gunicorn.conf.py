@@ -0,0 +1,68 @@
+"""
+Gunicorn settings for production (loaded automatically from the working directory)
+
+    gunicorn asgi:app
+
+Requests spend most of their time waiting on Firestore and OpenAI, so each
+worker runs an asyncio event loop (uvicorn) where a waiting request costs a
+coroutine instead of a thread. Workers are kept close to the CPU count
+because the insights and profile caches are per process: fewer, wider
+workers get better hit ratios. Note that the OpenAI concurrency limit
+(OPENAI_MAX_ASYNC_CONCURRENCY) also applies per worker.
+"""
+import os
+import logging
+import multiprocessing
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+worker_class = 'uvicorn.workers.UvicornWorker'
+workers = int(os.environ.get('WEB_CONCURRENCY', max(multiprocessing.cpu_count(), 2)))
+
+# Import and build the app once in the master; workers inherit it copy-on-write
+preload_app = True
+
+# LLM calls and insight streams can take tens of seconds
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+# On SIGTERM, workers stop accepting and get this long to finish in-flight requests
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+backlog = 2048
+
+# Recycle workers periodically to bound memory growth, staggered so they do not restart together
+max_requests = 5000
+max_requests_jitter = 500
+
+# Worker heartbeat files on tmpfs avoid stalls on slow container disks
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+# Request logs come from the app's structured logger
+accesslog = None
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    """
+    Give each worker its own Firestore/OpenAI clients and background threads;
+    none of them survive fork()
+    """
+    import asgi
+    from main import init_clients
+    from utils.log import setup_logging
+
+    setup_logging(level=logging.DEBUG if asgi.app.debug else logging.INFO)
+    init_clients(asgi.app)
+
+
+def worker_exit(server, worker):
+    """
+    Runs after the worker has drained its in-flight requests and run the
+    app's after_serving hooks
+    """
+    import asgi
+    from main import shutdown_clients
+    from utils.log import stop_logging
+
+    shutdown_clients(asgi.app)
+    stop_logging()
@@ -1,98 +1,330 @@
 import os
-from flask import Flask, request, jsonify
-from flask_cors import CORS
+import click
+import logging
+from quart import Quart, jsonify, request
+from quart_cors import cors
 from dotenv import load_dotenv
-import firebase_admin
-from firebase_admin import credentials, firestore
 
 from app.routes import register_routes
 from config.settings import get_settings
-from services.encryption_service import EncryptionService
-from services.firebase_service import FirebaseService
-from services.openai_service import OpenAIService
+from utils.lazy import LazyService, is_ready, get_readiness, start_warm_up, wait_ready, requires_services
+from utils.log import setup_logging
 
 # Load environment variables
 load_dotenv()
 
-app = Flask(__name__)
-CORS(app, resources={r"/api/*": {"origins": "*"}})  # Configure CORS in production
-
-# Initialize configuration based on environment
-settings = get_settings()
-app.config.from_object(settings)
-
-# Initialize secret key
-app.secret_key = os.environ.get('SECRET_KEY', 'development-secret-key')
-
-# Initialize Firebase if credentials exist
-firebase_credentials = {
-    "type": os.environ.get('FIREBASE_TYPE'),
-    "project_id": os.environ.get('FIREBASE_PROJECT_ID'),
-    "private_key_id": os.environ.get('FIREBASE_PRIVATE_KEY_ID'),
-    "private_key": os.environ.get('FIREBASE_PRIVATE_KEY').replace('\\n', '\n') if os.environ.get('FIREBASE_PRIVATE_KEY') else None,
-    "client_email": os.environ.get('FIREBASE_CLIENT_EMAIL'),
-    "client_id": os.environ.get('FIREBASE_CLIENT_ID'),
-    "auth_uri": os.environ.get('FIREBASE_AUTH_URI'),
-    "token_uri": os.environ.get('FIREBASE_TOKEN_URI'),
-    "auth_provider_x509_cert_url": os.environ.get('FIREBASE_AUTH_PROVIDER_X509_CERT_URL'),
-    "client_x509_cert_url": os.environ.get('FIREBASE_CLIENT_X509_CERT_URL')
-}
-
-# Initialize Firebase Admin SDK
-try:
-    cred = credentials.Certificate(firebase_credentials)
-    firebase_admin.initialize_app(cred)
-    db = firestore.client()
-    print("Firebase initialized successfully.")
-except Exception as e:
-    print(f"Error initializing Firebase: {e}")
-    db = None
-
-# Initialize services
-encryption_service = EncryptionService(
-    encryption_key=os.environ.get('ENCRYPTION_KEY')
-)
-
-firebase_service = FirebaseService(db=db)
-
-openai_service = OpenAIService(
-    api_key=os.environ.get('OPENAI_API_KEY')
-)
-
-# Register routes
-register_routes(app, encryption_service, firebase_service, openai_service)
-
-# Health check endpoint
-@app.route('/api/health', methods=['GET'])
-def health_check():
-    return jsonify({
-        "status": "healthy",
-        "message": "Velora College API is running"
-    })
-
-# Error handlers
-@app.errorhandler(400)
-def bad_request(error):
-    return jsonify({
-        "error": "Bad Request",
-        "message": str(error)
-    }), 400
-
-@app.errorhandler(404)
-def not_found(error):
-    return jsonify({
-        "error": "Not Found",
-        "message": "The requested resource was not found"
-    }), 404
-
-@app.errorhandler(500)
-def server_error(error):
-    return jsonify({
-        "error": "Internal Server Error",
-        "message": "An unexpected error occurred"
-    }), 500
+logger = logging.getLogger(__name__)
+
+
+def init_firebase(async_client=False):
+    """
+    Initialize the Firebase Admin SDK (once per process) from environment credentials
+
+    Args:
+        async_client (bool, optional): Return a firestore.AsyncClient instead
+
+    Returns:
+        firestore.Client: Firestore client, or None if initialization failed
+    """
+    import firebase_admin
+    from firebase_admin import credentials, firestore, firestore_async
+
+    firebase_credentials = {
+        "type": os.environ.get('FIREBASE_TYPE'),
+        "project_id": os.environ.get('FIREBASE_PROJECT_ID'),
+        "private_key_id": os.environ.get('FIREBASE_PRIVATE_KEY_ID'),
+        "private_key": os.environ.get('FIREBASE_PRIVATE_KEY').replace('\\n', '\n') if os.environ.get('FIREBASE_PRIVATE_KEY') else None,
+        "client_email": os.environ.get('FIREBASE_CLIENT_EMAIL'),
+        "client_id": os.environ.get('FIREBASE_CLIENT_ID'),
+        "auth_uri": os.environ.get('FIREBASE_AUTH_URI'),
+        "token_uri": os.environ.get('FIREBASE_TOKEN_URI'),
+        "auth_provider_x509_cert_url": os.environ.get('FIREBASE_AUTH_PROVIDER_X509_CERT_URL'),
+        "client_x509_cert_url": os.environ.get('FIREBASE_CLIENT_X509_CERT_URL')
+    }
+
+    try:
+        if not firebase_admin._apps:
+            cred = credentials.Certificate(firebase_credentials)
+            firebase_admin.initialize_app(cred)
+        db = firestore_async.client() if async_client else firestore.client()
+        logger.info("Firebase initialized successfully.")
+        return db
+    except Exception as e:
+        logger.error("Error initializing Firebase: %s", e)
+        return None
+
+
+# Seconds clients are asked to wait after a service failed to initialize
+SERVICE_RETRY_AFTER = 5
+
+
+def create_app(settings=None, start_clients=True):
+    """
+    Build the ASGI application (Quart, Flask's asyncio counterpart)
+
+    Services are built lazily: importing their modules, deriving the
+    encryption key and opening clients happen on the background warm-up
+    started by init_clients(). Requests that arrive before it finishes wait,
+    on a worker thread, only for the services their view declares with
+    requires_services(); health, readiness and metrics answer at once.
+
+    Args:
+        settings (type, optional): Config class (defaults to get_settings())
+        start_clients (bool, optional): Start the warm-up now. Pre-forking servers
+            pass False and call init_clients() in each worker after the fork.
+
+    Returns:
+        Quart: Configured application
+    """
+    settings = settings or get_settings()
+
+    app = Quart(__name__)
+    app = cors(app, allow_origin="*")  # Configure CORS in production
+    app.config.from_object(settings)
+
+    # Initialize secret key
+    app.secret_key = os.environ.get('SECRET_KEY', 'development-secret-key')
+
+    # Structured logs are written by a background thread so request threads never block on stdout
+    setup_logging(level=logging.DEBUG if settings.DEBUG else logging.INFO)
+
+    # Initialize services (each one is built on first use or by the warm-up)
+    def build_auth_service():
+        from services.auth_service import AuthService
+        auth_service = AuthService(
+            project_id=os.environ.get('FIREBASE_PROJECT_ID')
+        )
+        auth_service.start_cert_refresher()
+        return auth_service
+
+    def build_firebase_service():
+        from services.async_firebase_service import AsyncFirebaseService
+        return AsyncFirebaseService(
+            db=init_firebase(async_client=True),
+            profile_cache_ttl=settings.PROFILE_CACHE_TTL,
+            profile_cache_max_entries=settings.PROFILE_CACHE_MAX_ENTRIES
+        )
+
+    def build_openai_service():
+        from services.openai_service import OpenAIService
+        return OpenAIService(
+            api_key=os.environ.get('OPENAI_API_KEY'),
+            cache_ttl=settings.INSIGHTS_CACHE_TTL,
+            cache_max_entries=settings.INSIGHTS_CACHE_MAX_ENTRIES,
+            cache_max_bytes=settings.INSIGHTS_CACHE_MAX_BYTES,
+            deadline=settings.INSIGHTS_DEADLINE_SECONDS or None
+        )
+
+    def build_encryption_service():
+        from services.encryption_service import EncryptionService
+        return EncryptionService(
+            encryption_key=os.environ.get('ENCRYPTION_KEY')
+        )
+
+    def build_analytics_service():
+        from services.analytics_service import AnalyticsService
+        return AnalyticsService(firebase_service, cache_ttl=settings.ANALYTICS_CACHE_TTL)
+
+    def build_debt_service():
+        from services.debt_service import DebtPayoffService
+        return DebtPayoffService()
+
+    def build_scholarship_service():
+        from services.scholarship_service import ScholarshipService
+        return ScholarshipService(settings.SCHOLARSHIPS_PATH)
+
+    # Warm-up order: auth and Firestore are needed by almost every request
+    auth_service = LazyService('auth', build_auth_service)
+    firebase_service = LazyService('firebase', build_firebase_service)
+    openai_service = LazyService('openai', build_openai_service)
+    encryption_service = LazyService('encryption', build_encryption_service)
+    analytics_service = LazyService('analytics', build_analytics_service)
+    scholarship_service = LazyService('scholarships', build_scholarship_service)
+    debt_service = LazyService('debt', build_debt_service)
+
+    services = app.extensions['velora'] = {
+        "auth": auth_service,
+        "firebase": firebase_service,
+        "openai": openai_service,
+        "encryption": encryption_service,
+        "analytics": analytics_service,
+        "scholarships": scholarship_service,
+        "debt": debt_service
+    }
+
+    # Register routes
+    register_routes(
+        app,
+        encryption_service,
+        firebase_service,
+        openai_service,
+        auth_service=auth_service,
+        analytics_service=analytics_service,
+        scholarship_service=scholarship_service,
+        debt_service=debt_service
+    )
+
+    # Requests wait here, off the event loop, for the services their view
+    # declares (requires_services); touching an unresolved proxy inside a view
+    # would run its factory on the loop
+    @app.before_request
+    async def wait_for_services():
+        view = app.view_functions.get(request.endpoint)
+        if view is None:
+            return None
+        names = getattr(view, 'required_services', None)
+        needed = services if names is None else {name: services[name] for name in names}
+        failed = await wait_ready(needed)
+        if failed:
+            return jsonify({
+                "error": "Service Unavailable",
+                "message": f"Services failed to initialize: {', '.join(sorted(failed))}"
+            }), 503, {'Retry-After': str(SERVICE_RETRY_AFTER)}
+        return None
+
+    # Health check endpoint (never blocks on services that are still warming up)
+    @app.route('/api/health', methods=['GET'])
+    @requires_services()
+    async def health_check():
+        readiness = get_readiness(services)
+        response = {
+            "status": "healthy",
+            "message": "Velora College API is running",
+            "ready": all(entry['state'] == 'ready' for entry in readiness.values()),
+            "services": readiness
+        }
+        if is_ready(openai_service):
+            response["openai"] = openai_service.get_concurrency_stats()
+            response["prompt"] = openai_service.get_prompt_stats()
+        if is_ready(firebase_service):
+            response["write_queue"] = firebase_service.get_write_queue_stats()
+            response["profile_cache"] = firebase_service.get_profile_cache_stats()
+        return jsonify(response)
+
+    # Readiness probe for load balancers: 503 until every service is initialized
+    @app.route('/api/ready', methods=['GET'])
+    @requires_services()
+    async def readiness_check():
+        readiness = get_readiness(services)
+        ready = all(entry['state'] == 'ready' for entry in readiness.values())
+        return jsonify({"ready": ready, "services": readiness}), 200 if ready else 503
+
+    # Async clients belong to the serving event loop, so they are drained on it
+    @app.after_serving
+    async def close_async_clients():
+        if is_ready(firebase_service):
+            await firebase_service.close()
+        if is_ready(openai_service):
+            await openai_service.close()
+
+    register_commands(app)
+    register_error_handlers(app)
+
+    if start_clients:
+        init_clients(app)
+
+    return app
+
+
+def init_clients(app):
+    """
+    Start the background warm-up that builds every service, opening the
+    Firestore and OpenAI clients. gRPC channels, sockets and threads do not
+    survive fork(), so pre-forking servers call this in every worker process.
+
+    Args:
+        app (Quart): Application returned by create_app()
+
+    Returns:
+        threading.Thread: The warm-up thread
+    """
+    return start_warm_up(app.extensions['velora'])
+
+
+def shutdown_clients(app):
+    """
+    Stop background threads (queued Firestore writes are drained by the
+    app's after_serving hook, on the event loop)
+
+    Args:
+        app (Quart): Application returned by create_app()
+    """
+    services = app.extensions['velora']
+    if is_ready(services['auth']):
+        services['auth'].stop_cert_refresher()
+
+
+def register_commands(app):
+    """
+    Register maintenance commands on the app CLI. Commands run outside the
+    event loop, so they use the synchronous FirebaseService.
+    """
+    services = app.extensions['velora']
+
+    def sync_firebase_service():
+        from services.firebase_service import FirebaseService
+        return FirebaseService(db=init_firebase())
+
+    @app.cli.command('rebuild-rollups')
+    @click.option('--uid', default=None, help='Only rebuild rollups for this user')
+    def rebuild_rollups(uid):
+        """Backfill expense rollups from existing expense documents."""
+        firebase_service = sync_firebase_service()
+        user_ids = [uid] if uid else [doc.id for doc in firebase_service.db.collection('users').list_documents()]
+        for user_id in user_ids:
+            written = firebase_service.rebuild_expense_rollups(user_id)
+            click.echo(f"{user_id}: {written} rollup documents")
+
+    @app.cli.command('rotate-encryption-key')
+    @click.option('--page-size', default=500, help='Users read and committed per batch')
+    @click.option('--workers', default=None, type=int, help='Encryption worker processes')
+    @click.option('--checkpoint', default='key_rotation.checkpoint.json', help='Checkpoint file used to resume')
+    def rotate_encryption_key(page_size, workers, checkpoint):
+        """Re-encrypt every ssn_encrypted under ENCRYPTION_KEY (old keys from ENCRYPTION_PREVIOUS_KEYS)."""
+        from services.key_rotation import SSNKeyRotation
+        job = SSNKeyRotation(
+            init_firebase(),
+            services['encryption'].keys,
+            page_size=page_size,
+            workers=workers,
+            checkpoint_path=checkpoint
+        )
+        stats = job.run(progress=lambda stats: click.echo(
+            f"scanned={stats['scanned']} rotated={stats['rotated']} "
+            f"failed={stats['failed']} conflicts={stats['conflicts']} rows/sec={stats['rows_per_sec']:.0f}"
+        ))
+        click.echo(f"Done: {stats}")
+
+
+def register_error_handlers(app):
+    """
+    Register JSON error handlers
+    """
+    @app.errorhandler(400)
+    async def bad_request(error):
+        return jsonify({
+            "error": "Bad Request",
+            "message": str(error)
+        }), 400
+
+    @app.errorhandler(404)
+    async def not_found(error):
+        return jsonify({
+            "error": "Not Found",
+            "message": "The requested resource was not found"
+        }), 404
+
+    @app.errorhandler(500)
+    async def server_error(error):
+        return jsonify({
+            "error": "Internal Server Error",
+            "message": "An unexpected error occurred"
+        }), 500
+
 
 if __name__ == '__main__':
+    # Development server only; production runs `gunicorn asgi:app` (see gunicorn.conf.py)
+    app = create_app()
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_DEBUG', 'True').lower() == 'true'
     app.run(host='0.0.0.0', port=port, debug=debug)
@@ -0,0 +1,251 @@
+import asyncio
+import calendar
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from utils.cache import TTLCache
+
+SECONDS_PER_DAY = 86400
+
+# Modified z-score threshold above which a transaction is flagged (Iglewicz & Hoaglin)
+OUTLIER_THRESHOLD = 3.5
+
+
+class AnalyticsService:
+    """
+    Service for computing spending analytics over a user's expense history
+    with vectorized NumPy operations
+    """
+
+    def __init__(self, firebase_service, cache_ttl=60, cache_max_entries=5000):
+        """
+        Initialize the analytics service
+
+        Args:
+            firebase_service (FirebaseService): Source of expense history and profiles
+            cache_ttl (float, optional): Seconds cached analytics stay valid; the
+                cache is per process and invalidate() only clears this process,
+                so this bounds staleness after another worker saves an expense
+            cache_max_entries (int, optional): Maximum number of cached users
+        """
+        self.firebase_service = firebase_service
+        self.cache = TTLCache(max_entries=cache_max_entries, ttl=cache_ttl)
+
+    def get_spending_analytics(self, user_id, days=90, weeks=26, budget=None):
+        """
+        Get spending analytics for a user, cached until their next expense
+        (or, for expenses saved through another worker, the cache TTL)
+
+        Args:
+            user_id (str): Firebase user ID
+            days (int, optional): Length of the daily spend series
+            weeks (int, optional): Length of the weekly spend series
+            budget (float, optional): Monthly budget (defaults to the profile's budget)
+
+        Returns:
+            dict: Daily/weekly series, month-end forecast, category burn rates
+                and outlier transactions
+        """
+        if budget is None:
+            budget = self._profile_budget(self.firebase_service.get_user_profile(user_id))
+
+        # One cached result per user, reused while the parameters match
+        params = (days, weeks, budget)
+        cached = self.cache.get(user_id)
+        if cached is not None and cached["params"] == params:
+            return cached["analytics"]
+
+        history = self.firebase_service.get_expense_history(user_id)
+        analytics = self.compute(history, days=days, weeks=weeks, budget=budget)
+
+        self.cache.set(user_id, {"params": params, "analytics": analytics})
+        return analytics
+
+    async def get_spending_analytics_async(self, user_id, days=90, weeks=26, budget=None):
+        """
+        asyncio version of get_spending_analytics for an AsyncFirebaseService
+        source. The NumPy work runs on a worker thread so the event loop stays
+        responsive for large histories.
+        """
+        if budget is None:
+            budget = self._profile_budget(await self.firebase_service.get_user_profile(user_id))
+
+        params = (days, weeks, budget)
+        cached = self.cache.get(user_id)
+        if cached is not None and cached["params"] == params:
+            return cached["analytics"]
+
+        history = await self.firebase_service.get_expense_history(user_id)
+        analytics = await asyncio.to_thread(self.compute, history, days, weeks, budget)
+
+        self.cache.set(user_id, {"params": params, "analytics": analytics})
+        return analytics
+
+    def _profile_budget(self, profile):
+        try:
+            return float((profile or {}).get('budget') or 0)
+        except (ValueError, TypeError):
+            return 0.0
+
+    def invalidate(self, user_id):
+        """
+        Drop the cached result for a user (call after their expenses change)
+
+        Args:
+            user_id (str): Firebase user ID
+        """
+        self.cache.delete(user_id)
+
+    def compute(self, history, days=90, weeks=26, budget=0.0, now=None):
+        """
+        Compute analytics from columnar expense history
+
+        Args:
+            history (dict): Columns from FirebaseService.get_expense_history
+            days (int, optional): Length of the daily spend series
+            weeks (int, optional): Length of the weekly spend series
+            budget (float, optional): Monthly budget
+            now (float, optional): Current time as epoch seconds (for testing)
+
+        Returns:
+            dict: Analytics results
+        """
+        now = time.time() if now is None else now
+        amounts = np.asarray(history["amounts"], dtype=np.float64)
+        timestamps = np.asarray(history["timestamps"], dtype=np.float64)
+        category_names, category_codes = np.unique(
+            np.asarray(history["categories"], dtype=object).astype(str), return_inverse=True
+        )
+
+        # Whole days since the epoch (UTC) for every expense and for today
+        day_index = np.floor(timestamps / SECONDS_PER_DAY).astype(np.int64)
+        today = int(now // SECONDS_PER_DAY)
+
+        return {
+            "daily": self._daily_series(amounts, day_index, today, days),
+            "weekly": self._weekly_series(amounts, day_index, today, weeks),
+            "forecast": self._month_end_forecast(amounts, timestamps, now, budget),
+            "categories": self._category_burn(amounts, timestamps, category_codes, category_names, now),
+            "outliers": self._outliers(amounts, category_codes, category_names, timestamps, history["ids"]),
+            "expense_count": int(amounts.size)
+        }
+
+    def _daily_series(self, amounts, day_index, today, days):
+        first_day = today - days + 1
+        in_range = (day_index >= first_day) & (day_index <= today)
+        totals = np.bincount(day_index[in_range] - first_day, weights=amounts[in_range], minlength=days)
+
+        dates = [
+            datetime.fromtimestamp((first_day + offset) * SECONDS_PER_DAY, timezone.utc).date().isoformat()
+            for offset in range(days)
+        ]
+        return [{"date": date, "total": round(float(total), 2)} for date, total in zip(dates, totals)]
+
+    def _weekly_series(self, amounts, day_index, today, weeks):
+        # Epoch day 0 was a Thursday; shift so weeks start on Monday
+        week_index = (day_index + 3) // 7
+        current_week = (today + 3) // 7
+        first_week = current_week - weeks + 1
+        in_range = (week_index >= first_week) & (week_index <= current_week)
+        totals = np.bincount(week_index[in_range] - first_week, weights=amounts[in_range], minlength=weeks)
+
+        series = []
+        for offset, total in enumerate(totals):
+            week_start = (first_week + offset) * 7 - 3
+            start_date = datetime.fromtimestamp(week_start * SECONDS_PER_DAY, timezone.utc).date()
+            series.append({"week_start": start_date.isoformat(), "total": round(float(total), 2)})
+        return series
+
+    def _month_bounds(self, now):
+        current = datetime.fromtimestamp(now, timezone.utc)
+        month_start = datetime(current.year, current.month, 1, tzinfo=timezone.utc).timestamp()
+        days_in_month = calendar.monthrange(current.year, current.month)[1]
+        days_elapsed = (now - month_start) / SECONDS_PER_DAY
+        return month_start, days_in_month, max(days_elapsed, 1.0)
+
+    def _month_end_forecast(self, amounts, timestamps, now, budget):
+        month_start, days_in_month, days_elapsed = self._month_bounds(now)
+        spent = float(amounts[(timestamps >= month_start) & (timestamps <= now)].sum())
+
+        # Linear projection of the month-to-date run rate
+        projected = spent / days_elapsed * days_in_month
+        return {
+            "spent_to_date": round(spent, 2),
+            "projected_total": round(projected, 2),
+            "budget": round(float(budget), 2),
+            "projected_remaining": round(float(budget) - projected, 2),
+            "on_track": projected <= budget if budget else None
+        }
+
+    def _category_burn(self, amounts, timestamps, category_codes, category_names, now):
+        month_start, days_in_month, days_elapsed = self._month_bounds(now)
+        this_month = (timestamps >= month_start) & (timestamps <= now)
+        totals = np.bincount(
+            category_codes[this_month], weights=amounts[this_month], minlength=len(category_names)
+        )
+        month_total = totals.sum()
+
+        burn = []
+        for index in np.argsort(-totals):
+            if totals[index] <= 0:
+                continue
+            daily_rate = totals[index] / days_elapsed
+            burn.append({
+                "category": str(category_names[index]),
+                "spent_to_date": round(float(totals[index]), 2),
+                "daily_rate": round(float(daily_rate), 2),
+                "projected_total": round(float(daily_rate * days_in_month), 2),
+                "share": round(float(totals[index] / month_total), 4)
+            })
+        return burn
+
+    def _outliers(self, amounts, category_codes, category_names, timestamps, ids, limit=20):
+        """
+        Flag transactions whose modified z-score within their category exceeds
+        OUTLIER_THRESHOLD (median/MAD based, so robust to the outliers themselves)
+        """
+        if amounts.size == 0:
+            return []
+
+        # Per-category medians and MADs via sorting by (category, amount)
+        order = np.lexsort((amounts, category_codes))
+        sorted_codes = category_codes[order]
+        sorted_amounts = amounts[order]
+        counts = np.bincount(category_codes, minlength=len(category_names))
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+        medians = self._group_medians(sorted_amounts, starts, counts)
+        deviations = np.abs(amounts - medians[category_codes])
+
+        dev_order = np.lexsort((deviations, category_codes))
+        mads = self._group_medians(deviations[dev_order], starts, counts)
+
+        scale = mads[category_codes]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = np.where(scale > 0, 0.6745 * (amounts - medians[category_codes]) / scale, 0.0)
+
+        # Need a few transactions in a category before calling anything unusual
+        flagged = np.flatnonzero((np.abs(scores) > OUTLIER_THRESHOLD) & (counts[category_codes] >= 5))
+        flagged = flagged[np.argsort(-np.abs(scores[flagged]))][:limit]
+
+        return [{
+            "id": ids[index],
+            "amount": round(float(amounts[index]), 2),
+            "category": str(category_names[category_codes[index]]),
+            "date": datetime.fromtimestamp(timestamps[index], timezone.utc).isoformat(),
+            "score": round(float(scores[index]), 2),
+            "category_median": round(float(medians[category_codes[index]]), 2)
+        } for index in flagged]
+
+    def _group_medians(self, sorted_values, starts, counts):
+        """
+        Medians of contiguous sorted groups given their start offsets and sizes
+        """
+        medians = np.zeros(len(counts), dtype=np.float64)
+        present = counts > 0
+        lower = starts[present] + (counts[present] - 1) // 2
+        upper = starts[present] + counts[present] // 2
+        medians[present] = (sorted_values[lower] + sorted_values[upper]) / 2
+        return medians
@@ -62,14 +62,80 @@ export const useApi = () => {
     });
   };
   
+  /**
+   * Stream AI-powered financial insights section by section (server-sent events)
+   * 
+   * @param {object} data - Financial data for insights
+   * @param {function} onSection - Called with (key, value) as each section arrives
+   * @returns {Promise<object>} Full AI insights response
+   */
+  const streamFinancialInsights = async (data, onSection) => {
+    const token = await getAuthToken();
+    
+    const response = await fetch(`${API_URL}/api/insights/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Authorization': `Bearer ${token}`
+      },
+      body: JSON.stringify(data)
+    });
+    
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.message || `API error: ${response.status}`);
+    }
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let result = null;
+    
+    // Each SSE message is "event: <name>\ndata: <json>" followed by a blank line
+    const handleMessage = (message) => {
+      let event = 'message';
+      let payload = '';
+      for (const line of message.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) payload += line.slice(6);
+      }
+      if (!payload) return;
+      
+      const parsed = JSON.parse(payload);
+      if (event === 'section') {
+        onSection(parsed.key, parsed.value);
+      } else if (event === 'done' || event === 'error') {
+        result = parsed;
+      }
+    };
+    
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      
+      buffer += decoder.decode(value, { stream: true });
+      const messages = buffer.split('\n\n');
+      buffer = messages.pop();
+      messages.forEach(handleMessage);
+    }
+    if (buffer.trim()) handleMessage(buffer);
+    
+    return result;
+  };
+  
   /**
    * Get user's AI insights history
    * 
    * @param {number} limit - Maximum number of history items to retrieve
-   * @returns {Promise<object>} Insights history
+   * @param {object} options - Paging options (cursor, fields)
+   * @returns {Promise<object>} Insights history and next_cursor
    */
-  const getInsightsHistory = async (limit = 10) => {
-    return await apiRequest(`/api/insights/history?limit=${limit}`);
+  const getInsightsHistory = async (limit = 10, options = {}) => {
+    const queryParams = new URLSearchParams({ limit });
+    if (options.cursor) queryParams.append('cursor', options.cursor);
+    if (options.fields) queryParams.append('fields', options.fields.join(','));
+    
+    return await apiRequest(`/api/insights/history?${queryParams.toString()}`);
   };
   
   /**
@@ -88,8 +154,8 @@ export const useApi = () => {
   /**
    * Get user's expenses with optional filters
    * 
-   * @param {object} options - Query options (limit, category, start_date, end_date)
-   * @returns {Promise<object>} Expenses data
+   * @param {object} options - Query options (limit, category, startDate, endDate, cursor, fields)
+   * @returns {Promise<object>} Expenses data and next_cursor
    */
   const getExpenses = async (options = {}) => {
     const queryParams = new URLSearchParams();
@@ -99,6 +165,8 @@ export const useApi = () => {
     if (options.category) queryParams.append('category', options.category);
     if (options.startDate) queryParams.append('start_date', options.startDate);
     if (options.endDate) queryParams.append('end_date', options.endDate);
+    if (options.cursor) queryParams.append('cursor', options.cursor);
+    if (options.fields) queryParams.append('fields', options.fields.join(','));
     
     const queryString = queryParams.toString();
     const endpoint = `/api/expenses${queryString ? '?' + queryString : ''}`;
@@ -106,6 +174,68 @@ export const useApi = () => {
     return await apiRequest(endpoint);
   };
   
+  /**
+   * Get spending analytics (daily/weekly trends, month-end forecast,
+   * category burn rates and unusual transactions)
+   * 
+   * @param {object} options - Query options (days, weeks, budget)
+   * @returns {Promise<object>} Spending analytics
+   */
+  const getSpendingAnalytics = async (options = {}) => {
+    const queryParams = new URLSearchParams();
+    if (options.days) queryParams.append('days', options.days);
+    if (options.weeks) queryParams.append('weeks', options.weeks);
+    if (options.budget) queryParams.append('budget', options.budget);
+    
+    const queryString = queryParams.toString();
+    return await apiRequest(`/api/analytics/spending${queryString ? '?' + queryString : ''}`);
+  };
+  
+  /**
+   * Search the scholarship catalog
+   * 
+   * @param {object} options - Query options (query, need, major, state, category,
+   *   deadlineAfter, deadlineBefore, minAmount, sort, limit, offset)
+   * @returns {Promise<object>} Scholarships page, total and next_offset
+   */
+  const searchScholarships = async (options = {}) => {
+    const queryParams = new URLSearchParams();
+    if (options.query) queryParams.append('q', options.query);
+    if (options.need) queryParams.append('need', options.need);
+    if (options.major) queryParams.append('major', options.major);
+    if (options.state) queryParams.append('state', options.state);
+    if (options.category) queryParams.append('category', options.category);
+    if (options.deadlineAfter) queryParams.append('deadline_after', options.deadlineAfter);
+    if (options.deadlineBefore) queryParams.append('deadline_before', options.deadlineBefore);
+    if (options.minAmount) queryParams.append('min_amount', options.minAmount);
+    if (options.sort) queryParams.append('sort', options.sort);
+    if (options.limit) queryParams.append('limit', options.limit);
+    if (options.offset) queryParams.append('offset', options.offset);
+    
+    const queryString = queryParams.toString();
+    return await apiRequest(`/api/scholarships${queryString ? '?' + queryString : ''}`);
+  };
+  
+  /**
+   * Simulate debt payoff for several strategies and extra payments at once
+   * 
+   * @param {object} options - debts ({name, balance, apr, minimum_payment}), extraPayments,
+   *   strategies ('avalanche', 'snowball', 'custom'), order (for custom), scheduleExtra
+   * @returns {Promise<object>} Per strategy scenario summaries and a monthly schedule
+   */
+  const simulateDebtPayoff = async (options = {}) => {
+    return await apiRequest('/api/debt/payoff', {
+      method: 'POST',
+      body: JSON.stringify({
+        debts: options.debts,
+        extra_payments: options.extraPayments,
+        strategies: options.strategies,
+        order: options.order,
+        schedule_extra: options.scheduleExtra
+      })
+    });
+  };
+  
   /**
    * Update user profile data
    * 
@@ -131,9 +261,13 @@ export const useApi = () => {
   // Return all API methods
   return {
     getFinancialInsights,
+    streamFinancialInsights,
     getInsightsHistory,
     addExpense,
     getExpenses,
+    getSpendingAnalytics,
+    searchScholarships,
+    simulateDebtPayoff,
     updateProfile,
     getProfile,
     apiRequest
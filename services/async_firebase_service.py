@@ -0,0 +1,420 @@
+import logging
+
+from services.firebase_service import FirebaseService
+from services.write_behind import AsyncWriteBehindQueue
+from utils.pagination import decode_cursor
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncFirebaseService(FirebaseService):
+    """
+    Asyncio variant of FirebaseService built on the Firestore AsyncClient.
+
+    Same method surface as FirebaseService, but every Firestore call is a
+    coroutine, so independent reads can be awaited concurrently (e.g. with
+    asyncio.gather or get_all) on one event loop. The client is bound to the
+    event loop it is first used on; use one instance per loop. Queries,
+    batches and rollups are built by the FirebaseService helpers.
+    """
+
+    def __init__(self, db=None, profile_cache_ttl=60, profile_cache_max_entries=10000,
+                 profile_cache_max_bytes=16 * 1024 * 1024, max_write_retries=5,
+                 max_write_queue_size=100000, connect=True):
+        """
+        Initialize the async Firebase service
+
+        Args:
+            db (firestore.AsyncClient, optional): Async Firestore client
+            profile_cache_ttl (float, optional): Seconds a cached profile stays valid
+            profile_cache_max_entries (int, optional): Maximum number of cached profiles
+            profile_cache_max_bytes (int, optional): Approximate memory cap for cached profiles
+            max_write_retries (int, optional): Commit attempts before queued writes are dropped
+            max_write_queue_size (int, optional): Queued writes before queueing falls
+                back to a direct write
+            connect (bool, optional): Open the Firestore client now; pass False to
+                defer until connect()
+        """
+        self.max_write_retries = max_write_retries
+        self.max_write_queue_size = max_write_queue_size
+
+        super().__init__(
+            db=db,
+            profile_cache_ttl=profile_cache_ttl,
+            profile_cache_max_entries=profile_cache_max_entries,
+            profile_cache_max_bytes=profile_cache_max_bytes,
+            connect=connect
+        )
+
+    def connect(self, db=None):
+        """
+        Attach an async Firestore client and its write-behind queue
+
+        Args:
+            db (firestore.AsyncClient, optional): Async Firestore client (defaults
+                to the async client of the default Firebase app)
+        """
+        if db is None:
+            from firebase_admin import firestore_async
+            db = firestore_async.client()
+        self.db = db
+
+        # Non-critical writes (e.g. AI tips) are committed by a task on the event loop
+        self.write_queue = AsyncWriteBehindQueue(
+            db,
+            max_retries=self.max_write_retries,
+            max_queue_size=self.max_write_queue_size
+        )
+
+    async def close(self, timeout=10):
+        """
+        Wait for queued writes to be committed
+
+        Args:
+            timeout (float, optional): Seconds to wait for the drain
+        """
+        if self.write_queue:
+            await self.write_queue.stop(timeout)
+
+    @metrics.timed('firebase_async.create_user')
+    async def create_user(self, user_id, user_data):
+        """
+        Create a new user document in Firestore
+
+        Args:
+            user_id (str): Firebase user ID
+            user_data (dict): User data to store
+
+        Returns:
+            bool: Success status
+        """
+        try:
+            await self.db.collection('users').document(user_id).set(user_data)
+            self.profile_cache.delete(user_id)
+            return True
+        except Exception as e:
+            logger.error("Error creating user: %s", e)
+            return False
+
+    @metrics.timed('firebase_async.get_user')
+    async def get_user(self, user_id):
+        """
+        Get user data from Firestore
+
+        Args:
+            user_id (str): Firebase user ID
+
+        Returns:
+            dict: User data
+        """
+        try:
+            doc = await self.db.collection('users').document(user_id).get()
+            return doc.to_dict() if doc.exists else None
+        except Exception as e:
+            logger.error("Error getting user: %s", e)
+            return None
+
+    @metrics.timed('firebase_async.get_all')
+    async def get_all(self, doc_refs, fields=None):
+        """
+        Fetch several documents in a single round trip
+
+        Args:
+            doc_refs (list): Async document references to read
+            fields (list, optional): Only return these fields (Firestore projection)
+
+        Returns:
+            list: Document data dicts (with 'id') in the order of doc_refs,
+                None for documents that do not exist
+        """
+        if not doc_refs:
+            return []
+        try:
+            snapshots = {}
+            async for doc in self.db.get_all(doc_refs, field_paths=fields):
+                snapshots[doc.reference.path] = doc
+            return [self._snapshot_data(snapshots.get(doc_ref.path)) for doc_ref in doc_refs]
+        except Exception as e:
+            logger.error("Error getting documents: %s", e)
+            return [None] * len(doc_refs)
+
+    @metrics.timed('firebase_async.get_user_profile')
+    async def get_user_profile(self, user_id):
+        """
+        Get the user's profile without sensitive fields, served from the
+        in-memory cache when possible
+
+        Args:
+            user_id (str): Firebase user ID
+
+        Returns:
+            dict: User data without sensitive fields (None if not found)
+        """
+        cached = self._cached_profile(user_id)
+        if cached is not None:
+            return cached
+
+        user_data = await self.get_user(user_id)
+        if user_data is None:
+            return None
+        return self._cache_profile(user_id, user_data)
+
+    @metrics.timed('firebase_async.update_user')
+    async def update_user(self, user_id, update_data):
+        """
+        Update user data in Firestore
+
+        Args:
+            user_id (str): Firebase user ID
+            update_data (dict): Data to update
+
+        Returns:
+            bool: Success status
+        """
+        try:
+            await self.db.collection('users').document(user_id).update(update_data)
+            return True
+        except Exception as e:
+            logger.error("Error updating user: %s", e)
+            return False
+        finally:
+            # Drop the cached profile even if the update failed part-way
+            self.profile_cache.delete(user_id)
+
+    @metrics.timed('firebase_async.save_ai_tip')
+    async def save_ai_tip(self, user_id, tip_data):
+        """
+        Save an AI tip to the user's history
+
+        Args:
+            user_id (str): Firebase user ID
+            tip_data (dict): AI tip data to save
+
+        Returns:
+            str: Document ID of the saved tip
+        """
+        try:
+            doc_ref = self.db.collection('users').document(user_id).collection('ai_tips').document()
+            await doc_ref.set(tip_data)
+            return doc_ref.id
+        except Exception as e:
+            logger.error("Error saving AI tip: %s", e)
+            return None
+
+    async def queue_ai_tip(self, user_id, tip_data):
+        """
+        Queue an AI tip to be saved to the user's history in the background
+
+        Args:
+            user_id (str): Firebase user ID
+            tip_data (dict): AI tip data to save
+
+        Returns:
+            str: Document ID the tip will be saved under
+        """
+        doc_ref = self.db.collection('users').document(user_id).collection('ai_tips').document()
+        await self.write_queue.enqueue(doc_ref, tip_data)
+        return doc_ref.id
+
+    async def queue_write(self, doc_ref, data, merge=False):
+        """
+        Queue a non-critical document write to be committed in the background
+
+        Args:
+            doc_ref (firestore.AsyncDocumentReference): Document to write
+            data (dict): Document data
+            merge (bool, optional): Merge into an existing document
+        """
+        await self.write_queue.enqueue(doc_ref, data, merge=merge)
+
+    @metrics.timed('firebase_async.save_ai_tips_batch')
+    async def save_ai_tips_batch(self, user_id, tips):
+        """
+        Save several AI tips to the user's history using batched writes
+
+        Args:
+            user_id (str): Firebase user ID
+            tips (list): AI tip data dicts to save
+
+        Returns:
+            list: Document IDs of the saved tips (empty if the commit failed)
+        """
+        try:
+            tip_ids = []
+            for batch, batch_ids in self._tip_batches(user_id, tips):
+                await batch.commit()
+                tip_ids.extend(batch_ids)
+            return tip_ids
+        except Exception as e:
+            logger.error("Error saving AI tips batch: %s", e)
+            return []
+
+    @metrics.timed('firebase_async.get_ai_tips_history')
+    async def get_ai_tips_history(self, user_id, limit=10, cursor=None, fields=None):
+        """
+        Get the user's AI tips history
+
+        Args:
+            user_id (str): Firebase user ID
+            limit (int, optional): Maximum number of tips to retrieve
+            cursor (str, optional): Cursor returned with the previous page
+            fields (list, optional): Only return these fields (Firestore projection)
+
+        Returns:
+            tuple: (list of AI tips, cursor for the next page or None)
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        start_after = decode_cursor(cursor) if cursor else None
+
+        try:
+            query = self._tips_query(user_id, limit, start_after, fields)
+            tips = [self._snapshot_data(doc) async for doc in query.stream()]
+            return tips, self._next_cursor(tips, limit)
+        except Exception as e:
+            logger.error("Error getting AI tips history: %s", e)
+            return [], None
+
+    @metrics.timed('firebase_async.add_expense')
+    async def add_expense(self, user_id, expense_data):
+        """
+        Add an expense to the user's expenses
+
+        Args:
+            user_id (str): Firebase user ID
+            expense_data (dict): Expense data to save
+
+        Returns:
+            str: Document ID of the saved expense
+        """
+        try:
+            # The expense and its rollup increments commit atomically in one batch
+            batch, expense_ids = self._expense_batch(user_id, [expense_data])
+            await batch.commit()
+            return expense_ids[0]
+        except Exception as e:
+            logger.error("Error adding expense: %s", e)
+            return None
+
+    @metrics.timed('firebase_async.add_expenses_batch')
+    async def add_expenses_batch(self, user_id, expenses):
+        """
+        Add several expenses to the user's expenses using batched writes;
+        each batch holds a group of expenses and that group's rollup
+        increments, and the first failed commit stops the write
+
+        Args:
+            user_id (str): Firebase user ID
+            expenses (list): Expense data dicts to save
+
+        Returns:
+            list: Document IDs of the saved expenses, in order; shorter than
+                expenses if a commit failed (the rest were not saved)
+        """
+        expense_ids = []
+        try:
+            for group in self._expense_groups(expenses):
+                batch, group_ids = self._expense_batch(user_id, group)
+                await batch.commit()
+                expense_ids.extend(group_ids)
+            return expense_ids
+        except Exception as e:
+            logger.error("Error adding expenses batch after %s expenses: %s", len(expense_ids), e)
+            return expense_ids
+
+    @metrics.timed('firebase_async.get_expenses')
+    async def get_expenses(self, user_id, limit=20, category=None, start_date=None, end_date=None,
+                           cursor=None, fields=None):
+        """
+        Get the user's expenses with filtering options
+
+        Args:
+            user_id (str): Firebase user ID
+            limit (int, optional): Maximum number of expenses to retrieve
+            category (str, optional): Filter by category
+            start_date (str, optional): Filter by minimum date (ISO format)
+            end_date (str, optional): Filter by maximum date (ISO format)
+            cursor (str, optional): Cursor returned with the previous page
+            fields (list, optional): Only return these fields (Firestore projection)
+
+        Returns:
+            tuple: (list of expenses, cursor for the next page or None)
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        start_after = decode_cursor(cursor) if cursor else None
+
+        try:
+            query = self._expenses_query(user_id, limit, category, start_date, end_date, start_after, fields)
+            expenses = [self._snapshot_data(doc) async for doc in query.stream()]
+            return expenses, self._next_cursor(expenses, limit)
+        except Exception as e:
+            logger.error("Error getting expenses: %s", e)
+            return [], None
+
+    @metrics.timed('firebase_async.get_expense_history')
+    async def get_expense_history(self, user_id, start_date=None):
+        """
+        Get the user's expense history in columnar form for analytics
+
+        Args:
+            user_id (str): Firebase user ID
+            start_date (datetime, optional): Only include expenses created since this time
+
+        Returns:
+            dict: Parallel lists 'ids', 'amounts', 'categories' and 'timestamps'
+                (epoch seconds)
+        """
+        columns = self._history_columns()
+        try:
+            async for doc in self._history_query(user_id, start_date).stream():
+                self._add_history_row(columns, doc)
+            return columns
+        except Exception as e:
+            logger.error("Error getting expense history: %s", e)
+            return columns
+
+    @metrics.timed('firebase_async.get_expense_summary')
+    async def get_expense_summary(self, user_id, period='month'):
+        """
+        Get a summary of the user's expenses for a given period from the
+        pre-aggregated rollup document
+
+        Args:
+            user_id (str): Firebase user ID
+            period (str, optional): Period to summarize ('day', 'week', 'month', 'year')
+
+        Returns:
+            dict: Summary of expenses by category
+        """
+        try:
+            return self._summary(await self._summary_ref(user_id, period).get())
+        except Exception as e:
+            logger.error("Error getting expense summary: %s", e)
+            return {}
+
+    @metrics.timed('firebase_async.rebuild_expense_rollups')
+    async def rebuild_expense_rollups(self, user_id):
+        """
+        Recompute the user's expense rollups from scratch (backfill)
+
+        Args:
+            user_id (str): Firebase user ID
+
+        Returns:
+            int: Number of rollup documents written
+        """
+        try:
+            expenses_ref = self.db.collection('users').document(user_id).collection('expenses')
+            rollups = self._aggregate_rollups([doc.to_dict() async for doc in expenses_ref.stream()])
+            stale_refs = [doc_ref async for doc_ref in self._rollups_ref(user_id).list_documents()]
+
+            for batch in self._rebuild_batches(user_id, rollups, stale_refs):
+                await batch.commit()
+            return len(rollups)
+        except Exception as e:
+            logger.error("Error rebuilding expense rollups: %s", e)
+            return 0
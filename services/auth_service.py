@@ -0,0 +1,218 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import requests
+from firebase_admin import auth
+from google.auth import jwt
+
+# Public x509 certificates used by Firebase to sign ID tokens
+FIREBASE_CERTS_URL = 'https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com'
+FIREBASE_ISSUER_PREFIX = 'https://securetoken.google.com/'
+
+logger = logging.getLogger(__name__)
+
+
+class AuthService:
+    """
+    Service for verifying Firebase ID tokens with a local claims cache and
+    prefetched Google signing certificates
+    """
+
+    def __init__(self, project_id=None, max_cached_tokens=10000, default_cert_ttl=3600):
+        """
+        Initialize the auth service
+
+        Args:
+            project_id (str, optional): Firebase project ID (audience of the tokens)
+            max_cached_tokens (int, optional): Maximum number of decoded tokens to keep
+            default_cert_ttl (int, optional): Seconds between cert refreshes when
+                the response carries no Cache-Control max-age
+        """
+        self.project_id = project_id or os.environ.get('FIREBASE_PROJECT_ID')
+        self.max_cached_tokens = max_cached_tokens
+        self.default_cert_ttl = default_cert_ttl
+
+        # token hash -> (decoded claims, exp)
+        self._claims = OrderedDict()
+        self._claims_lock = threading.Lock()
+
+        self._certs = None
+        self._certs_expire_at = 0
+        self._certs_lock = threading.Lock()
+        self._session = requests.Session()
+
+        self._refresher = None
+        self._stop_event = threading.Event()
+
+        self.hits = 0
+        self.misses = 0
+
+    def start_cert_refresher(self):
+        """
+        Prefetch the signing certificates and keep them refreshed in a
+        background daemon thread
+        """
+        if self._refresher and self._refresher.is_alive():
+            return
+
+        self._refresh_certs()
+        self._stop_event.clear()
+        self._refresher = threading.Thread(
+            target=self._refresh_loop, name='firebase-cert-refresher', daemon=True
+        )
+        self._refresher.start()
+
+    def stop_cert_refresher(self):
+        """
+        Stop the background certificate refresher
+        """
+        self._stop_event.set()
+
+    def verify_id_token(self, id_token):
+        """
+        Verify a Firebase ID token, serving repeat tokens from the cache
+
+        Args:
+            id_token (str): Firebase ID token from the Authorization header
+
+        Returns:
+            dict: Decoded token claims (with 'uid')
+
+        Raises:
+            auth.InvalidIdTokenError: If the token is invalid or expired
+        """
+        cached = self.get_cached_claims(id_token)
+        if cached is not None:
+            return cached
+
+        with self._claims_lock:
+            self.misses += 1
+
+        token_hash = hashlib.sha256(id_token.encode()).hexdigest()
+        claims = self._verify_uncached(id_token)
+
+        with self._claims_lock:
+            self._claims[token_hash] = (claims, claims.get('exp', 0))
+            self._claims.move_to_end(token_hash)
+            while len(self._claims) > self.max_cached_tokens:
+                self._claims.popitem(last=False)
+
+        return dict(claims)
+
+    def get_cached_claims(self, id_token):
+        """
+        Get the claims of a previously verified, unexpired token without any
+        I/O (safe to call on an event loop)
+
+        Args:
+            id_token (str): Firebase ID token from the Authorization header
+
+        Returns:
+            dict: Decoded token claims, or None if the token is not cached
+        """
+        token_hash = hashlib.sha256(id_token.encode()).hexdigest()
+
+        with self._claims_lock:
+            cached = self._claims.get(token_hash)
+            if cached and cached[1] > time.time():
+                self._claims.move_to_end(token_hash)
+                self.hits += 1
+                return dict(cached[0])
+            if cached:
+                del self._claims[token_hash]
+        return None
+
+    def get_stats(self):
+        """
+        Get cache statistics
+
+        Returns:
+            dict: Hit/miss counters and cache size
+        """
+        with self._claims_lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "cached_tokens": len(self._claims),
+                "certs_loaded": self._certs is not None
+            }
+
+    def _verify_uncached(self, id_token):
+        """
+        Verify a token against the prefetched certificates, falling back to
+        the Firebase Admin SDK when no certificates are available
+        """
+        certs = self._get_certs()
+        if not certs or not self.project_id:
+            return auth.verify_id_token(id_token)
+
+        try:
+            header = jwt.decode_header(id_token)
+        except ValueError as e:
+            raise auth.InvalidIdTokenError(f"Malformed ID token: {e}")
+
+        # Signing key rotated since our last refresh
+        if header.get('kid') not in certs:
+            self._refresh_certs()
+            certs = self._get_certs()
+            if header.get('kid') not in certs:
+                return auth.verify_id_token(id_token)
+
+        try:
+            claims = jwt.decode(id_token, certs=certs, audience=self.project_id)
+        except ValueError as e:
+            raise auth.InvalidIdTokenError(f"Invalid ID token: {e}")
+
+        if claims.get('iss') != FIREBASE_ISSUER_PREFIX + self.project_id:
+            raise auth.InvalidIdTokenError("ID token has an incorrect issuer")
+        if not claims.get('sub'):
+            raise auth.InvalidIdTokenError("ID token has no subject")
+
+        claims['uid'] = claims['sub']
+        return claims
+
+    def _get_certs(self):
+        with self._certs_lock:
+            return self._certs
+
+    def _refresh_certs(self):
+        """
+        Fetch the current signing certificates
+
+        Returns:
+            int: Seconds until the certificates should be refreshed again
+        """
+        try:
+            response = self._session.get(FIREBASE_CERTS_URL, timeout=10)
+            response.raise_for_status()
+            ttl = self._parse_max_age(response.headers.get('Cache-Control', ''))
+            with self._certs_lock:
+                self._certs = response.json()
+                self._certs_expire_at = time.time() + ttl
+            return ttl
+        except Exception as e:
+            logger.error("Error refreshing Firebase signing certs: %s", e)
+            return 60
+
+    def _refresh_loop(self):
+        while not self._stop_event.is_set():
+            with self._certs_lock:
+                wait = max(self._certs_expire_at - time.time(), 0)
+            # Refresh a little before the published expiry
+            if self._stop_event.wait(max(wait - 60, 30)):
+                break
+            self._refresh_certs()
+
+    def _parse_max_age(self, cache_control):
+        for directive in cache_control.split(','):
+            directive = directive.strip()
+            if directive.startswith('max-age='):
+                try:
+                    return int(directive.split('=', 1)[1])
+                except ValueError:
+                    break
+        return self.default_cert_ttl
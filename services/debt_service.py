@@ -0,0 +1,268 @@
+import math
+from datetime import date
+
+import numpy as np
+
+STRATEGIES = ("avalanche", "snowball", "custom")
+
+MAX_DEBTS = 20
+MAX_SCENARIOS = 1000
+MAX_MONTHS = 600
+
+# Balances below this (in dollars) count as paid off
+PAID_OFF_EPSILON = 0.005
+
+
+class DebtPayoffService:
+    """
+    Month-by-month debt payoff simulation for several strategies and
+    extra-payment amounts at once
+
+    Every (strategy, extra payment) pair is a row of a NumPy array, so a
+    month of the simulation is a handful of array operations no matter how
+    many scenarios are requested.
+    """
+
+    def __init__(self, max_months=MAX_MONTHS):
+        """
+        Initialize the simulator
+
+        Args:
+            max_months (int, optional): Longest simulation; scenarios still
+                owing after it are reported as not paid off
+        """
+        self.max_months = max_months
+
+    def simulate(self, debts, extra_payments=(0,), strategies=("avalanche", "snowball"), order=None,
+                 schedule_extra=None, start=None):
+        """
+        Simulate paying off debts under each strategy and extra payment
+
+        Each month interest accrues, every debt gets its minimum payment, and
+        the rest of the monthly total (all minimums plus the extra payment)
+        goes to debts in strategy order. Minimums freed by paid-off debts
+        roll over to the next debt.
+
+        Args:
+            debts (list): Dicts with "balance", "apr" (percent) and
+                "minimum_payment", plus an optional "name"
+            extra_payments (list, optional): Monthly amounts paid on top of the minimums
+            strategies (list, optional): Any of "avalanche" (highest APR first),
+                "snowball" (smallest balance first) and "custom"
+            order (list, optional): Debt indexes in payoff order for "custom"
+            schedule_extra (float, optional): Extra payment whose month-by-month
+                schedule is returned (defaults to the first extra payment)
+            start (date, optional): First month of the plan (defaults to next month)
+
+        Returns:
+            dict: Per strategy, one summary per extra payment (months, payoff
+                date, total interest, when each debt is paid off) and the
+                schedule for schedule_extra
+
+        Raises:
+            ValueError: If the debts, strategies or scenarios are invalid
+        """
+        balances, rates, minimums, names = self._parse_debts(debts)
+        extras = self._parse_extras(extra_payments)
+        strategies = list(dict.fromkeys(strategies or ()))
+        if not strategies or any(strategy not in STRATEGIES for strategy in strategies):
+            raise ValueError(f"strategies must be a list of {', '.join(STRATEGIES)}")
+        if len(strategies) * len(extras) > MAX_SCENARIOS:
+            raise ValueError(f"Too many scenarios (max {MAX_SCENARIOS} strategy/extra payment pairs)")
+
+        try:
+            schedule_extra = extras[0] if schedule_extra is None else float(schedule_extra)
+        except (ValueError, TypeError):
+            raise ValueError("schedule_extra must be a number")
+        if not math.isfinite(schedule_extra):
+            raise ValueError("schedule_extra must be a finite number")
+        if schedule_extra not in extras:
+            raise ValueError("schedule_extra must be one of extra_payments")
+
+        orders = [self._priority(strategy, balances, rates, order) for strategy in strategies]
+        start = start or self._next_month(date.today())
+
+        # One row per (strategy, extra payment)
+        row_orders = np.repeat(np.array(orders), len(extras), axis=0)
+        row_extras = np.tile(extras, len(strategies))
+        schedule_rows = [index * len(extras) + list(extras).index(schedule_extra) for index in range(len(strategies))]
+
+        result = self._run(balances, rates, minimums, row_orders, row_extras, schedule_rows)
+
+        response = {"debts": names, "start": start.strftime('%Y-%m'), "strategies": {}}
+        for index, strategy in enumerate(strategies):
+            rows = slice(index * len(extras), (index + 1) * len(extras))
+            response["strategies"][strategy] = {
+                "order": [int(debt) for debt in orders[index]],
+                "scenarios": [
+                    self._summary(extra, months, interest, paid, debt_months, start)
+                    for extra, months, interest, paid, debt_months in zip(
+                        extras,
+                        result["months"][rows],
+                        result["interest"][rows],
+                        result["paid"][rows],
+                        result["debt_months"][rows]
+                    )
+                ],
+                "schedule": {
+                    "extra_payment": schedule_extra,
+                    "months": self._schedule(result["schedules"][index], start)
+                }
+            }
+        return response
+
+    def _parse_debts(self, debts):
+        if not isinstance(debts, list) or not debts:
+            raise ValueError("debts must be a non-empty list")
+        if len(debts) > MAX_DEBTS:
+            raise ValueError(f"Too many debts (max {MAX_DEBTS})")
+
+        balances, rates, minimums, names = [], [], [], []
+        for index, debt in enumerate(debts):
+            if not isinstance(debt, dict):
+                raise ValueError(f"debts[{index}] must be an object")
+            try:
+                balance = float(debt.get("balance"))
+                apr = float(debt.get("apr", 0))
+                minimum = float(debt.get("minimum_payment", 0))
+            except (ValueError, TypeError):
+                raise ValueError(f"debts[{index}]: balance, apr and minimum_payment must be numbers")
+            if not all(math.isfinite(value) for value in (balance, apr, minimum)):
+                raise ValueError(f"debts[{index}]: balance, apr and minimum_payment must be finite numbers")
+            if balance < 0 or apr < 0 or minimum < 0 or apr > 100:
+                raise ValueError(f"debts[{index}]: balance, apr and minimum_payment cannot be negative (apr at most 100)")
+            balances.append(balance)
+            rates.append(apr / 100 / 12)
+            minimums.append(minimum)
+            names.append(str(debt.get("name") or f"Debt {index + 1}"))
+
+        return np.array(balances), np.array(rates), np.array(minimums), names
+
+    def _parse_extras(self, extra_payments):
+        try:
+            extras = [float(extra) for extra in extra_payments]
+        except (ValueError, TypeError):
+            raise ValueError("extra_payments must be a list of numbers")
+        if not all(math.isfinite(extra) for extra in extras):
+            raise ValueError("extra_payments must be finite numbers")
+        if not extras or any(extra < 0 for extra in extras):
+            raise ValueError("extra_payments must be a non-empty list of non-negative numbers")
+        return list(dict.fromkeys(extras))
+
+    def _priority(self, strategy, balances, rates, order):
+        """
+        Debt indexes in the order extra money is applied
+        """
+        indexes = np.arange(len(balances))
+        if strategy == "avalanche":
+            # Highest rate first, smaller balance breaks ties
+            return np.lexsort((balances, -rates))
+        if strategy == "snowball":
+            return np.lexsort((-rates, balances))
+
+        if not isinstance(order, list) or sorted(map(str, order)) != sorted(map(str, indexes)) \
+                or not all(isinstance(debt, int) for debt in order):
+            raise ValueError("order must list every debt index exactly once for the custom strategy")
+        return np.array(order, dtype=np.int64)
+
+    def _run(self, balances, rates, minimums, row_orders, row_extras, schedule_rows):
+        """
+        Run the simulation for every row at once
+
+        Returns:
+            dict: Per row months to payoff (-1 if never), total interest, total
+                paid and per-debt payoff months, plus the schedule rows' history
+        """
+        rows = len(row_extras)
+        # Each row keeps its debts in priority order, so no per-month reordering is needed
+        balance = balances[row_orders]
+        rates = rates[row_orders]
+        minimums = minimums[row_orders]
+        budget = minimums.sum(axis=1) + row_extras
+
+        total_interest = np.zeros(rows)
+        total_paid = np.zeros(rows)
+        months = np.full(rows, -1)
+        stalled = np.zeros(rows, dtype=bool)
+        debt_months = np.where(balance > PAID_OFF_EPSILON, -1, 0)
+        owed = balance.sum(axis=1)
+        history = [[] for _ in schedule_rows]
+
+        for month in range(1, self.max_months + 1):
+            interest = balance * rates
+            balance = balance + interest
+
+            # Minimums first, capped at what is owed
+            payment = np.minimum(balance, minimums)
+            balance = balance - payment
+            remaining = budget - payment.sum(axis=1)
+
+            # The rest goes to debts in priority order: each debt takes what is
+            # left after the debts before it, up to its balance
+            owed_before = np.cumsum(balance, axis=1) - balance
+            extra = np.clip(remaining[:, None] - owed_before, 0, balance)
+            balance = balance - extra
+            payment = payment + extra
+
+            active = (months < 0) & ~stalled
+            total_interest += np.where(active, interest.sum(axis=1), 0)
+            total_paid += np.where(active, payment.sum(axis=1), 0)
+
+            balance[balance < PAID_OFF_EPSILON] = 0.0
+            debt_months = np.where((debt_months < 0) & (balance == 0), month, debt_months)
+            previous_owed, owed = owed, balance.sum(axis=1)
+            months = np.where(active & (owed == 0), month, months)
+            # Payments that don't cover the interest never pay the debts off
+            stalled |= active & (owed > 0) & (owed >= previous_owed)
+
+            for position, row in enumerate(schedule_rows):
+                if active[row]:
+                    history[position].append((payment[row].copy(), interest[row].copy(), balance[row].copy()))
+
+            if ((months >= 0) | stalled).all():
+                break
+
+        # Back to the caller's debt order
+        unsorted_months = np.empty_like(debt_months)
+        np.put_along_axis(unsorted_months, row_orders, debt_months, axis=1)
+        for position, row in enumerate(schedule_rows):
+            inverse = np.argsort(row_orders[row])
+            history[position] = [tuple(values[inverse] for values in entry) for entry in history[position]]
+
+        return {
+            "months": months,
+            "interest": total_interest,
+            "paid": total_paid,
+            "debt_months": unsorted_months,
+            "schedules": history
+        }
+
+    def _summary(self, extra, months, interest, paid, debt_months, start):
+        paid_off = bool(months >= 0)
+        return {
+            "extra_payment": extra,
+            "paid_off": paid_off,
+            "months": int(months) if paid_off else None,
+            "payoff_date": self._month_label(start, int(months) - 1) if paid_off else None,
+            "total_interest": round(float(interest), 2),
+            "total_paid": round(float(paid), 2),
+            "debt_payoff_months": [int(month) if month >= 0 else None for month in debt_months]
+        }
+
+    def _schedule(self, history, start):
+        return [
+            {
+                "month": self._month_label(start, index),
+                "payments": np.round(payment, 2).tolist(),
+                "interest": np.round(interest, 2).tolist(),
+                "balances": np.round(balance, 2).tolist()
+            }
+            for index, (payment, interest, balance) in enumerate(history)
+        ]
+
+    def _next_month(self, today):
+        return date(today.year + today.month // 12, today.month % 12 + 1, 1)
+
+    def _month_label(self, start, offset):
+        month_index = start.year * 12 + start.month - 1 + offset
+        return f"{month_index // 12:04d}-{month_index % 12 + 1:02d}"
@@ -1,45 +1,80 @@
 import os
 import base64
-from cryptography.fernet import Fernet
+import logging
+from cryptography.fernet import Fernet, MultiFernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
 class EncryptionService:
     """
     Service for encrypting and decrypting sensitive data using Fernet
     (symmetric encryption)
     """
     
-    def __init__(self, encryption_key=None, salt=None):
+    def __init__(self, encryption_key=None, salt=None, previous_keys=None):
         """
         Initialize the encryption service with a key
         
         Args:
             encryption_key (str, optional): Base64 encoded key or passphrase
             salt (bytes, optional): Salt for key derivation
+            previous_keys (list, optional): Retired keys or passphrases that can
+                still decrypt existing data (new data always uses encryption_key)
         """
         # If no key is provided, try to get from environment
         self.encryption_key = encryption_key or os.environ.get('ENCRYPTION_KEY')
         
+        if previous_keys is None:
+            previous_keys = [key for key in os.environ.get('ENCRYPTION_PREVIOUS_KEYS', '').split(',') if key]
+        
         # If we still don't have a key, generate one and warn user
         if not self.encryption_key:
-            print("WARNING: No encryption key provided. Generating a random key for this session only.")
-            print("In production, you should specify a key and keep it secure.")
+            logger.warning("No encryption key provided. Generating a random key for this session only.")
+            logger.warning("In production, you should specify a key and keep it secure.")
             self._key = Fernet.generate_key()
         else:
-            # If provided key is not a valid Fernet key (32 url-safe base64-encoded bytes),
-            # derive one using the provided key as a passphrase
-            try:
-                # Try to decode it as a Fernet key
-                base64.urlsafe_b64decode(self.encryption_key)
-                self._key = self.encryption_key.encode()
-            except Exception:
-                # Use the provided key as a passphrase to derive a Fernet key
-                self._key = self._derive_key(self.encryption_key, salt)
+            self._key = self._load_key(self.encryption_key, salt)
+        
+        # Primary key first: it encrypts, and every key is tried for decryption
+        self._keys = [self._key] + [self._load_key(key, salt) for key in previous_keys]
         
         # Initialize Fernet cipher
-        self.cipher = Fernet(self._key)
+        self.cipher = MultiFernet([Fernet(key) for key in self._keys])
+    
+    @property
+    def keys(self):
+        """
+        Fernet keys in use, primary key first
+        """
+        return list(self._keys)
     
+    def _load_key(self, key, salt=None):
+        """
+        Turn a configured key into a Fernet key
+        
+        Args:
+            key (str): Base64 encoded Fernet key or passphrase
+            salt (bytes, optional): Salt for key derivation
+            
+        Returns:
+            bytes: Fernet key
+        """
+        # If provided key is not a valid Fernet key (32 url-safe base64-encoded bytes),
+        # derive one using the provided key as a passphrase
+        try:
+            # Try to decode it as a Fernet key
+            if len(base64.urlsafe_b64decode(key)) != 32:
+                raise ValueError("Fernet keys must be 32 bytes")
+            return key.encode()
+        except Exception:
+            # Use the provided key as a passphrase to derive a Fernet key
+            return self._derive_key(key, salt)
+    
+    @metrics.timed('encryption._derive_key')
     def _derive_key(self, passphrase, salt=None):
         """
         Derive a Fernet key from a passphrase
@@ -67,6 +102,7 @@ class EncryptionService:
         key = base64.urlsafe_b64encode(kdf.derive(passphrase.encode()))
         return key
     
+    @metrics.timed('encryption.encrypt')
     def encrypt(self, data):
         """
         Encrypt data using Fernet symmetric encryption
@@ -91,6 +127,23 @@ class EncryptionService:
         
         return encrypted_data
     
+    @metrics.timed('encryption.rotate')
+    def rotate(self, encrypted_data):
+        """
+        Re-encrypt data under the primary key (data may use any known key)
+        
+        Args:
+            encrypted_data (str): Base64 encoded encrypted data
+            
+        Returns:
+            str: Data encrypted with the primary key
+        """
+        if not encrypted_data:
+            return None
+        
+        return self.cipher.rotate(encrypted_data.encode()).decode()
+    
+    @metrics.timed('encryption.decrypt')
     def decrypt(self, encrypted_data):
         """
         Decrypt data using Fernet symmetric encryption
@@ -116,5 +169,5 @@ class EncryptionService:
             
             return decrypted_data
         except Exception as e:
-            print(f"Error decrypting data: {e}")
+            logger.error("Error decrypting data: %s", e)
             return None
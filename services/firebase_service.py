@@ -1,21 +1,85 @@
+import logging
 import firebase_admin
 from firebase_admin import firestore
-from datetime import datetime
+from google.cloud.firestore_v1.field_path import FieldPath
+from datetime import datetime, timedelta, timezone
+
+from services.write_behind import WriteBehindQueue
+from utils.pagination import encode_cursor, decode_cursor
+from utils.schema import parse_iso_datetime
+from utils.cache import TTLCache
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Fields that must never be held in the in-memory profile cache
+SENSITIVE_USER_FIELDS = ('ssn_encrypted',)
+
+# Periods kept as pre-aggregated expense rollups
+ROLLUP_PERIODS = ('day', 'week', 'month', 'year')
 
 class FirebaseService:
     """
     Service for interacting with Firebase (Firestore database)
     """
     
-    def __init__(self, db=None):
+    # Firestore allows at most 500 writes per batch
+    MAX_BATCH_SIZE = 500
+    
+    def __init__(self, db=None, write_flush_interval=1.0, profile_cache_ttl=60,
+                 profile_cache_max_entries=10000, profile_cache_max_bytes=16 * 1024 * 1024, connect=True):
         """
         Initialize the Firebase service
         
         Args:
             db (firestore.Client, optional): Firestore database client
+            write_flush_interval (float, optional): Seconds the write-behind queue
+                waits for more writes before committing a batch
+            profile_cache_ttl (float, optional): Seconds a cached profile stays valid
+            profile_cache_max_entries (int, optional): Maximum number of cached profiles
+            profile_cache_max_bytes (int, optional): Approximate memory cap for cached profiles
+            connect (bool, optional): Open the Firestore client now; pass False to
+                defer until connect() (e.g. until after a worker fork)
+        """
+        self.db = None
+        self.write_queue = None
+        self.write_flush_interval = write_flush_interval
+        
+        # Read-through cache for profile reads (never holds sensitive fields)
+        self.profile_cache = TTLCache(
+            max_entries=profile_cache_max_entries,
+            ttl=profile_cache_ttl,
+            max_bytes=profile_cache_max_bytes
+        )
+        
+        if connect:
+            self.connect(db)
+    
+    def connect(self, db=None):
+        """
+        Attach a Firestore client and start the write-behind flusher
+        
+        Args:
+            db (firestore.Client, optional): Firestore database client (defaults
+                to the client of the default Firebase app)
         """
         self.db = db if db else firestore.client()
+        
+        # Background queue for non-critical writes (e.g. AI tips)
+        self.write_queue = WriteBehindQueue(self.db, flush_interval=self.write_flush_interval)
+        self.write_queue.start()
     
+    def close(self, timeout=10):
+        """
+        Drain pending background writes (called on worker shutdown)
+        
+        Args:
+            timeout (float, optional): Seconds to wait for the drain
+        """
+        if self.write_queue:
+            self.write_queue.stop(timeout)
+    
+    @metrics.timed('firebase.create_user')
     def create_user(self, user_id, user_data):
         """
         Create a new user document in Firestore
@@ -30,11 +94,13 @@ class FirebaseService:
         try:
             # Create user document
             self.db.collection('users').document(user_id).set(user_data)
+            self.profile_cache.delete(user_id)
             return True
         except Exception as e:
-            print(f"Error creating user: {e}")
+            logger.error("Error creating user: %s", e)
             return False
     
+    @metrics.timed('firebase.get_user')
     def get_user(self, user_id):
         """
         Get user data from Firestore
@@ -55,9 +121,62 @@ class FirebaseService:
             else:
                 return None
         except Exception as e:
-            print(f"Error getting user: {e}")
+            logger.error("Error getting user: %s", e)
+            return None
+    
+    @metrics.timed('firebase.get_all')
+    def get_all(self, doc_refs, fields=None):
+        """
+        Fetch several documents in a single round trip
+        
+        Args:
+            doc_refs (list): Document references to read
+            fields (list, optional): Only return these fields (Firestore projection)
+            
+        Returns:
+            list: Document data dicts (with 'id') in the order of doc_refs,
+                None for documents that do not exist
+        """
+        if not doc_refs:
+            return []
+        try:
+            snapshots = {doc.reference.path: doc for doc in self.db.get_all(doc_refs, field_paths=fields)}
+            return [self._snapshot_data(snapshots.get(doc_ref.path)) for doc_ref in doc_refs]
+        except Exception as e:
+            logger.error("Error getting documents: %s", e)
+            return [None] * len(doc_refs)
+    
+    @metrics.timed('firebase.get_user_profile')
+    def get_user_profile(self, user_id):
+        """
+        Get the user's profile without sensitive fields, served from the
+        in-memory cache when possible
+        
+        Args:
+            user_id (str): Firebase user ID
+            
+        Returns:
+            dict: User data without sensitive fields (None if not found)
+        """
+        cached = self._cached_profile(user_id)
+        if cached is not None:
+            return cached
+        
+        user_data = self.get_user(user_id)
+        if user_data is None:
             return None
+        return self._cache_profile(user_id, user_data)
     
+    def get_profile_cache_stats(self):
+        """
+        Get profile cache statistics
+        
+        Returns:
+            dict: Hit ratio, eviction counters and cache size
+        """
+        return self.profile_cache.get_stats()
+    
+    @metrics.timed('firebase.update_user')
     def update_user(self, user_id, update_data):
         """
         Update user data in Firestore
@@ -74,9 +193,13 @@ class FirebaseService:
             self.db.collection('users').document(user_id).update(update_data)
             return True
         except Exception as e:
-            print(f"Error updating user: {e}")
+            logger.error("Error updating user: %s", e)
             return False
+        finally:
+            # Drop the cached profile even if the update failed part-way
+            self.profile_cache.delete(user_id)
     
+    @metrics.timed('firebase.save_ai_tip')
     def save_ai_tip(self, user_id, tip_data):
         """
         Save an AI tip to the user's history
@@ -94,41 +217,95 @@ class FirebaseService:
             doc_ref.set(tip_data)
             return doc_ref.id
         except Exception as e:
-            print(f"Error saving AI tip: {e}")
+            logger.error("Error saving AI tip: %s", e)
             return None
     
-    def get_ai_tips_history(self, user_id, limit=10):
+    @metrics.timed('firebase.queue_ai_tip')
+    def queue_ai_tip(self, user_id, tip_data):
+        """
+        Queue an AI tip to be saved to the user's history in the background
+        
+        Args:
+            user_id (str): Firebase user ID
+            tip_data (dict): AI tip data to save
+            
+        Returns:
+            str: Document ID the tip will be saved under
+        """
+        doc_ref = self.db.collection('users').document(user_id).collection('ai_tips').document()
+        self.write_queue.enqueue(doc_ref, tip_data)
+        return doc_ref.id
+    
+    def queue_write(self, doc_ref, data, merge=False):
+        """
+        Queue a non-critical document write to be committed in the background
+        
+        Args:
+            doc_ref (firestore.DocumentReference): Document to write
+            data (dict): Document data
+            merge (bool, optional): Merge into an existing document
+        """
+        self.write_queue.enqueue(doc_ref, data, merge=merge)
+    
+    def get_write_queue_stats(self):
+        """
+        Get write-behind queue statistics
+        
+        Returns:
+            dict: Queue depth, write counters and flush latency (empty before connect())
+        """
+        return self.write_queue.get_stats() if self.write_queue else {}
+    
+    @metrics.timed('firebase.save_ai_tips_batch')
+    def save_ai_tips_batch(self, user_id, tips):
+        """
+        Save several AI tips to the user's history using batched writes
+        
+        Args:
+            user_id (str): Firebase user ID
+            tips (list): AI tip data dicts to save
+            
+        Returns:
+            list: Document IDs of the saved tips (empty if the commit failed)
+        """
+        try:
+            tip_ids = []
+            for batch, batch_ids in self._tip_batches(user_id, tips):
+                batch.commit()
+                tip_ids.extend(batch_ids)
+            return tip_ids
+        except Exception as e:
+            logger.error("Error saving AI tips batch: %s", e)
+            return []
+    
+    @metrics.timed('firebase.get_ai_tips_history')
+    def get_ai_tips_history(self, user_id, limit=10, cursor=None, fields=None):
         """
         Get the user's AI tips history
         
         Args:
             user_id (str): Firebase user ID
             limit (int, optional): Maximum number of tips to retrieve
+            cursor (str, optional): Cursor returned with the previous page
+            fields (list, optional): Only return these fields (Firestore projection)
             
         Returns:
-            list: List of AI tips
+            tuple: (list of AI tips, cursor for the next page or None)
+            
+        Raises:
+            ValueError: If the cursor is malformed
         """
+        start_after = decode_cursor(cursor) if cursor else None
+        
         try:
-            # Get tips from user's ai_tips subcollection, ordered by timestamp
-            tips_ref = (
-                self.db.collection('users')
-                .document(user_id)
-                .collection('ai_tips')
-                .order_by('created_at', direction=firestore.Query.DESCENDING)
-                .limit(limit)
-            )
-            
-            tips = []
-            for doc in tips_ref.stream():
-                tip_data = doc.to_dict()
-                tip_data['id'] = doc.id
-                tips.append(tip_data)
-                
-            return tips
+            query = self._tips_query(user_id, limit, start_after, fields)
+            tips = [self._snapshot_data(doc) for doc in query.stream()]
+            return tips, self._next_cursor(tips, limit)
         except Exception as e:
-            print(f"Error getting AI tips history: {e}")
-            return []
+            logger.error("Error getting AI tips history: %s", e)
+            return [], None
     
+    @metrics.timed('firebase.add_expense')
     def add_expense(self, user_id, expense_data):
         """
         Add an expense to the user's expenses
@@ -141,15 +318,44 @@ class FirebaseService:
             str: Document ID of the saved expense
         """
         try:
-            # Add expense to user's expenses subcollection
-            doc_ref = self.db.collection('users').document(user_id).collection('expenses').document()
-            doc_ref.set(expense_data)
-            return doc_ref.id
+            # The expense and its rollup increments commit atomically in one batch
+            batch, expense_ids = self._expense_batch(user_id, [expense_data])
+            batch.commit()
+            return expense_ids[0]
         except Exception as e:
-            print(f"Error adding expense: {e}")
+            logger.error("Error adding expense: %s", e)
             return None
     
-    def get_expenses(self, user_id, limit=20, category=None, start_date=None, end_date=None):
+    @metrics.timed('firebase.add_expenses_batch')
+    def add_expenses_batch(self, user_id, expenses):
+        """
+        Add several expenses to the user's expenses using batched writes
+        
+        Each batch commits a group of expenses together with the rollup
+        increments for that group, so a failed commit never leaves rollups
+        out of step with the expenses. The first failed commit stops the write.
+        
+        Args:
+            user_id (str): Firebase user ID
+            expenses (list): Expense data dicts to save
+            
+        Returns:
+            list: Document IDs of the saved expenses, in order; shorter than
+                expenses if a commit failed (the rest were not saved)
+        """
+        expense_ids = []
+        try:
+            for group in self._expense_groups(expenses):
+                batch, group_ids = self._expense_batch(user_id, group)
+                batch.commit()
+                expense_ids.extend(group_ids)
+            return expense_ids
+        except Exception as e:
+            logger.error("Error adding expenses batch after %s expenses: %s", len(expense_ids), e)
+            return expense_ids
+    
+    @metrics.timed('firebase.get_expenses')
+    def get_expenses(self, user_id, limit=20, category=None, start_date=None, end_date=None, cursor=None, fields=None):
         """
         Get the user's expenses with filtering options
         
@@ -159,51 +365,106 @@ class FirebaseService:
             category (str, optional): Filter by category
             start_date (str, optional): Filter by minimum date (ISO format)
             end_date (str, optional): Filter by maximum date (ISO format)
+            cursor (str, optional): Cursor returned with the previous page
+            fields (list, optional): Only return these fields (Firestore projection)
             
         Returns:
-            list: List of expenses
+            tuple: (list of expenses, cursor for the next page or None)
+            
+        Raises:
+            ValueError: If the cursor is malformed
         """
+        start_after = decode_cursor(cursor) if cursor else None
+        
         try:
-            # Start with base query
-            expenses_ref = (
-                self.db.collection('users')
-                .document(user_id)
-                .collection('expenses')
-                .order_by('created_at', direction=firestore.Query.DESCENDING)
-            )
-            
-            # Add category filter if provided
-            if category:
-                expenses_ref = expenses_ref.where('category', '==', category)
-            
-            # Add date filters if provided
-            if start_date:
-                start_datetime = datetime.fromisoformat(start_date)
-                expenses_ref = expenses_ref.where('created_at', '>=', start_datetime)
-                
-            if end_date:
-                end_datetime = datetime.fromisoformat(end_date)
-                expenses_ref = expenses_ref.where('created_at', '<=', end_datetime)
-            
-            # Add limit
-            expenses_ref = expenses_ref.limit(limit)
-            
-            # Retrieve expenses
-            expenses = []
-            for doc in expenses_ref.stream():
-                expense_data = doc.to_dict()
-                expense_data['id'] = doc.id
-                expenses.append(expense_data)
-                
-            return expenses
+            query = self._expenses_query(user_id, limit, category, start_date, end_date, start_after, fields)
+            expenses = [self._snapshot_data(doc) for doc in query.stream()]
+            return expenses, self._next_cursor(expenses, limit)
         except Exception as e:
-            print(f"Error getting expenses: {e}")
-            return []
+            logger.error("Error getting expenses: %s", e)
+            return [], None
+    
+    def _snapshot_data(self, doc):
+        if doc is None or not doc.exists:
+            return None
+        data = doc.to_dict()
+        data['id'] = doc.id
+        return data
+    
+    def _paginate(self, collection_ref, query, limit, start_after=None, fields=None):
+        """
+        Order a query newest-first with a stable tie-breaker and apply the
+        cursor, projection and page size
+        
+        Args:
+            collection_ref (firestore.CollectionReference): Collection being queried
+            query (firestore.Query): Query with any filters already applied
+            limit (int): Page size
+            start_after (tuple, optional): Decoded (created_at, document ID) cursor
+            fields (list, optional): Fields to select
+            
+        Returns:
+            firestore.Query: Paginated query
+        """
+        query = (
+            query.order_by('created_at', direction=firestore.Query.DESCENDING)
+            .order_by(FieldPath.document_id(), direction=firestore.Query.DESCENDING)
+        )
+        
+        if start_after:
+            created_at, doc_id = start_after
+            query = query.start_after({
+                'created_at': created_at,
+                FieldPath.document_id(): collection_ref.document(doc_id)
+            })
+        
+        if fields:
+            # created_at is always needed to build the next cursor
+            query = query.select(sorted(set(fields) | {'created_at'}))
+        
+        return query.limit(limit)
     
+    def _next_cursor(self, items, limit):
+        """
+        Build the cursor for the page after items (None on the last page)
+        """
+        if len(items) < limit or not items:
+            return None
+        last = items[-1]
+        if not isinstance(last.get('created_at'), datetime):
+            return None
+        return encode_cursor(last['created_at'], last['id'])
+    
+    @metrics.timed('firebase.get_expense_history')
+    def get_expense_history(self, user_id, start_date=None):
+        """
+        Get the user's expense history in columnar form for analytics
+        
+        Args:
+            user_id (str): Firebase user ID
+            start_date (datetime, optional): Only include expenses created since this time
+            
+        Returns:
+            dict: Parallel lists 'ids', 'amounts', 'categories' and 'timestamps'
+                (epoch seconds)
+        """
+        columns = self._history_columns()
+        try:
+            for doc in self._history_query(user_id, start_date).stream():
+                self._add_history_row(columns, doc)
+            return columns
+        except Exception as e:
+            logger.error("Error getting expense history: %s", e)
+            return columns
+    
+    @metrics.timed('firebase.get_expense_summary')
     def get_expense_summary(self, user_id, period='month'):
         """
         Get a summary of the user's expenses for a given period
         
+        Reads the pre-aggregated rollup document for the current period
+        instead of scanning every expense.
+        
         Args:
             user_id (str): Firebase user ID
             period (str, optional): Period to summarize ('day', 'week', 'month', 'year')
@@ -212,44 +473,289 @@ class FirebaseService:
             dict: Summary of expenses by category
         """
         try:
-            # Set start date based on period
-            today = datetime.now()
-            
-            if period == 'day':
-                start_date = datetime(today.year, today.month, today.day, 0, 0, 0)
-            elif period == 'week':
-                # Start of the week (Monday)
-                days_since_monday = today.weekday()
-                start_date = datetime(today.year, today.month, today.day, 0, 0, 0) - timedelta(days=days_since_monday)
-            elif period == 'month':
-                start_date = datetime(today.year, today.month, 1, 0, 0, 0)
-            elif period == 'year':
-                start_date = datetime(today.year, 1, 1, 0, 0, 0)
-            else:
-                start_date = datetime(today.year, today.month, 1, 0, 0, 0)  # Default to month
-            
-            # Query expenses since start date
-            expenses_ref = (
-                self.db.collection('users')
-                .document(user_id)
-                .collection('expenses')
-                .where('created_at', '>=', start_date)
-                .stream()
-            )
-            
-            # Group expenses by category
-            summary = {}
-            for doc in expenses_ref:
-                expense = doc.to_dict()
-                category = expense.get('category', 'Other')
-                amount = expense.get('amount', 0)
-                
-                if category not in summary:
-                    summary[category] = 0
-                
-                summary[category] += amount
-            
-            return summary
+            return self._summary(self._summary_ref(user_id, period).get())
         except Exception as e:
-            print(f"Error getting expense summary: {e}")
+            logger.error("Error getting expense summary: %s", e)
             return {}
+    
+    @metrics.timed('firebase.rebuild_expense_rollups')
+    def rebuild_expense_rollups(self, user_id):
+        """
+        Recompute the user's expense rollups from scratch (backfill)
+        
+        Args:
+            user_id (str): Firebase user ID
+            
+        Returns:
+            int: Number of rollup documents written
+        """
+        try:
+            # Aggregate every expense in memory (one pass over the collection)
+            expenses_ref = self.db.collection('users').document(user_id).collection('expenses')
+            rollups = self._aggregate_rollups(doc.to_dict() for doc in expenses_ref.stream())
+            stale_refs = list(self._rollups_ref(user_id).list_documents())
+            
+            for batch in self._rebuild_batches(user_id, rollups, stale_refs):
+                batch.commit()
+            return len(rollups)
+        except Exception as e:
+            logger.error("Error rebuilding expense rollups: %s", e)
+            return 0
+    
+    # Query, batch and cache helpers shared with AsyncFirebaseService: they
+    # only build queries, batches and results, so they work with either client
+    
+    def _cached_profile(self, user_id):
+        cached = self.profile_cache.get(user_id)
+        return dict(cached) if cached is not None else None
+    
+    def _cache_profile(self, user_id, user_data):
+        """
+        Strip sensitive fields from user data and cache the resulting profile
+        
+        Returns:
+            dict: Profile without sensitive fields
+        """
+        profile = {key: value for key, value in user_data.items() if key not in SENSITIVE_USER_FIELDS}
+        self.profile_cache.set(user_id, dict(profile))
+        return profile
+    
+    def _tip_batches(self, user_id, tips):
+        """
+        Build batches that create the tips, at most 500 writes each
+        
+        Yields:
+            tuple: (write batch, document IDs of its tips)
+        """
+        tips_ref = self.db.collection('users').document(user_id).collection('ai_tips')
+        for start in range(0, len(tips), self.MAX_BATCH_SIZE):
+            batch = self.db.batch()
+            tip_ids = []
+            for tip_data in tips[start:start + self.MAX_BATCH_SIZE]:
+                doc_ref = tips_ref.document()
+                batch.set(doc_ref, tip_data)
+                tip_ids.append(doc_ref.id)
+            yield batch, tip_ids
+    
+    def _expense_batch(self, user_id, expenses):
+        """
+        Build one batch that creates the expenses and merges their rollup
+        increments (the caller keeps it within 500 writes)
+        
+        Returns:
+            tuple: (write batch, document IDs of the expenses)
+        """
+        expenses_ref = self.db.collection('users').document(user_id).collection('expenses')
+        batch = self.db.batch()
+        expense_ids = []
+        for expense_data in expenses:
+            doc_ref = expenses_ref.document()
+            batch.set(doc_ref, expense_data)
+            expense_ids.append(doc_ref.id)
+        
+        # One merged increment per rollup document for the group
+        for rollup_ref, rollup_data in self._rollup_writes(user_id, expenses):
+            batch.set(rollup_ref, rollup_data, merge=True)
+        return batch, expense_ids
+    
+    def _tips_query(self, user_id, limit, start_after=None, fields=None):
+        tips_collection = self.db.collection('users').document(user_id).collection('ai_tips')
+        return self._paginate(tips_collection, tips_collection, limit, start_after, fields)
+    
+    def _expenses_query(self, user_id, limit, category=None, start_date=None, end_date=None,
+                        start_after=None, fields=None):
+        """
+        Build the filtered, paginated expenses query
+        
+        Returns:
+            firestore.Query: Paginated query
+        """
+        expenses_collection = self.db.collection('users').document(user_id).collection('expenses')
+        query = expenses_collection
+        
+        if category:
+            query = query.where('category', '==', category)
+        if start_date:
+            query = query.where('created_at', '>=', parse_iso_datetime(start_date))
+        if end_date:
+            query = query.where('created_at', '<=', parse_iso_datetime(end_date))
+        
+        return self._paginate(expenses_collection, query, limit, start_after, fields)
+    
+    def _history_columns(self):
+        return {"ids": [], "amounts": [], "categories": [], "timestamps": []}
+    
+    def _history_query(self, user_id, start_date=None):
+        query = (
+            self.db.collection('users')
+            .document(user_id)
+            .collection('expenses')
+            .select(['amount', 'category', 'created_at'])
+        )
+        if start_date:
+            query = query.where('created_at', '>=', start_date)
+        return query
+    
+    def _add_history_row(self, columns, doc):
+        """
+        Append an expense snapshot to the history columns, skipping rows
+        without a timestamp or a numeric amount
+        """
+        expense = doc.to_dict()
+        created_at = expense.get('created_at')
+        if not isinstance(created_at, datetime):
+            return
+        try:
+            amount = float(expense.get('amount', 0))
+        except (ValueError, TypeError):
+            return
+        
+        columns["ids"].append(doc.id)
+        columns["amounts"].append(amount)
+        columns["categories"].append(expense.get('category', 'Other'))
+        columns["timestamps"].append(created_at.timestamp())
+    
+    def _summary_ref(self, user_id, period):
+        if period not in ROLLUP_PERIODS:
+            period = 'month'  # Default to month
+        doc_id, _ = self._rollup_key(period, datetime.now(timezone.utc))
+        return self._rollups_ref(user_id).document(doc_id)
+    
+    def _summary(self, doc):
+        if not doc.exists:
+            return {}
+        return doc.to_dict().get('categories', {})
+    
+    def _rebuild_batches(self, user_id, rollups, stale_refs):
+        """
+        Build batches that delete the existing rollups and write the fresh
+        ones, at most 500 operations each
+        
+        Yields:
+            write batch
+        """
+        writes = [(doc_ref, None) for doc_ref in stale_refs]
+        for doc_id, rollup in rollups.items():
+            writes.append((self._rollups_ref(user_id).document(doc_id), rollup))
+        
+        for start in range(0, len(writes), self.MAX_BATCH_SIZE):
+            batch = self.db.batch()
+            for doc_ref, data in writes[start:start + self.MAX_BATCH_SIZE]:
+                if data is None:
+                    batch.delete(doc_ref)
+                else:
+                    batch.set(doc_ref, data)
+            yield batch
+    
+    def _rollups_ref(self, user_id):
+        return self.db.collection('users').document(user_id).collection('expense_rollups')
+    
+    def _rollup_key(self, period, when):
+        """
+        Get the rollup document ID and period start for a timestamp
+        
+        Periods are UTC calendar periods, so bucketing does not depend on the
+        server's timezone. Naive timestamps are taken as UTC, as Firestore
+        stores them.
+        
+        Args:
+            period (str): 'day', 'week', 'month' or 'year'
+            when (datetime): Timestamp of the expense
+            
+        Returns:
+            tuple: (document ID, period start as a UTC datetime)
+        """
+        if when.tzinfo is not None:
+            when = when.astimezone(timezone.utc)
+        day = datetime(when.year, when.month, when.day, tzinfo=timezone.utc)
+        if period == 'day':
+            start = day
+        elif period == 'week':
+            # Weeks start on Monday
+            start = day - timedelta(days=day.weekday())
+        elif period == 'month':
+            start = day.replace(day=1)
+        else:
+            start = day.replace(month=1, day=1)
+        return f"{period}-{start.strftime('%Y-%m-%d')}", start
+    
+    def _aggregate_rollups(self, expenses):
+        """
+        Sum expenses into per-period, per-category rollups
+        
+        Args:
+            expenses (iterable): Expense data dicts
+            
+        Returns:
+            dict: Rollup document ID -> rollup data with plain numeric totals
+        """
+        rollups = {}
+        for expense in expenses:
+            try:
+                amount = float(expense.get('amount', 0))
+            except (ValueError, TypeError):
+                continue
+            category = expense.get('category', 'Other')
+            when = self._expense_time(expense)
+            
+            for period in ROLLUP_PERIODS:
+                doc_id, start = self._rollup_key(period, when)
+                rollup = rollups.setdefault(doc_id, {
+                    "period": period,
+                    "start": start,
+                    "total": 0,
+                    "count": 0,
+                    "categories": {}
+                })
+                rollup["total"] += amount
+                rollup["count"] += 1
+                rollup["categories"][category] = rollup["categories"].get(category, 0) + amount
+        return rollups
+    
+    def _expense_time(self, expense):
+        # Expenses saved with SERVER_TIMESTAMP are counted as "now"
+        when = expense.get('created_at')
+        return when if isinstance(when, datetime) else datetime.now(timezone.utc)
+    
+    def _expense_groups(self, expenses, max_writes=MAX_BATCH_SIZE):
+        """
+        Split expenses into groups whose expense writes plus rollup writes
+        fit in one Firestore batch (at most 500 writes)
+        
+        Yields:
+            list: Consecutive expenses
+        """
+        group = []
+        rollup_ids = set()
+        for expense in expenses:
+            when = self._expense_time(expense)
+            ids = {self._rollup_key(period, when)[0] for period in ROLLUP_PERIODS}
+            if group and len(group) + 1 + len(rollup_ids | ids) > max_writes:
+                yield group
+                group = []
+                rollup_ids = set()
+            group.append(expense)
+            rollup_ids |= ids
+        if group:
+            yield group
+    
+    def _rollup_writes(self, user_id, expenses):
+        """
+        Build merge writes that increment the rollups touched by the expenses
+        
+        Returns:
+            list: (document reference, data) tuples to set with merge=True
+        """
+        writes = []
+        for doc_id, rollup in self._aggregate_rollups(expenses).items():
+            writes.append((self._rollups_ref(user_id).document(doc_id), {
+                "period": rollup["period"],
+                "start": rollup["start"],
+                "total": firestore.Increment(rollup["total"]),
+                "count": firestore.Increment(rollup["count"]),
+                "categories": {
+                    category: firestore.Increment(amount)
+                    for category, amount in rollup["categories"].items()
+                }
+            }))
+        return writes
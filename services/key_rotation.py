@@ -0,0 +1,272 @@
+import os
+import json
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from cryptography.fernet import Fernet, MultiFernet, InvalidToken
+from google.api_core import exceptions as google_exceptions
+from google.cloud.firestore_v1.field_path import FieldPath
+
+logger = logging.getLogger(__name__)
+
+# Per-process ciphers, built once by the pool initializer
+_primary = None
+_multi = None
+
+
+def _init_worker(keys):
+    global _primary, _multi
+    _primary = Fernet(keys[0])
+    _multi = MultiFernet([Fernet(key) for key in keys])
+
+
+def _rotate_tokens(tokens):
+    """
+    Re-encrypt tokens under the primary key (runs in a worker process)
+
+    Args:
+        tokens (list): Encrypted values as strings
+
+    Returns:
+        list: New token, None if already on the primary key, or False if
+            no known key can decrypt it
+    """
+    rotated = []
+    for token in tokens:
+        data = token.encode()
+        try:
+            _primary.decrypt(data)
+            rotated.append(None)
+            continue
+        except InvalidToken:
+            pass
+
+        try:
+            rotated.append(_multi.rotate(data).decode())
+        except InvalidToken:
+            rotated.append(False)
+    return rotated
+
+
+class SSNKeyRotation:
+    """
+    Streaming job that re-encrypts every user's ssn_encrypted under the
+    current primary key
+
+    Each write is conditional on the document's update time when it was
+    read, so a profile written concurrently is never overwritten with a
+    value re-encrypted from its old SSN; those users are re-read and retried.
+    """
+
+    def __init__(self, db, keys, page_size=500, workers=None, checkpoint_path=None, max_conflict_retries=3):
+        """
+        Initialize the rotation job
+
+        Args:
+            db (firestore.Client): Firestore database client
+            keys (list): Fernet keys, primary (new) key first
+            page_size (int, optional): Users fetched and committed per page (max 500)
+            workers (int, optional): Worker processes (defaults to CPU count)
+            checkpoint_path (str, optional): File recording the last committed user ID;
+                removed once a run completes
+            max_conflict_retries (int, optional): Times a concurrently modified user is
+                re-read and rotated again before it is counted as a conflict
+        """
+        self.db = db
+        self.keys = keys
+        self.page_size = min(page_size, 500)
+        self.workers = workers or os.cpu_count() or 1
+        self.checkpoint_path = checkpoint_path
+        self.max_conflict_retries = max_conflict_retries
+
+        self.scanned = 0
+        self.rotated = 0
+        self.failed = 0
+        self.conflicts = 0
+        self.elapsed = 0.0
+
+    def run(self, progress=None):
+        """
+        Run (or resume) the rotation
+
+        An interrupted run resumes after the last committed page; a run that
+        finishes removes the checkpoint so the next one starts from the beginning.
+
+        Args:
+            progress (callable, optional): Called with get_stats() after each page
+
+        Returns:
+            dict: Final statistics
+        """
+        start = time.perf_counter()
+        last_id = self._load_checkpoint()
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self.keys,)) as pool:
+            page = self._fetch_page(last_id)
+            while page:
+                # Encrypt this page on the pool while the next page is read
+                futures = self._submit(pool, page)
+                next_page = self._fetch_page(page[-1][0]) if len(page) == self.page_size else []
+
+                conflicts = self._write_back(page, self._collect(futures))
+                for _ in range(self.max_conflict_retries):
+                    if not conflicts:
+                        break
+                    retry_page = self._fetch_users(conflicts)
+                    conflicts = self._write_back(retry_page, self._collect(self._submit(pool, retry_page)),
+                                                 scanned=False)
+                if conflicts:
+                    self.conflicts += len(conflicts)
+                    logger.warning("Users modified during rotation, not rotated: %s", ", ".join(conflicts))
+
+                self._save_checkpoint(page[-1][0])
+
+                self.elapsed = time.perf_counter() - start
+                if progress:
+                    progress(self.get_stats())
+                page = next_page
+
+        self._clear_checkpoint()
+        self.elapsed = time.perf_counter() - start
+        return self.get_stats()
+
+    def get_stats(self):
+        """
+        Get job statistics
+
+        Returns:
+            dict: Scanned/rotated/failed/conflicting counts and throughput (rows per second)
+        """
+        return {
+            "scanned": self.scanned,
+            "rotated": self.rotated,
+            "failed": self.failed,
+            "conflicts": self.conflicts,
+            "elapsed": self.elapsed,
+            "rows_per_sec": self.scanned / self.elapsed if self.elapsed else 0.0
+        }
+
+    def _fetch_page(self, after_id):
+        """
+        Read the next page of users that have an encrypted SSN
+
+        Returns:
+            list: (user ID, encrypted SSN or None, update time) tuples in document ID order
+        """
+        users_ref = self.db.collection('users')
+        query = (
+            users_ref.order_by(FieldPath.document_id())
+            .select(['ssn_encrypted'])
+            .limit(self.page_size)
+        )
+        if after_id:
+            query = query.start_after({FieldPath.document_id(): users_ref.document(after_id)})
+
+        return [self._page_row(doc) for doc in query.stream()]
+
+    def _fetch_users(self, user_ids):
+        """
+        Re-read specific users (after a write conflict)
+
+        Returns:
+            list: (user ID, encrypted SSN or None, update time) tuples for users that still exist
+        """
+        users_ref = self.db.collection('users')
+        docs = self.db.get_all([users_ref.document(user_id) for user_id in user_ids], field_paths=['ssn_encrypted'])
+        return [self._page_row(doc) for doc in docs if doc.exists]
+
+    def _page_row(self, doc):
+        return doc.id, (doc.to_dict() or {}).get('ssn_encrypted'), doc.update_time
+
+    def _submit(self, pool, page):
+        tokens = [token for _, token, _ in page if token]
+        chunk_size = max(len(tokens) // self.workers, 1)
+        return [
+            pool.submit(_rotate_tokens, tokens[i:i + chunk_size])
+            for i in range(0, len(tokens), chunk_size)
+        ]
+
+    def _collect(self, futures):
+        results = []
+        for future in futures:
+            results.extend(future.result())
+        return results
+
+    def _write_back(self, page, results, scanned=True):
+        """
+        Commit re-encrypted values for one page in a single batch, each write
+        conditional on the update time the value was read at
+
+        A batch is atomic, so when any precondition fails the page's writes
+        are committed one by one to find the users that changed.
+
+        Args:
+            page (list): Rows returned by _fetch_page or _fetch_users
+            results (list): _rotate_tokens output for the page's tokens
+            scanned (bool, optional): Count the page's rows as scanned
+
+        Returns:
+            list: IDs of users modified since they were read (not written)
+        """
+        users_ref = self.db.collection('users')
+        writes = []
+
+        rotated_values = iter(results)
+        for user_id, token, update_time in page:
+            if scanned:
+                self.scanned += 1
+            if not token:
+                continue
+
+            new_token = next(rotated_values)
+            if new_token is False:
+                self.failed += 1
+                logger.warning("Could not decrypt ssn_encrypted for user %s with any known key", user_id)
+            elif new_token:
+                option = self.db.write_option(last_update_time=update_time)
+                writes.append((user_id, users_ref.document(user_id), {"ssn_encrypted": new_token}, option))
+
+        if not writes:
+            return []
+
+        batch = self.db.batch()
+        for _, doc_ref, data, option in writes:
+            batch.update(doc_ref, data, option=option)
+        try:
+            batch.commit()
+            self.rotated += len(writes)
+            return []
+        except (google_exceptions.FailedPrecondition, google_exceptions.NotFound):
+            pass
+
+        conflicts = []
+        for user_id, doc_ref, data, option in writes:
+            try:
+                doc_ref.update(data, option=option)
+                self.rotated += 1
+            except google_exceptions.FailedPrecondition:
+                conflicts.append(user_id)
+            except google_exceptions.NotFound:
+                # Deleted since it was read; nothing left to rotate
+                pass
+        return conflicts
+
+    def _load_checkpoint(self):
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path) as f:
+            return json.load(f).get('last_id')
+
+    def _save_checkpoint(self, last_id):
+        if not self.checkpoint_path:
+            return
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"last_id": last_id, **self.get_stats()}, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _clear_checkpoint(self):
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
@@ -0,0 +1,119 @@
+import re
+import zlib
+
+# Short explanations for common topics, matched on words in the normalized topic
+TOPIC_EXPLANATIONS = [
+    (("credit", "score"), "Your credit score reflects how reliably you repay borrowed money; "
+                          "paying on time and keeping card balances low are what raise it."),
+    (("loan", "loans", "debt", "interest"), "Interest is the price of borrowing: the longer a balance stays "
+                                            "unpaid, the more it costs, so extra payments save money."),
+    (("emergency",), "An emergency fund is cash set aside for surprises like a repair or a medical bill, "
+                     "so they don't end up on a credit card."),
+    (("invest", "investing", "stocks", "index"), "Investing means buying assets that can grow over time; "
+                                                 "low-cost index funds spread your risk across many companies."),
+    (("tax", "taxes"), "Taxes are taken from what you earn; many students get some or all of it back by "
+                       "filing a return, and tuition can qualify for education credits."),
+    (("scholarship", "scholarships", "grant", "grants", "aid"), "Scholarships and grants are money for school "
+                                                                "that you don't repay, unlike loans."),
+    (("saving", "savings", "save"), "Saving works best when it happens first: move a fixed amount out of "
+                                    "your spending account as soon as money comes in."),
+    (("budget", "budgeting"), "A budget is a plan for your money: you decide ahead of time how much goes to "
+                              "needs, wants and savings, then track spending against it."),
+]
+
+EARN_EXTRA_IDEAS = [
+    "Tutor a class you did well in, online or through your campus learning center.",
+    "Sell last semester's textbooks back or list them for other students.",
+    "Pick up a few shifts through a campus job board or event staffing.",
+    "Take paid research studies or surveys offered by your university.",
+    "Offer a skill you already have, like editing, design or pet sitting, to people nearby.",
+]
+
+
+class LocalInsightsService:
+    """
+    Deterministic, rule-based insights built from the same inputs as the
+    OpenAI prompt. Used when OpenAI errors or misses its deadline; the same
+    inputs always produce the same answer.
+    """
+
+    def get_financial_insights(self, budget, spent, goal, debt, topic):
+        """
+        Build insights from the user's financial data
+
+        Args:
+            budget (float): User's monthly budget
+            spent (float): Amount spent so far
+            goal (float): Savings goal
+            debt (float): Total debt
+            topic (str): Financial topic of interest
+
+        Returns:
+            dict: Same keys as a parsed OpenAI response, with "source": "local"
+        """
+        budget, spent, goal, debt = (self._amount(value) for value in (budget, spent, goal, debt))
+        remaining = budget - spent
+
+        return {
+            "budget_tip": self._budget_tip(budget, spent, remaining),
+            "savings_tip": self._savings_tip(budget, remaining, goal, debt),
+            "explanation": self._explanation(topic),
+            "scholarship_suggestion": self._scholarship_suggestion(remaining, debt),
+            "earn_extra_suggestion": self._earn_extra_suggestion(remaining, topic),
+            "raw_response": None,
+            "source": "local"
+        }
+
+    def _amount(self, value):
+        try:
+            return max(float(value or 0), 0.0)
+        except (ValueError, TypeError):
+            return 0.0
+
+    def _budget_tip(self, budget, spent, remaining):
+        if budget <= 0:
+            return "Set a monthly budget first: add up rent, food and transport, then give each a weekly limit."
+        if remaining < 0:
+            return (f"You're ${-remaining:,.0f} over budget. Pause non-essential spending this week "
+                    f"and check which category went over.")
+        if spent >= budget * 0.8:
+            return (f"Only ${remaining:,.0f} of your ${budget:,.0f} budget is left. "
+                    f"Cap this week's spending at ${remaining / 4:,.0f} and plan meals ahead.")
+        return (f"You have ${remaining:,.0f} left this month. Give yourself a weekly limit of "
+                f"${remaining / 4:,.0f} and check it every Sunday.")
+
+    def _savings_tip(self, budget, remaining, goal, debt):
+        # High debt relative to the budget: extra payments beat saving at a lower rate
+        if debt > 0 and debt >= budget * 3:
+            payment = max(remaining * 0.2, 10.0)
+            return (f"Put an extra ${payment:,.0f} toward your highest-interest debt this month "
+                    f"before adding to savings.")
+        if goal <= 0:
+            return "Pick a small savings goal, like $100 for emergencies, and move $5 there every week."
+        if remaining <= 0:
+            return (f"Keep your ${goal:,.0f} goal, but start with $5 a week until spending is back "
+                    f"under budget.")
+        weekly = max(round(min(remaining * 0.2, goal) / 4), 1)
+        weeks = -(-goal // weekly)
+        return (f"Move ${weekly:,.0f} a week into savings; at that pace you reach ${goal:,.0f} "
+                f"in about {weeks:,.0f} weeks.")
+
+    def _explanation(self, topic):
+        words = set(re.sub(r'[^a-z0-9 ]+', ' ', str(topic or '').lower()).split())
+        for keywords, explanation in TOPIC_EXPLANATIONS:
+            if words.intersection(keywords):
+                return explanation
+        return TOPIC_EXPLANATIONS[-1][1]
+
+    def _scholarship_suggestion(self, remaining, debt):
+        if remaining < 0 or debt > 0:
+            return ("File the FAFSA to check your eligibility for the Federal Pell Grant, "
+                    "which doesn't need to be repaid.")
+        return "Ask your financial aid office about institutional need-based scholarships for current students."
+
+    def _earn_extra_suggestion(self, remaining, topic):
+        # Stable choice per topic so repeated requests get the same idea
+        idea = EARN_EXTRA_IDEAS[zlib.crc32(str(topic or '').lower().encode()) % len(EARN_EXTRA_IDEAS)]
+        if remaining < 0:
+            return f"{idea} Earning ${-remaining:,.0f} would cover this month's overspend."
+        return idea
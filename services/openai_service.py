@@ -1,73 +1,524 @@
 import os
+import re
+import asyncio
 import openai
 import json
+import logging
+
+from utils.cache import TTLCache
+from utils.concurrency import AsyncConcurrencyLimiter, AsyncSingleFlight
+from utils.metrics import metrics
+from utils.prompts import PromptTemplate, count_tokens, count_message_tokens
+from services.local_insights_service import LocalInsightsService
+
+logger = logging.getLogger(__name__)
+
+# Cap on outstanding OpenAI requests per event loop (one per worker); waiting costs a
+# coroutine, not a thread, and the semaphore is created inside the loop on first use
+async_llm_limiter = AsyncConcurrencyLimiter(int(os.environ.get('OPENAI_MAX_ASYNC_CONCURRENCY', 128)))
+
+# Bucket widths used to normalize financial inputs for the insights cache key
+INSIGHTS_CACHE_BUCKETS = {
+    "budget": 25,
+    "spent": 25,
+    "goal": 25,
+    "debt": 250
+}
+
+# Response section markers and the keys they map to in the parsed response
+SECTION_MARKERS = [
+    ("BUDGET_TIP:", "budget_tip"),
+    ("SAVINGS_TIP:", "savings_tip"),
+    ("EXPLANATION:", "explanation"),
+    ("SCHOLARSHIP:", "scholarship_suggestion"),
+    ("EARN_EXTRA:", "earn_extra_suggestion")
+]
+
+SYSTEM_PROMPT = (
+    "You are Velora, a smart and friendly AI financial coach for college students. "
+    "Be casual, supportive, and practical. Avoid pressure. Use clear, student-friendly language."
+)
+
+# Context window of the chat model; max_tokens never asks for more than what is left
+MODEL_CONTEXT_TOKENS = 4096
+
+# The persona lives in SYSTEM_PROMPT only; section budgets bound max_tokens
+INSIGHTS_PROMPT = PromptTemplate('insights', """
+    The student has:
+    - Monthly Budget: ${budget}
+    - Spent this month: ${spent}
+    - Savings Goal: ${goal}
+    - Debt Level: ${debt} (loans or credit card)
+    - Interest Topic: {topic}
+
+    Reply in exactly this format, one line per section:
+    BUDGET_TIP: [a simple budgeting tip for this week]
+    SAVINGS_TIP: [a small, realistic way to save]
+    EXPLANATION: [a short explanation of {topic}, 1-2 sentences]
+    SCHOLARSHIP: [one scholarship they should look into based on need]
+    EARN_EXTRA: [one way to earn a little extra money this week, e.g. online tutoring, surveys, reselling books]
+    """, section_tokens={
+    "budget_tip": 70,
+    "savings_tip": 60,
+    "explanation": 90,
+    "scholarship_suggestion": 70,
+    "earn_extra_suggestion": 60
+})
+
+openai_tokens = metrics.counter('velora_openai_tokens_total', 'OpenAI tokens used by insight calls', ['kind'])
+
+
+class InsightsStreamParser:
+    """
+    Incremental parser that extracts response sections as soon as the line
+    holding their marker is complete
+    """
+    
+    def __init__(self):
+        self.sections = {}
+        self._buffer = ""
+        self._parts = []
+    
+    @property
+    def text(self):
+        """
+        Full text received so far
+        """
+        return "".join(self._parts)
+    
+    def feed(self, chunk):
+        """
+        Feed a chunk of streamed text
+        
+        Args:
+            chunk (str): Newly received text
+            
+        Returns:
+            list: (key, value) tuples for sections completed by this chunk
+        """
+        self._parts.append(chunk)
+        self._buffer += chunk
+        if "\n" not in self._buffer:
+            return []
+        
+        *lines, self._buffer = self._buffer.split("\n")
+        found = []
+        for line in lines:
+            found.extend(self._parse_line(line))
+        return found
+    
+    def close(self):
+        """
+        Flush the last (unterminated) line
+        
+        Returns:
+            list: (key, value) tuples for sections found in the remaining text
+        """
+        line, self._buffer = self._buffer, ""
+        return self._parse_line(line)
+    
+    def _parse_line(self, line):
+        found = []
+        for marker, key in SECTION_MARKERS:
+            if key in self.sections or marker not in line:
+                continue
+            value = line.split(marker, 1)[1].strip()
+            self.sections[key] = value
+            found.append((key, value))
+        return found
+
 
 class OpenAIService:
     """
     Service for interacting with OpenAI API to generate financial insights
     """
     
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, cache_ttl=3600, cache_max_entries=2048, cache_max_bytes=8 * 1024 * 1024,
+                 deadline=None):
         """
         Initialize the OpenAI service with API key
         
         Args:
             api_key (str): OpenAI API key
+            cache_ttl (float, optional): Seconds a cached insight stays valid (0 disables the cache)
+            cache_max_entries (int, optional): Maximum number of cached insights
+            cache_max_bytes (int, optional): Approximate memory cap for cached insights
+            deadline (float, optional): Seconds get_financial_insights_async waits for
+                OpenAI before answering with local insights (None waits indefinitely)
         """
         self.api_key = api_key or os.environ.get('OPENAI_API_KEY')
         openai.api_key = self.api_key
         
-    def get_financial_insights(self, budget, spent, goal, debt, topic):
+        self.insights_cache = None
+        if cache_ttl:
+            self.insights_cache = TTLCache(
+                max_entries=cache_max_entries,
+                ttl=cache_ttl,
+                max_bytes=cache_max_bytes
+            )
+        
+        # Concurrent identical prompts share one in-flight completion
+        self._inflight_async = AsyncSingleFlight()
+        
+        # Answers when OpenAI fails or misses the deadline
+        self.local_insights = LocalInsightsService()
+        self.deadline = deadline
+        self._upgrades = set()
+        self.deadline_misses = 0
+        self.fallbacks = 0
+        
+        # The keep-alive aiohttp session is created on first use inside the event loop
+        self._aiosession = None
+    
+    async def close(self):
+        """
+        Close the aiohttp session used by the async methods
+        """
+        if self._aiosession is not None and not self._aiosession.closed:
+            await self._aiosession.close()
+        self._aiosession = None
+        
+    @metrics.timed('openai.get_financial_insights_async')
+    async def get_financial_insights_async(self, budget, spent, goal, debt, topic, on_settled=None):
         """
         Get financial insights from OpenAI based on user's financial data
         
+        If OpenAI has not answered within the deadline, local insights are
+        returned with "upgrade_pending": True. The completion keeps running
+        and caches its answer, so the next request with the same inputs gets
+        the OpenAI response.
+        
         Args:
             budget (float): User's monthly budget
             spent (float): Amount spent so far
             goal (float): Savings goal
             debt (float): Total debt
             topic (str): Financial topic of interest
+            on_settled (callable, optional): Called once when the OpenAI call this
+                request started or joined has finished, which is after returning
+                when the deadline was missed (right away if no call was made)
             
         Returns:
             dict: Parsed AI response with budget tip, savings tip, explanation, etc.
         """
+        cache_key = None
+        if self.insights_cache is not None:
+            cache_key = self._insights_cache_key(budget, spent, goal, debt, topic)
+            cached = self.insights_cache.get(cache_key)
+            if cached is not None:
+                if on_settled is not None:
+                    on_settled()
+                return dict(cached)
+        
+        completion = None
         try:
-            # Create the prompt for OpenAI
             prompt = self._create_financial_prompt(budget, spent, goal, debt, topic)
             
-            # Call OpenAI API
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are Velora, a smart and friendly AI financial coach for college students."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=500,
-                temperature=0.7,
-                n=1,
-                stop=None
+            completion = asyncio.ensure_future(
+                self._inflight_async.do(prompt, lambda: self._complete_and_cache_async(prompt, cache_key))
             )
+            try:
+                return dict(await asyncio.wait_for(asyncio.shield(completion), self.deadline))
+            except asyncio.TimeoutError:
+                self._keep_upgrade(completion)
+                self.deadline_misses += 1
+                logger.warning("OpenAI missed the %.1fs insights deadline, answering locally", self.deadline)
+                
+                local_response = self.local_insights.get_financial_insights(budget, spent, goal, debt, topic)
+                local_response["upgrade_pending"] = True
+                return local_response
+            
+        except Exception as e:
+            logger.error("Error in get_financial_insights_async: %s", e)
+            return self._default_insights(budget, spent, goal, debt, topic, e)
+        
+        finally:
+            if on_settled is not None:
+                if completion is None:
+                    on_settled()
+                else:
+                    completion.add_done_callback(lambda task: on_settled())
+    
+    async def _complete_and_cache_async(self, prompt, cache_key):
+        """
+        Run the completion and cache a successful result, even when the
+        request that started it has already been answered locally
+        """
+        parsed_response = await self._complete_async(prompt)
+        if cache_key is not None and "error" not in parsed_response:
+            self.insights_cache.set(cache_key, dict(parsed_response))
+        return parsed_response
+    
+    def _keep_upgrade(self, completion):
+        """
+        Hold a reference to a completion that outlived its request until it finishes
+        """
+        self._upgrades.add(completion)
+        
+        def finished(task):
+            self._upgrades.discard(task)
+            if not task.cancelled() and task.exception() is not None:
+                logger.error("Background insights completion failed: %s", task.exception())
+        
+        completion.add_done_callback(finished)
+    
+    @metrics.timed('openai._complete_async')
+    async def _complete_async(self, prompt):
+        """
+        Run a single chat completion for the prompt and parse the result
+        
+        Args:
+            prompt (str): Prompt created by _create_financial_prompt
             
-            # Extract the response text
-            ai_text = response.choices[0].message.content.strip()
+        Returns:
+            dict: Parsed AI response
+        """
+        params, prompt_tokens = self._completion_params(prompt)
+        
+        # Wait for a free slot under the process-wide concurrency cap
+        async with async_llm_limiter:
+            with metrics.span('openai.chat_completion'):
+                openai.aiosession.set(self._get_aiosession())
+                response = await openai.ChatCompletion.acreate(**params)
+        
+        ai_text = response.choices[0].message.content.strip()
+        self._record_usage(params, prompt_tokens, response.get('usage'), ai_text,
+                           response.choices[0].get('finish_reason'))
+        return self._parse_ai_response(ai_text)
+    
+    async def stream_financial_insights_async(self, budget, spent, goal, debt, topic):
+        """
+        Stream financial insights from OpenAI, yielding each section as soon
+        as it has been generated
+        
+        Args:
+            budget (float): User's monthly budget
+            spent (float): Amount spent so far
+            goal (float): Savings goal
+            debt (float): Total debt
+            topic (str): Financial topic of interest
             
-            # Try to parse the response into structured format
-            parsed_response = self._parse_ai_response(ai_text)
+        Yields:
+            tuple: (event, payload) where event is 'section' ({"key", "value"}),
+                'done' (full parsed response) or 'error' (default response)
+        """
+        cache_key = None
+        if self.insights_cache is not None:
+            cache_key = self._insights_cache_key(budget, spent, goal, debt, topic)
+            cached = self.insights_cache.get(cache_key)
+            if cached is not None:
+                for event in self._cached_events(cached):
+                    yield event
+                return
+        
+        try:
+            prompt = self._create_financial_prompt(budget, spent, goal, debt, topic)
             
-            return parsed_response
+            parser = InsightsStreamParser()
+            params, prompt_tokens = self._completion_params(prompt, stream=True)
+            finish_reason = None
+            
+            # Hold a concurrency slot for the lifetime of the stream
+            async with async_llm_limiter:
+                with metrics.span('openai.chat_completion_stream'):
+                    openai.aiosession.set(self._get_aiosession())
+                    response = await openai.ChatCompletion.acreate(**params)
+                    
+                    async for chunk in response:
+                        finish_reason = chunk["choices"][0].get("finish_reason") or finish_reason
+                        content = chunk["choices"][0]["delta"].get("content")
+                        if not content:
+                            continue
+                        for key, value in parser.feed(content):
+                            yield "section", {"key": key, "value": value}
+            
+            self._record_usage(params, prompt_tokens, None, parser.text, finish_reason)
+            for event in self._finish_stream(parser, cache_key):
+                yield event
             
         except Exception as e:
-            print(f"Error in get_financial_insights: {e}")
-            # In case of error, return a default response
-            return {
-                "error": str(e),
-                "budget_tip": "We're having trouble generating personalized advice right now. Try again later.",
-                "savings_tip": "Consider setting aside a small amount each week for emergencies.",
-                "explanation": f"We couldn't provide a specific explanation for '{topic}' at this time.",
-                "scholarship_suggestion": None,
-                "earn_extra_suggestion": None,
-                "raw_response": None
+            logger.error("Error in stream_financial_insights_async: %s", e)
+            yield "error", self._default_insights(budget, spent, goal, debt, topic, e)
+    
+    def _get_aiosession(self):
+        """
+        Get the keep-alive aiohttp session, creating it inside the running loop
+        """
+        if self._aiosession is None or self._aiosession.closed:
+            import aiohttp
+            self._aiosession = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=async_llm_limiter.limit)
+            )
+        return self._aiosession
+    
+    def _completion_params(self, prompt, stream=False):
+        """
+        Build the chat completion arguments shared by every call path
+        
+        Returns:
+            tuple: (params, prompt token count)
+        """
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+        prompt_tokens = count_message_tokens(messages)
+        params = {
+            "model": "gpt-3.5-turbo",
+            "messages": messages,
+            "max_tokens": max(1, min(INSIGHTS_PROMPT.max_tokens(), MODEL_CONTEXT_TOKENS - prompt_tokens)),
+            "temperature": 0.7,
+            "n": 1,
+            "stop": None
+        }
+        if stream:
+            params["stream"] = True
+        return params, prompt_tokens
+    
+    def _record_usage(self, params, prompt_tokens, usage, ai_text, finish_reason):
+        """
+        Log and export the token counts of a completion and feed its length
+        back into the template's max_tokens budget
+        
+        Args:
+            params (dict): Arguments the completion was created with
+            prompt_tokens (int): Locally counted prompt tokens
+            usage (dict): Usage reported by the API (None for streams)
+            ai_text (str): Generated text
+            finish_reason (str): 'length' when max_tokens cut the answer off
+        """
+        if usage:
+            prompt_tokens = usage.get('prompt_tokens', prompt_tokens)
+            completion_tokens = usage.get('completion_tokens', 0)
+        else:
+            completion_tokens = count_tokens(ai_text)
+        
+        truncated = finish_reason == 'length'
+        INSIGHTS_PROMPT.record_completion(completion_tokens, truncated=truncated)
+        openai_tokens.inc('prompt', amount=prompt_tokens)
+        openai_tokens.inc('completion', amount=completion_tokens)
+        
+        logger.info(
+            "OpenAI completion used %d prompt + %d completion tokens (max_tokens %d)",
+            prompt_tokens, completion_tokens, params["max_tokens"],
+            extra={
+                "template": INSIGHTS_PROMPT.name,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "max_tokens": params["max_tokens"],
+                "truncated": truncated,
+                "stream": params.get("stream", False)
             }
+        )
+    
+    def _cached_events(self, cached):
+        """
+        Replay a cached response as stream events
+        """
+        for _, key in SECTION_MARKERS:
+            if cached.get(key):
+                yield "section", {"key": key, "value": cached[key]}
+        yield "done", dict(cached)
+    
+    def _finish_stream(self, parser, cache_key):
+        """
+        Flush the stream parser, emit sections only the unformatted-response
+        fallback recovered, cache the result and emit 'done'
+        """
+        for key, value in parser.close():
+            yield "section", {"key": key, "value": value}
+        
+        parsed_response = self._parse_ai_response(parser.text.strip())
+        
+        for _, key in SECTION_MARKERS:
+            if key not in parser.sections and parsed_response.get(key):
+                yield "section", {"key": key, "value": parsed_response[key]}
+        
+        if cache_key is not None and "error" not in parsed_response:
+            self.insights_cache.set(cache_key, dict(parsed_response))
+        
+        yield "done", parsed_response
+    
+    def _default_insights(self, budget, spent, goal, debt, topic, error):
+        """
+        Build the response returned when OpenAI fails: local insights plus
+        the error (which also keeps it out of the cache)
+        """
+        self.fallbacks += 1
+        response = self.local_insights.get_financial_insights(budget, spent, goal, debt, topic)
+        response["error"] = str(error)
+        return response
+    
+    def get_cache_stats(self):
+        """
+        Get insights cache statistics
+        
+        Returns:
+            dict: Hit/miss counters and cache size (empty if caching is disabled)
+        """
+        if self.insights_cache is None:
+            return {}
+        return self.insights_cache.get_stats()
+    
+    def get_concurrency_stats(self):
+        """
+        Get outbound call concurrency statistics
+        
+        Returns:
+            dict: Limiter queue depth/wait times and single-flight coalescing
+                counters, plus deadline misses and local fallbacks
+        """
+        return {
+            "async_limiter": async_llm_limiter.get_stats(),
+            "async_single_flight": self._inflight_async.get_stats(),
+            "deadline": {
+                "seconds": self.deadline,
+                "misses": self.deadline_misses,
+                "pending_upgrades": len(self._upgrades),
+                "fallbacks": self.fallbacks
+            }
+        }
+    
+    def get_prompt_stats(self):
+        """
+        Get insights prompt statistics
+        
+        Returns:
+            dict: Static prompt tokens, current max_tokens and completion length history
+        """
+        return INSIGHTS_PROMPT.get_stats()
+    
+    def _insights_cache_key(self, budget, spent, goal, debt, topic):
+        """
+        Build a cache key from bucketed financial inputs and a normalized topic
+        
+        Args:
+            budget (float): User's monthly budget
+            spent (float): Amount spent so far
+            goal (float): Savings goal
+            debt (float): Total debt
+            topic (str): Financial topic of interest
+            
+        Returns:
+            tuple: Hashable cache key
+        """
+        values = {"budget": budget, "spent": spent, "goal": goal, "debt": debt}
+        buckets = []
+        for field, width in INSIGHTS_CACHE_BUCKETS.items():
+            try:
+                amount = float(values[field] or 0)
+            except (ValueError, TypeError):
+                amount = 0.0
+            buckets.append(int(round(amount / width)))
+        
+        return tuple(buckets) + (self._normalize_topic(topic),)
+    
+    def _normalize_topic(self, topic):
+        """
+        Normalize a topic string for cache lookups (case, punctuation, whitespace)
+        """
+        topic = re.sub(r'[^a-z0-9 ]+', ' ', str(topic or '').lower())
+        return ' '.join(topic.split())
     
     def _create_financial_prompt(self, budget, spent, goal, debt, topic):
         """
@@ -83,32 +534,7 @@ class OpenAIService:
         Returns:
             str: Formatted prompt for OpenAI
         """
-        return f"""
-You are Velora, a smart and friendly AI financial coach for college students.
-
-The student has:
-- Monthly Budget: ${budget}
-- Spent this month: ${spent}
-- Savings Goal: ${goal}
-- Debt Level: ${debt} (loans or credit card)
-- Interest Topic: {topic}
-
-Give them:
-1. A simple budgeting tip for this week.
-2. A small way to save (realistic).
-3. A short explanation of {topic} (1–2 sentences).
-4. One scholarship they should look into based on need.
-5. One way to earn a little extra money this week (e.g., online tutoring, surveys, reselling books).
-
-Format your response in this structure to make it easier to parse:
-BUDGET_TIP: [Your budget tip here]
-SAVINGS_TIP: [Your savings tip here]
-EXPLANATION: [Your explanation here]
-SCHOLARSHIP: [Your scholarship suggestion here]
-EARN_EXTRA: [Your extra earning suggestion here]
-
-Be casual, supportive, and practical. Avoid pressure. Use clear, student-friendly language.
-"""
+        return INSIGHTS_PROMPT.render(budget=budget, spent=spent, goal=goal, debt=debt, topic=topic)
     
     def _parse_ai_response(self, ai_text):
         """
@@ -131,26 +557,11 @@ Be casual, supportive, and practical. Avoid pressure. Use clear, student-friendl
                 "raw_response": ai_text
             }
             
-            # Extract sections using the formatted markers
-            if "BUDGET_TIP:" in ai_text:
-                budget_split = ai_text.split("BUDGET_TIP:")[1].split("\n")[0].strip()
-                parsed["budget_tip"] = budget_split
-                
-            if "SAVINGS_TIP:" in ai_text:
-                savings_split = ai_text.split("SAVINGS_TIP:")[1].split("\n")[0].strip()
-                parsed["savings_tip"] = savings_split
-                
-            if "EXPLANATION:" in ai_text:
-                explanation_split = ai_text.split("EXPLANATION:")[1].split("\n")[0].strip()
-                parsed["explanation"] = explanation_split
-                
-            if "SCHOLARSHIP:" in ai_text:
-                scholarship_split = ai_text.split("SCHOLARSHIP:")[1].split("\n")[0].strip()
-                parsed["scholarship_suggestion"] = scholarship_split
-                
-            if "EARN_EXTRA:" in ai_text:
-                earn_split = ai_text.split("EARN_EXTRA:")[1].split("\n")[0].strip()
-                parsed["earn_extra_suggestion"] = earn_split
+            # Extract sections using the formatted markers in a single pass
+            parser = InsightsStreamParser()
+            parser.feed(ai_text)
+            parser.close()
+            parsed.update(parser.sections)
             
             # If parsing fails, initialize with default values and include raw text
             if all(value is None for key, value in parsed.items() if key != "raw_response"):
@@ -167,7 +578,7 @@ Be casual, supportive, and practical. Avoid pressure. Use clear, student-friendl
             return parsed
             
         except Exception as e:
-            print(f"Error parsing AI response: {e}")
+            logger.error("Error parsing AI response: %s", e)
             return {
                 "error": str(e),
                 "budget_tip": "Try to stay within your budget by tracking expenses.",
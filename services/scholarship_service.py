@@ -0,0 +1,283 @@
+import re
+import json
+import math
+import time
+import bisect
+import sqlite3
+from datetime import date
+
+import numpy as np
+
+# Need levels in increasing order; a student qualifies for every level up to their own
+NEED_LEVELS = ("none", "low", "medium", "high")
+
+SORT_ORDERS = ("relevance", "amount", "deadline")
+
+# Posting key for scholarships open to every major / state
+ANY = "*"
+
+# Most vocabulary terms a prefix query token expands to
+MAX_PREFIX_EXPANSION = 50
+
+_EMPTY = np.zeros(0, dtype=np.int32)
+_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def _tokenize(text):
+    return _TOKEN_PATTERN.findall(str(text or '').lower())
+
+
+def _parse_date(value, name):
+    try:
+        return date.fromisoformat(value)
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid {name}. Use ISO format (YYYY-MM-DD)")
+
+
+class ScholarshipService:
+    """
+    Read-only scholarship catalog with in-memory indexes
+
+    Scholarships are numbered in deadline order, so a deadline range is a
+    contiguous slice. Eligibility attributes (need level, major, state,
+    category) and text tokens map to sorted arrays of scholarship numbers;
+    a search ANDs boolean masks built from them.
+    """
+
+    def __init__(self, path):
+        """
+        Load the catalog and build its indexes
+
+        Args:
+            path (str): JSON file (a list of scholarships) or SQLite database
+                with a `scholarships` table
+        """
+        self.path = path
+        start = time.perf_counter()
+
+        rows = self._load(path)
+        rows.sort(key=lambda row: (row["deadline"] or "9999-12-31", row["id"]))
+        self._records = rows
+        self._deadlines = np.array(
+            [date.fromisoformat(row["deadline"]).toordinal() if row["deadline"] else date.max.toordinal()
+             for row in rows],
+            dtype=np.int64
+        )
+        self._amounts = np.array([row["amount"] for row in rows], dtype=np.float64)
+
+        postings = {"need_level": {}, "major": {}, "state": {}, "category": {}}
+        tokens = {}
+        name_tokens = {}
+        for number, row in enumerate(rows):
+            postings["need_level"].setdefault(row["need_level"], []).append(number)
+            postings["category"].setdefault(row["category"].lower(), []).append(number)
+            for major in row["majors"] or [ANY]:
+                postings["major"].setdefault(major.lower(), []).append(number)
+            for state in row["states"] or [ANY]:
+                postings["state"].setdefault(state.upper() if state != ANY else ANY, []).append(number)
+
+            text = " ".join([row["name"], row["eligibility"], row["category"]] + row["majors"])
+            for token in set(_tokenize(text)):
+                tokens.setdefault(token, []).append(number)
+            for token in set(_tokenize(row["name"])):
+                name_tokens.setdefault(token, []).append(number)
+
+        self._postings = {
+            field: {value: np.array(numbers, dtype=np.int32) for value, numbers in values.items()}
+            for field, values in postings.items()
+        }
+        self._tokens = {token: np.array(numbers, dtype=np.int32) for token, numbers in tokens.items()}
+        self._name_tokens = {token: np.array(numbers, dtype=np.int32) for token, numbers in name_tokens.items()}
+        self._vocabulary = sorted(self._tokens)
+
+        self.load_seconds = time.perf_counter() - start
+        self.searches = 0
+
+    def _load(self, path):
+        """
+        Read scholarships from JSON or SQLite into normalized dicts
+        """
+        if path.endswith('.json'):
+            with open(path) as f:
+                raw = json.load(f)
+        else:
+            connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            connection.row_factory = sqlite3.Row
+            try:
+                raw = [dict(row) for row in connection.execute("SELECT * FROM scholarships")]
+            finally:
+                connection.close()
+
+        rows = []
+        for item in raw:
+            need_level = (item.get("need_level") or "none").lower()
+            rows.append({
+                "id": str(item["id"]),
+                "name": item["name"],
+                "amount": float(item.get("amount") or 0),
+                "deadline": item.get("deadline") or None,
+                "eligibility": item.get("eligibility") or "",
+                "category": item.get("category") or "",
+                "need_level": need_level if need_level in NEED_LEVELS else "none",
+                "majors": self._as_list(item.get("majors")),
+                "states": self._as_list(item.get("states")),
+                "link": item.get("link")
+            })
+        return rows
+
+    def _as_list(self, value):
+        # SQLite stores list columns as comma-separated text
+        if isinstance(value, str):
+            value = value.split(',')
+        return [entry.strip() for entry in value or [] if entry and entry.strip()]
+
+    def search(self, query=None, need=None, major=None, state=None, category=None,
+               deadline_after=None, deadline_before=None, min_amount=None,
+               sort="relevance", limit=20, offset=0):
+        """
+        Find scholarships matching the filters
+
+        Args:
+            query (str, optional): Words that must all appear in the name,
+                eligibility, category or majors; the last word matches as a prefix
+            need (str, optional): Student's need level; matches scholarships that
+                require that level or less
+            major (str, optional): Student's major; matches scholarships for that
+                major or open to all majors
+            state (str, optional): Two-letter state code; matches scholarships for
+                that state or open to all states
+            category (str, optional): Exact category (e.g. "Need-based")
+            deadline_after (str, optional): Earliest deadline, ISO date (defaults to today)
+            deadline_before (str, optional): Latest deadline, ISO date
+            min_amount (float, optional): Smallest award amount
+            sort (str, optional): "relevance" (query matches in the name first,
+                then amount), "amount" or "deadline"
+            limit (int, optional): Page size
+            offset (int, optional): Results to skip
+
+        Returns:
+            dict: {"scholarships": page, "total": match count, "next_offset": offset
+                of the next page or None}
+
+        Raises:
+            ValueError: If a filter value is invalid
+        """
+        if need is not None and need not in NEED_LEVELS:
+            raise ValueError(f"need must be one of {', '.join(NEED_LEVELS)}")
+        if sort not in SORT_ORDERS:
+            raise ValueError(f"sort must be one of {', '.join(SORT_ORDERS)}")
+        if min_amount is not None and not math.isfinite(min_amount):
+            raise ValueError("min_amount must be a finite number")
+        self.searches += 1
+
+        # Deadline range: scholarships are numbered in deadline order
+        after = _parse_date(deadline_after, "deadline_after") if deadline_after else date.today()
+        low = int(np.searchsorted(self._deadlines, after.toordinal(), side='left'))
+        high = len(self._records)
+        if deadline_before:
+            before = _parse_date(deadline_before, "deadline_before")
+            high = int(np.searchsorted(self._deadlines, before.toordinal(), side='right'))
+
+        mask = np.zeros(len(self._records), dtype=bool)
+        mask[low:high] = True
+
+        if need is not None:
+            mask &= self._any_of("need_level", NEED_LEVELS[:NEED_LEVELS.index(need) + 1])
+        if major:
+            mask &= self._any_of("major", (major.lower(), ANY))
+        if state:
+            mask &= self._any_of("state", (state.upper(), ANY))
+        if category:
+            mask &= self._any_of("category", (category.lower(),))
+        if min_amount is not None:
+            mask &= self._amounts >= min_amount
+
+        scores = None
+        words = _tokenize(query)
+        if words:
+            scores = np.zeros(len(self._records), dtype=np.int32)
+            for position, word in enumerate(words):
+                prefix = position == len(words) - 1
+                word_mask = self._match_word(word, prefix)
+                mask &= word_mask
+                # A word in the name counts double
+                scores += word_mask
+                scores += self._match_word(word, prefix, names=True)
+
+        candidates = np.flatnonzero(mask)
+        page = self._rank(candidates, scores, sort, offset + limit)[offset:offset + limit]
+        end = offset + len(page)
+
+        return {
+            "scholarships": [self._records[number] for number in page],
+            "total": int(len(candidates)),
+            "next_offset": end if end < len(candidates) else None
+        }
+
+    def _any_of(self, field, values):
+        """
+        Boolean mask of scholarships whose field has any of the values
+        """
+        mask = np.zeros(len(self._records), dtype=bool)
+        for value in values:
+            mask[self._postings[field].get(value, _EMPTY)] = True
+        return mask
+
+    def _match_word(self, word, prefix, names=False):
+        """
+        Boolean mask of scholarships containing a word (or, for prefix, any
+        word starting with it)
+        """
+        index = self._name_tokens if names else self._tokens
+        if prefix:
+            start = bisect.bisect_left(self._vocabulary, word)
+            tokens = []
+            for token in self._vocabulary[start:start + MAX_PREFIX_EXPANSION]:
+                if not token.startswith(word):
+                    break
+                tokens.append(token)
+        else:
+            tokens = [word]
+
+        mask = np.zeros(len(self._records), dtype=bool)
+        for token in tokens:
+            mask[index.get(token, _EMPTY)] = True
+        return mask
+
+    def _rank(self, candidates, scores, sort, count):
+        """
+        Order candidates and return at least the first count of them
+        """
+        if sort == "deadline" or len(candidates) == 0:
+            return candidates
+
+        amounts = self._amounts[candidates]
+        if sort == "relevance" and scores is not None:
+            key = scores[candidates] * 1e12 + amounts
+        else:
+            key = amounts
+
+        # Only the requested prefix needs to be ordered. Keys tied at the cut
+        # are taken in deadline order, so every page size agrees on the order
+        if count < len(candidates):
+            cut = -np.partition(-key, count - 1)[count - 1]
+            above = np.flatnonzero(key > cut)
+            top = np.concatenate((above, np.flatnonzero(key == cut)[:count - len(above)]))
+        else:
+            top = np.arange(len(candidates))
+        # Ties keep deadline order (candidates are in deadline order)
+        return candidates[top[np.lexsort((top, -key[top]))]]
+
+    def get_stats(self):
+        """
+        Get catalog statistics
+
+        Returns:
+            dict: Scholarship and token counts, load time and searches served
+        """
+        return {
+            "scholarships": len(self._records),
+            "tokens": len(self._vocabulary),
+            "load_seconds": self.load_seconds,
+            "searches": self.searches
+        }
@@ -0,0 +1,277 @@
+import time
+import queue
+import asyncio
+import atexit
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindQueue:
+    """
+    In-process write-behind queue that groups non-critical Firestore writes
+    into batch commits on a background thread
+    """
+
+    # Firestore allows at most 500 writes per batch
+    MAX_BATCH_SIZE = 500
+
+    def __init__(self, db, max_batch_size=500, flush_interval=1.0, max_retries=5, max_queue_size=100000):
+        """
+        Initialize the write-behind queue
+
+        Args:
+            db (firestore.Client): Firestore database client
+            max_batch_size (int, optional): Maximum writes per batch commit
+            flush_interval (float, optional): Seconds to wait for more writes before committing
+            max_retries (int, optional): Commit attempts before a batch is dropped
+            max_queue_size (int, optional): Pending writes before enqueue falls back to a direct write
+        """
+        self.db = db
+        self.max_batch_size = min(max_batch_size, self.MAX_BATCH_SIZE)
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self.enqueued = 0
+        self.written = 0
+        self.failed = 0
+        self.commits = 0
+        self.total_flush_latency = 0.0
+        self.last_flush_latency = 0.0
+
+    def start(self):
+        """
+        Start the background flusher and flush remaining writes on shutdown
+        """
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='firestore-write-behind', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self, timeout=10):
+        """
+        Stop the flusher after draining pending writes
+
+        Args:
+            timeout (float, optional): Seconds to wait for the drain
+        """
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def enqueue(self, doc_ref, data, merge=False):
+        """
+        Queue a document write
+
+        Args:
+            doc_ref (firestore.DocumentReference): Document to write
+            data (dict): Document data
+            merge (bool, optional): Merge into an existing document
+        """
+        try:
+            self._queue.put_nowait((doc_ref, data, merge))
+            with self._lock:
+                self.enqueued += 1
+        except queue.Full:
+            # Apply backpressure by writing on the caller's thread
+            logger.warning("Write-behind queue is full, writing directly")
+            doc_ref.set(data, merge=merge)
+
+    def flush(self, timeout=None):
+        """
+        Block until every queued write has been committed or dropped
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait
+
+        Returns:
+            bool: True if the queue drained in time
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def get_stats(self):
+        """
+        Get queue statistics
+
+        Returns:
+            dict: Queue depth, write counters and flush latency (seconds)
+        """
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "failed": self.failed,
+                "commits": self.commits,
+                "last_flush_latency": self.last_flush_latency,
+                "avg_flush_latency": self.total_flush_latency / self.commits if self.commits else 0.0
+            }
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self._stop_event.is_set():
+                    return
+                continue
+
+            writes = self._next_writes(first)
+            self._commit(writes)
+            for _ in writes:
+                self._queue.task_done()
+
+    def _commit(self, writes):
+        """
+        Commit a group of writes, retrying with exponential backoff
+        """
+        for attempt in range(self.max_retries):
+            start = time.perf_counter()
+            try:
+                batch = self.db.batch()
+                for doc_ref, data, merge in writes:
+                    batch.set(doc_ref, data, merge=merge)
+                batch.commit()
+                self._record_commit(len(writes), time.perf_counter() - start)
+                return
+            except Exception as e:
+                logger.error("Error committing write-behind batch (attempt %s): %s", attempt + 1, e)
+                time.sleep(self._backoff(attempt))
+
+        self._record_failure(len(writes))
+
+    def _next_writes(self, first):
+        # Group whatever else is already queued into the same batch
+        writes = [first]
+        while len(writes) < self.max_batch_size:
+            try:
+                writes.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return writes
+
+    def _backoff(self, attempt):
+        return min(2 ** attempt * 0.1, 5)
+
+    def _record_commit(self, count, latency):
+        with self._lock:
+            self.written += count
+            self.commits += 1
+            self.last_flush_latency = latency
+            self.total_flush_latency += latency
+
+    def _record_failure(self, count):
+        with self._lock:
+            self.failed += count
+
+
+class AsyncWriteBehindQueue(WriteBehindQueue):
+    """
+    WriteBehindQueue for the Firestore AsyncClient: a task on the event loop
+    commits queued writes, grouping writes that arrive while a commit is in
+    flight into the next batch. Same bound, retries and statistics; a full
+    queue makes the caller await a direct write instead.
+    """
+
+    def __init__(self, db, max_batch_size=500, max_retries=5, max_queue_size=100000):
+        """
+        Initialize the async write-behind queue
+
+        Args:
+            db (firestore.AsyncClient): Async Firestore database client
+            max_batch_size (int, optional): Maximum writes per batch commit
+            max_retries (int, optional): Commit attempts before a batch is dropped
+            max_queue_size (int, optional): Pending writes before enqueue falls back to a direct write
+        """
+        super().__init__(db, max_batch_size=max_batch_size, flush_interval=0,
+                         max_retries=max_retries, max_queue_size=max_queue_size)
+        self._flusher = None
+
+    def start(self):
+        # The flusher task is started by the first enqueue, on the serving loop
+        pass
+
+    async def stop(self, timeout=10):
+        """
+        Wait for queued writes to be committed
+
+        Args:
+            timeout (float, optional): Seconds to wait for the drain
+        """
+        if self._flusher and not self._flusher.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(self._flusher), timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Timed out draining %s queued writes", self._queue.qsize())
+
+    async def enqueue(self, doc_ref, data, merge=False):
+        """
+        Queue a document write (call from the event loop)
+
+        Args:
+            doc_ref (firestore.AsyncDocumentReference): Document to write
+            data (dict): Document data
+            merge (bool, optional): Merge into an existing document
+        """
+        try:
+            self._queue.put_nowait((doc_ref, data, merge))
+        except queue.Full:
+            # Apply backpressure by making the caller wait for its own write
+            logger.warning("Write-behind queue is full, writing directly")
+            await doc_ref.set(data, merge=merge)
+            return
+
+        with self._lock:
+            self.enqueued += 1
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._run())
+
+    def flush(self, timeout=None):
+        raise NotImplementedError("await stop() to drain an AsyncWriteBehindQueue")
+
+    async def _run(self):
+        while True:
+            try:
+                first = self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+            writes = self._next_writes(first)
+            await self._commit(writes)
+            for _ in writes:
+                self._queue.task_done()
+
+    async def _commit(self, writes):
+        """
+        Commit a group of writes, retrying with exponential backoff
+        """
+        for attempt in range(self.max_retries):
+            start = time.perf_counter()
+            try:
+                batch = self.db.batch()
+                for doc_ref, data, merge in writes:
+                    batch.set(doc_ref, data, merge=merge)
+                await batch.commit()
+                self._record_commit(len(writes), time.perf_counter() - start)
+                return
+            except Exception as e:
+                logger.error("Error committing write-behind batch (attempt %s): %s", attempt + 1, e)
+                await asyncio.sleep(self._backoff(attempt))
+
+        self._record_failure(len(writes))
@@ -49,11 +49,18 @@ const AiTips = () => {
         topic: topic
       };
       
-      const response = await api.getFinancialInsights(userData);
+      // Show each tip as soon as its section has been generated
+      const insights = await api.streamFinancialInsights(userData, (key, value) => {
+        setAiResponse((previous) => ({
+          ...previous,
+          [key]: value,
+          timestamp: new Date().toISOString()
+        }));
+      });
       
-      if (response && response.insights) {
+      if (insights) {
         setAiResponse({
-          ...response.insights,
+          ...insights,
           timestamp: new Date().toISOString()
         });
       }
@@ -0,0 +1,74 @@
+"""
+Builds the API routes on a bare Quart app with stand-in services, so
+endpoint tests run without Firebase, OpenAI or the lazy warm-up.
+"""
+import asyncio
+
+from quart import Quart
+
+from app.routes import register_routes
+from config.settings import TestingConfig
+
+UID = 'user-1'
+AUTH = {'Authorization': 'Bearer test-token'}
+LOOPBACK = {'client': ('127.0.0.1', 50000)}
+
+
+class FakeAuth:
+    """
+    Accepts any bearer token as UID
+    """
+
+    def get_cached_claims(self, id_token):
+        return {'uid': UID}
+
+
+class FakeFirebase:
+    """
+    Records queued and batch-saved AI tips
+    """
+
+    def __init__(self):
+        self.tips = []
+
+    async def queue_ai_tip(self, uid, tip_data):
+        self.tips.append((uid, tip_data))
+
+    async def save_ai_tips_batch(self, uid, tips):
+        self.tips.extend((uid, tip_data) for tip_data in tips)
+        return [f'tip-{index}' for index in range(len(tips))]
+
+    def get_write_queue_stats(self):
+        return {}
+
+
+def make_app(settings=TestingConfig, **services):
+    """
+    Register the routes with the given services; the rest are plain objects
+
+    Returns:
+        Quart: Application with the API routes
+    """
+    app = Quart(__name__)
+    app.config.from_object(settings)
+    services.setdefault('auth_service', FakeAuth())
+    services.setdefault('firebase_service', FakeFirebase())
+    for name in ('encryption_service', 'openai_service', 'analytics_service',
+                 'scholarship_service', 'debt_service'):
+        services.setdefault(name, object())
+    register_routes(app, **services)
+    return app
+
+
+def call(app, method, path, **kwargs):
+    """
+    Send one request from loopback
+
+    Returns:
+        tuple: (status code, response body text, headers)
+    """
+    async def send():
+        client = app.test_client()
+        response = await client.open(path, method=method, scope_base=LOOPBACK, **kwargs)
+        return response.status_code, (await response.get_data()).decode(), response.headers
+    return asyncio.run(send())
@@ -0,0 +1,316 @@
+"""
+In-memory stand-in for the parts of the synchronous Firestore client the
+services use: documents and subcollections, merge writes with Increment and
+SERVER_TIMESTAMP, batches, and ordered/filtered/paginated queries.
+Documents carry an update time so conditional writes (write_option) can
+fail with FailedPrecondition. FakeAsyncFirestore exposes the same store
+through the AsyncClient surface.
+"""
+import itertools
+from datetime import datetime, timezone
+
+from google.api_core import exceptions as google_exceptions
+from google.cloud.firestore_v1.transforms import Increment, Sentinel
+from google.cloud.firestore_v1.field_path import FieldPath
+
+DOCUMENT_ID = FieldPath.document_id()
+
+_auto_ids = itertools.count()
+
+
+def _stored(value):
+    # Firestore keeps timestamps in UTC and hands back aware datetimes
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+    if isinstance(value, dict):
+        return {key: _stored(item) for key, item in value.items()}
+    return value
+
+
+def _merge(current, updates):
+    merged = dict(current)
+    for key, value in updates.items():
+        if isinstance(value, Increment):
+            merged[key] = merged.get(key, 0) + value.value
+        elif isinstance(value, Sentinel):
+            merged[key] = datetime.now(timezone.utc)
+        elif isinstance(value, dict):
+            merged[key] = _merge(merged.get(key) or {}, value)
+        else:
+            merged[key] = _stored(value)
+    return merged
+
+
+class FakeSnapshot:
+    def __init__(self, doc_id, data, update_time=None):
+        self.id = doc_id
+        self._data = data
+        self.exists = data is not None
+        self.update_time = update_time
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDocument:
+    def __init__(self, db, path):
+        self._db = db
+        self.path = path
+        self.id = path.rsplit('/', 1)[-1]
+
+    def collection(self, name):
+        return FakeCollection(self._db, f"{self.path}/{name}")
+
+    def set(self, data, merge=False):
+        self._db._set(self.path, data, merge)
+
+    def update(self, data, option=None):
+        self._db._check(self.path, option or FakeWriteOption(exists=True))
+        self._db._set(self.path, data, True)
+
+    def get(self):
+        return FakeSnapshot(self.id, self._db.docs.get(self.path), self._db.update_times.get(self.path))
+
+    def delete(self):
+        self._db.docs.pop(self.path, None)
+        self._db.update_times.pop(self.path, None)
+
+
+class FakeQuery:
+    def __init__(self, db, path, filters=(), orders=(), cursor=None, count=None, fields=None):
+        self._db = db
+        self._path = path
+        self._filters = filters
+        self._orders = orders
+        self._cursor = cursor
+        self._count = count
+        self._fields = fields
+
+    def _copy(self, **changes):
+        state = dict(filters=self._filters, orders=self._orders, cursor=self._cursor,
+                     count=self._count, fields=self._fields)
+        state.update(changes)
+        return FakeQuery(self._db, self._path, **state)
+
+    def where(self, field, op, value):
+        return self._copy(filters=self._filters + ((field, op, _stored(value)),))
+
+    def order_by(self, field, direction='ASCENDING'):
+        return self._copy(orders=self._orders + ((field, direction),))
+
+    def start_after(self, values):
+        return self._copy(cursor=values)
+
+    def limit(self, count):
+        return self._copy(count=count)
+
+    def select(self, fields):
+        return self._copy(fields=list(fields))
+
+    def stream(self):
+        prefix = self._path + '/'
+        rows = [
+            (path[len(prefix):], data) for path, data in self._db.docs.items()
+            if path.startswith(prefix) and '/' not in path[len(prefix):]
+        ]
+        rows = [row for row in rows if all(self._matches(row, f) for f in self._filters)]
+
+        # Stable sorts, least significant order first
+        for field, direction in reversed(self._orders):
+            rows.sort(key=lambda row: self._value(row, field), reverse=direction == 'DESCENDING')
+
+        if self._cursor is not None:
+            cursor = tuple(
+                value.id if field == DOCUMENT_ID else _stored(value)
+                for field, value in ((field, self._cursor[field]) for field, _ in self._orders)
+            )
+            rows = [row for row in rows if self._after(row, cursor)]
+
+        if self._count is not None:
+            rows = rows[:self._count]
+
+        for doc_id, data in rows:
+            if self._fields is not None:
+                data = {field: data[field] for field in self._fields if field in data}
+            yield FakeSnapshot(doc_id, data, self._db.update_times.get(prefix + doc_id))
+
+    def _value(self, row, field):
+        doc_id, data = row
+        return doc_id if field == DOCUMENT_ID else data.get(field)
+
+    def _matches(self, row, condition):
+        field, op, value = condition
+        actual = self._value(row, field)
+        if actual is None:
+            return False
+        return {
+            '==': actual == value,
+            '>=': actual >= value if type(actual) is type(value) else False,
+            '<=': actual <= value if type(actual) is type(value) else False,
+        }[op]
+
+    def _after(self, row, cursor):
+        for (field, direction), bound in zip(self._orders, cursor):
+            value = self._value(row, field)
+            if value == bound:
+                continue
+            return value < bound if direction == 'DESCENDING' else value > bound
+        return False
+
+
+class FakeCollection(FakeQuery):
+    def __init__(self, db, path):
+        super().__init__(db, path)
+
+    def document(self, doc_id=None):
+        return FakeDocument(self._db, f"{self._path}/{doc_id or f'auto{next(_auto_ids):06d}'}")
+
+    def list_documents(self):
+        prefix = self._path + '/'
+        return [
+            FakeDocument(self._db, path) for path in list(self._db.docs)
+            if path.startswith(prefix) and '/' not in path[len(prefix):]
+        ]
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self._db = db
+        self._writes = []
+
+    def set(self, doc_ref, data, merge=False):
+        self._writes.append((doc_ref.path, data, merge, None))
+
+    def update(self, doc_ref, data, option=None):
+        self._writes.append((doc_ref.path, data, True, option or FakeWriteOption(exists=True)))
+
+    def delete(self, doc_ref):
+        self._writes.append((doc_ref.path, None, False, None))
+
+    def commit(self):
+        assert len(self._writes) <= 500, "Firestore batches hold at most 500 writes"
+        if self._db.fail_after_commits is not None and self._db.commits >= self._db.fail_after_commits:
+            raise RuntimeError("commit failed")
+        # Preconditions are checked before anything is applied (batches are atomic)
+        for path, _, _, option in self._writes:
+            self._db._check(path, option)
+        self._db.commits += 1
+        for path, data, merge, _ in self._writes:
+            if data is None:
+                self._db.docs.pop(path, None)
+                self._db.update_times.pop(path, None)
+            else:
+                self._db._set(path, data, merge)
+
+
+class FakeWriteOption:
+    def __init__(self, last_update_time=None, exists=None):
+        self.last_update_time = last_update_time
+        self.exists = exists
+
+
+class FakeFirestore:
+    def __init__(self):
+        # document path -> data
+        self.docs = {}
+        # document path -> update time (a counter, bumped by every write)
+        self.update_times = {}
+        self._clock = itertools.count(1)
+        self.commits = 0
+        # Batch commits that succeed before every further commit raises (None: never fail)
+        self.fail_after_commits = None
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def write_option(self, last_update_time=None, exists=None):
+        return FakeWriteOption(last_update_time, exists)
+
+    def get_all(self, doc_refs, field_paths=None):
+        for doc_ref in doc_refs:
+            snapshot = doc_ref.get()
+            if snapshot.exists and field_paths is not None:
+                snapshot._data = {field: snapshot._data[field] for field in field_paths if field in snapshot._data}
+            yield snapshot
+
+    def _check(self, path, option):
+        if path not in self.docs:
+            if option is not None:
+                raise google_exceptions.NotFound(f"No document to update: {path}")
+            return
+        if option is not None and option.last_update_time is not None \
+                and option.last_update_time != self.update_times[path]:
+            raise google_exceptions.FailedPrecondition(f"Document changed since it was read: {path}")
+
+    def _set(self, path, data, merge):
+        self.docs[path] = _merge(self.docs.get(path, {}) if merge else {}, data)
+        self.update_times[path] = next(self._clock)
+
+
+class FakeAsyncDocument:
+    def __init__(self, document):
+        self._document = document
+        self.path = document.path
+        self.id = document.id
+
+    def collection(self, name):
+        return FakeAsyncQuery(self._document.collection(name))
+
+    async def set(self, data, merge=False):
+        self._document.set(data, merge=merge)
+
+    async def get(self):
+        return self._document.get()
+
+    async def delete(self):
+        self._document.delete()
+
+
+class FakeAsyncQuery:
+    def __init__(self, query):
+        self._query = query
+
+    def __getattr__(self, name):
+        # where/order_by/start_after/limit/select return wrapped queries
+        method = getattr(self._query, name)
+        return lambda *args, **kwargs: FakeAsyncQuery(method(*args, **kwargs))
+
+    def document(self, doc_id=None):
+        return FakeAsyncDocument(self._query.document(doc_id))
+
+    async def stream(self):
+        for snapshot in self._query.stream():
+            yield snapshot
+
+    async def list_documents(self):
+        for document in self._query.list_documents():
+            yield FakeAsyncDocument(document)
+
+
+class FakeAsyncBatch:
+    def __init__(self, batch):
+        self._batch = batch
+
+    def set(self, doc_ref, data, merge=False):
+        self._batch.set(doc_ref, data, merge=merge)
+
+    def delete(self, doc_ref):
+        self._batch.delete(doc_ref)
+
+    async def commit(self):
+        self._batch.commit()
+
+
+class FakeAsyncFirestore:
+    def __init__(self, db=None):
+        # The wrapped synchronous fake holds the documents and commit counters
+        self.sync = db or FakeFirestore()
+
+    def collection(self, name):
+        return FakeAsyncQuery(self.sync.collection(name))
+
+    def batch(self):
+        return FakeAsyncBatch(self.sync.batch())
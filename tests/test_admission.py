@@ -0,0 +1,187 @@
+import asyncio
+import gc
+import json
+
+import pytest
+
+from utils import admission
+from utils.admission import AdmissionController, MemoryBucketStore
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(admission.time, 'monotonic', clock)
+    return clock
+
+
+def _admit(controller, key='user-1', cost=1):
+    retry_after = controller.try_acquire(key, cost=cost)
+    if not retry_after:
+        controller.release()
+    return retry_after
+
+
+def test_bucket_allows_the_burst_then_refills_at_the_rate(clock):
+    controller = AdmissionController(rate_per_minute=6, burst=3)
+
+    assert [_admit(controller) for _ in range(4)] == [0, 0, 0, 10]
+
+    clock.now += 9.9
+    assert _admit(controller) == 1
+    clock.now += 0.1
+    assert _admit(controller) == 0
+    # Other clients have their own buckets
+    assert _admit(controller, key='user-2') == 0
+
+    stats = controller.get_stats()
+    assert (stats['admitted'], stats['rejected_rate'], stats['in_flight']) == (5, 2, 0)
+
+
+def test_refill_is_capped_at_the_burst(clock):
+    controller = AdmissionController(rate_per_minute=60, burst=2)
+
+    clock.now += 3600
+    assert [_admit(controller) for _ in range(3)] == [0, 0, 1]
+
+
+def test_cost_above_the_burst_leaves_the_bucket_in_debt(clock):
+    controller = AdmissionController(rate_per_minute=60, burst=5)
+
+    assert _admit(controller, cost=3) == 0
+    # Not admitted until the bucket is full again
+    assert _admit(controller, cost=8) == 3
+    clock.now += 3
+    assert _admit(controller, cost=8) == 0
+
+    # The 3 tokens of debt and 1 token for the next request must refill first
+    assert _admit(controller) == 4
+    clock.now += 4
+    assert _admit(controller) == 0
+
+
+def test_in_flight_cap_sheds_without_charging_tokens(clock):
+    controller = AdmissionController(rate_per_minute=60, burst=3, max_in_flight=2, shed_retry_after=2)
+
+    assert controller.try_acquire('a') == 0
+    assert controller.try_acquire('b') == 0
+    assert controller.try_acquire('c') == 2
+    assert controller.get_stats()['rejected_in_flight'] == 1
+
+    controller.release()
+    # The shed request did not touch c's bucket
+    assert [_admit(controller, key='c') for _ in range(4)] == [0, 0, 0, 1]
+
+
+def test_rejected_request_frees_its_in_flight_slot(clock):
+    controller = AdmissionController(rate_per_minute=60, burst=1, max_in_flight=1)
+
+    assert _admit(controller) == 0
+    assert controller.try_acquire('user-1') == 1
+    assert controller.get_stats()['in_flight'] == 0
+    assert _admit(controller, key='user-2') == 0
+
+
+@pytest.mark.parametrize('rate', [0, -1, float('nan')])
+def test_non_positive_rate_is_rejected(rate):
+    with pytest.raises(ValueError, match='rate'):
+        AdmissionController(rate_per_minute=rate)
+    with pytest.raises(ValueError, match='rate'):
+        MemoryBucketStore().consume('user-1', rate, 5)
+
+
+def test_burst_below_one_is_rejected():
+    with pytest.raises(ValueError, match='burst'):
+        AdmissionController(burst=0)
+
+
+def test_store_evicts_the_least_recently_used_bucket(clock):
+    store = MemoryBucketStore(max_keys=2)
+
+    store.consume('a', 1, 1)
+    store.consume('b', 1, 1)
+    store.consume('a', 1, 1)
+    store.consume('c', 1, 1)
+
+    assert store.get_stats() == {'buckets': 2, 'evictions': 1}
+    # a is still empty; b was dropped, so it starts full again
+    assert store.consume('a', 1, 1) > 0
+    assert store.consume('b', 1, 1) == 0
+
+
+class _StreamingOpenAI:
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    async def stream_financial_insights_async(self, **inputs):
+        yield 'section', {'key': 'budget_tip', 'value': 'Cook at home'}
+        if self.fail:
+            raise RuntimeError('stream broke')
+        yield 'done', {'budget_tip': 'Cook at home'}
+
+
+def _stream_app(controller, openai_service):
+    pytest.importorskip('quart')
+    pytest.importorskip('firebase_admin')
+    from app_fake import make_app
+    return make_app(admission_controller=controller, openai_service=openai_service)
+
+
+@pytest.mark.parametrize('fail', [False, True])
+def test_stream_releases_its_slot_when_the_body_ends(fail):
+    from app_fake import AUTH, call
+    controller = AdmissionController(rate_per_minute=60, burst=5, max_in_flight=1)
+    app = _stream_app(controller, _StreamingOpenAI(fail=fail))
+
+    for _ in range(3):
+        if fail:
+            with pytest.raises(RuntimeError, match='stream broke'):
+                call(app, 'POST', '/api/insights/stream', json={'budget': 100}, headers=AUTH)
+            continue
+        status, body, headers = call(app, 'POST', '/api/insights/stream', json={'budget': 100}, headers=AUTH)
+        assert status == 200
+        assert headers['Content-Type'].startswith('text/event-stream')
+        assert 'event: section' in body
+
+    stats = controller.get_stats()
+    assert (stats['in_flight'], stats['admitted'], stats['rejected_in_flight']) == (0, 3, 0)
+
+
+def test_stream_slot_is_released_when_the_body_is_never_read():
+    from app_fake import AUTH, LOOPBACK
+    controller = AdmissionController(rate_per_minute=60, burst=5, max_in_flight=1)
+    app = _stream_app(controller, _StreamingOpenAI())
+
+    async def abandon():
+        # Dispatch without sending the body, as when the client leaves first
+        async with app.test_request_context('/api/insights/stream', method='POST', json={},
+                                            headers=AUTH, scope_base=LOOPBACK):
+            response = await app.dispatch_request()
+            assert response.status_code == 200
+            assert controller.get_stats()['in_flight'] == 1
+
+    asyncio.run(abandon())
+    gc.collect()
+
+    assert controller.get_stats()['in_flight'] == 0
+
+
+def test_rejected_stream_answers_429_with_retry_after():
+    from app_fake import AUTH, call
+    controller = AdmissionController(rate_per_minute=6, burst=1)
+    app = _stream_app(controller, _StreamingOpenAI())
+
+    assert call(app, 'POST', '/api/insights/stream', json={}, headers=AUTH)[0] == 200
+    status, body, headers = call(app, 'POST', '/api/insights/stream', json={}, headers=AUTH)
+
+    assert status == 429
+    assert headers['Retry-After'] == '10'
+    assert json.loads(body)['retry_after'] == 10
@@ -0,0 +1,82 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('firebase_admin')
+
+from firestore_fake import FakeFirestore
+from services.analytics_service import AnalyticsService
+from services.firebase_service import FirebaseService
+from utils import cache
+
+UID = 'user-1'
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingAnalytics:
+    def __init__(self):
+        self.calls = []
+
+    async def get_spending_analytics_async(self, uid, **params):
+        self.calls.append(params)
+        return {'params': params}
+
+
+def _get(path):
+    pytest.importorskip('quart')
+    from app_fake import AUTH, call, make_app
+    analytics = RecordingAnalytics()
+    status, body, _ = call(make_app(analytics_service=analytics), 'GET', path, headers=AUTH)
+    return status, json.loads(body), analytics.calls
+
+
+@pytest.mark.parametrize('budget', ['inf', '-inf', 'nan', 'Infinity', '-1', '-0.01', 'lots', '1e999'])
+def test_spending_analytics_rejects_bad_budgets(budget):
+    status, body, calls = _get(f'/api/analytics/spending?budget={budget}')
+
+    assert status == 400
+    assert 'budget' in body['error']
+    assert calls == []
+
+
+@pytest.mark.parametrize('query, budget', [
+    ('', None),
+    ('?budget=', None),
+    ('?budget=0', 0.0),
+    ('?budget=1250.5', 1250.5),
+])
+def test_spending_analytics_accepts_finite_non_negative_budgets(query, budget):
+    status, body, calls = _get(f'/api/analytics/spending{query}')
+
+    assert status == 200
+    assert calls == [{'days': 90, 'weeks': 26, 'budget': budget}]
+
+
+def test_other_workers_see_new_expenses_within_the_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, 'monotonic', clock)
+    firebase_service = FirebaseService(connect=False)
+    firebase_service.db = FakeFirestore()
+    # Two workers: separate caches over the same database
+    workers = [AnalyticsService(firebase_service, cache_ttl=60) for _ in range(2)]
+    expense = {'amount': 10.0, 'category': 'Food', 'created_at': datetime.now(timezone.utc)}
+
+    firebase_service.add_expense(UID, dict(expense))
+    assert [worker.get_spending_analytics(UID)['expense_count'] for worker in workers] == [1, 1]
+
+    # Saved through the first worker, which drops its own entry
+    firebase_service.add_expense(UID, dict(expense))
+    workers[0].invalidate(UID)
+    assert [worker.get_spending_analytics(UID)['expense_count'] for worker in workers] == [2, 1]
+
+    clock.now += 60
+    assert [worker.get_spending_analytics(UID)['expense_count'] for worker in workers] == [2, 2]
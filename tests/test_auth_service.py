@@ -0,0 +1,223 @@
+import time
+import datetime
+
+import pytest
+import requests
+
+pytest.importorskip('firebase_admin')
+pytest.importorskip('google.auth')
+
+from cryptography import x509
+from cryptography.x509.oid import NameOID
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from firebase_admin import auth
+from google.auth import crypt, jwt
+
+from services import auth_service as auth_module
+from services.auth_service import AuthService, FIREBASE_ISSUER_PREFIX
+
+PROJECT_ID = 'velora-test'
+
+
+def _signing_key(kid):
+    """
+    RSA signer plus the PEM certificate Google would publish for it
+    """
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'securetoken')])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    pem_key = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    signer = crypt.RSASigner.from_string(pem_key, key_id=kid)
+    return signer, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+@pytest.fixture(scope='module')
+def signing_key():
+    return _signing_key('key-1')
+
+
+def _token(signer, uid='user-1', lifetime=3600, **overrides):
+    now = int(time.time())
+    claims = {
+        'iss': FIREBASE_ISSUER_PREFIX + PROJECT_ID,
+        'aud': PROJECT_ID,
+        'sub': uid,
+        'iat': now,
+        'exp': now + lifetime
+    }
+    claims.update(overrides)
+    return jwt.encode(signer, claims).decode()
+
+
+class _CertsResponse:
+    headers = {'Cache-Control': 'public, max-age=3600'}
+
+    def __init__(self, certs):
+        self._certs = certs
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._certs
+
+
+class _SDK:
+    """
+    Stand-in for firebase_admin.auth.verify_id_token that records its calls
+    """
+
+    def __init__(self, claims=None, error=None):
+        self.claims = claims
+        self.error = error
+        self.calls = 0
+
+    def __call__(self, id_token):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return dict(self.claims)
+
+
+@pytest.fixture
+def service(signing_key, monkeypatch):
+    signer, cert = signing_key
+    service = AuthService(project_id=PROJECT_ID)
+    monkeypatch.setattr(service._session, 'get', lambda url, timeout: _CertsResponse({'key-1': cert}))
+    service._refresh_certs()
+    return service
+
+
+@pytest.fixture
+def sdk(monkeypatch):
+    sdk = _SDK(error=AssertionError('Admin SDK should not be called'))
+    monkeypatch.setattr(auth_module.auth, 'verify_id_token', sdk)
+    return sdk
+
+
+def test_repeat_token_is_served_from_cache_until_exp(service, signing_key, sdk):
+    token = _token(signing_key[0])
+
+    claims = service.verify_id_token(token)
+    assert claims['uid'] == 'user-1'
+    assert service.get_stats()['misses'] == 1
+
+    assert service.get_cached_claims(token) == claims
+    assert service.verify_id_token(token) == claims
+    stats = service.get_stats()
+    assert (stats['hits'], stats['misses'], stats['cached_tokens']) == (2, 1, 1)
+
+
+def test_cached_claims_are_copies(service, signing_key, sdk):
+    token = _token(signing_key[0])
+    service.verify_id_token(token)['uid'] = 'someone-else'
+
+    assert service.get_cached_claims(token)['uid'] == 'user-1'
+
+
+def test_token_is_verified_again_after_exp(service, signing_key, sdk, monkeypatch):
+    token = _token(signing_key[0], lifetime=60)
+    claims = service.verify_id_token(token)
+
+    # Past exp the cache entry is dropped and the token goes back to verification
+    later = time.time() + 120
+    monkeypatch.setattr(auth_module.time, 'time', lambda: later)
+    assert service.get_cached_claims(token) is None
+    assert service.get_stats()['cached_tokens'] == 0
+
+    monkeypatch.setattr(service, '_verify_uncached', lambda id_token: dict(claims, exp=int(later) + 3600))
+    assert service.verify_id_token(token)['uid'] == 'user-1'
+    assert service.get_stats()['misses'] == 2
+
+
+def test_expired_token_is_rejected(service, signing_key, sdk):
+    token = _token(signing_key[0], iat=int(time.time()) - 7200, lifetime=-3600)
+
+    with pytest.raises(auth.InvalidIdTokenError):
+        service.verify_id_token(token)
+    assert service.get_stats()['cached_tokens'] == 0
+
+
+@pytest.mark.parametrize('overrides', [
+    {'aud': 'another-project'},
+    {'iss': FIREBASE_ISSUER_PREFIX + 'another-project'},
+    {'sub': ''},
+])
+def test_token_with_wrong_claims_is_rejected(service, signing_key, sdk, overrides):
+    with pytest.raises(auth.InvalidIdTokenError):
+        service.verify_id_token(_token(signing_key[0], **overrides))
+
+
+def test_token_signed_by_unknown_key_is_rejected(service, sdk):
+    # Same kid as the published cert, different private key
+    forged_signer, _ = _signing_key('key-1')
+
+    with pytest.raises(auth.InvalidIdTokenError):
+        service.verify_id_token(_token(forged_signer))
+
+
+def test_malformed_token_is_rejected(service, sdk):
+    with pytest.raises(auth.InvalidIdTokenError):
+        service.verify_id_token('not-a-jwt')
+
+
+@pytest.mark.parametrize('error', [
+    auth.InvalidIdTokenError('Invalid ID token'),
+    auth.RevokedIdTokenError('The Firebase ID token has been revoked'),
+])
+def test_rejected_token_is_never_cached(monkeypatch, error):
+    # Without a project ID verification always goes through the Admin SDK
+    service = AuthService()
+    service.project_id = None
+    sdk = _SDK(error=error)
+    monkeypatch.setattr(auth_module.auth, 'verify_id_token', sdk)
+
+    for _ in range(2):
+        with pytest.raises(auth.InvalidIdTokenError):
+            service.verify_id_token('token')
+    assert sdk.calls == 2
+    assert service.get_cached_claims('token') is None
+
+
+def test_falls_back_to_admin_sdk_when_certs_are_unavailable(monkeypatch):
+    service = AuthService(project_id=PROJECT_ID)
+
+    def unavailable(url, timeout):
+        raise requests.ConnectionError('network down')
+    monkeypatch.setattr(service._session, 'get', unavailable)
+    service._refresh_certs()
+    assert service.get_stats()['certs_loaded'] is False
+
+    sdk = _SDK(claims={'uid': 'user-1', 'exp': time.time() + 3600})
+    monkeypatch.setattr(auth_module.auth, 'verify_id_token', sdk)
+
+    assert service.verify_id_token('token')['uid'] == 'user-1'
+    assert service.verify_id_token('token')['uid'] == 'user-1'
+    # The SDK's answer is cached like a local verification
+    assert sdk.calls == 1
+
+
+def test_falls_back_to_admin_sdk_for_a_key_not_yet_published(service, monkeypatch):
+    signer, _ = _signing_key('key-2')
+    refreshes = []
+    monkeypatch.setattr(service, '_refresh_certs', lambda: refreshes.append(1))
+    sdk = _SDK(claims={'uid': 'user-2', 'exp': time.time() + 3600})
+    monkeypatch.setattr(auth_module.auth, 'verify_id_token', sdk)
+
+    assert service.verify_id_token(_token(signer, uid='user-2'))['uid'] == 'user-2'
+    # The certs are refreshed once before giving up on local verification
+    assert refreshes == [1]
+    assert sdk.calls == 1
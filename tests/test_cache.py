@@ -0,0 +1,133 @@
+import json
+
+import pytest
+
+from utils import cache
+from utils.cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, 'monotonic', clock)
+    return clock
+
+
+def _size(value):
+    return len(json.dumps(value))
+
+
+def test_entries_expire_after_the_ttl(clock):
+    entries = TTLCache(ttl=60)
+    entries.set('a', {'value': 1})
+
+    clock.now += 59.9
+    assert entries.get('a') == {'value': 1}
+
+    clock.now += 0.1
+    assert entries.get('a') is None
+    # The expired entry is dropped, not just hidden
+    assert entries.get_stats()['entries'] == 0
+    assert entries.get_stats()['bytes'] == 0
+
+
+def test_per_entry_ttl_overrides_the_default(clock):
+    entries = TTLCache(ttl=60)
+    entries.set('short', 1, ttl=5)
+    entries.set('long', 2)
+
+    clock.now += 5
+    assert entries.get('short') is None
+    assert entries.get('long') == 2
+
+
+def test_setting_a_key_again_restarts_its_ttl(clock):
+    entries = TTLCache(ttl=60)
+    entries.set('a', 1)
+    clock.now += 50
+    entries.set('a', 2)
+    clock.now += 50
+
+    assert entries.get('a') == 2
+    assert entries.get_stats()['entries'] == 1
+
+
+def test_least_recently_used_entry_is_evicted_by_count(clock):
+    entries = TTLCache(max_entries=3)
+    for key in 'abc':
+        entries.set(key, key)
+    # Reading 'a' makes 'b' the least recently used
+    assert entries.get('a') == 'a'
+
+    entries.set('d', 'd')
+
+    assert entries.get('b') is None
+    assert [entries.get(key) for key in 'acd'] == ['a', 'c', 'd']
+    assert entries.get_stats()['evictions'] == 1
+
+
+def test_least_recently_used_entries_are_evicted_by_bytes(clock):
+    value = 'x' * 98
+    entries = TTLCache(max_entries=100, max_bytes=3 * _size(value))
+    for key in 'abc':
+        entries.set(key, value)
+    entries.get('a')
+
+    # Twice the size of one entry: the two least recently used go
+    entries.set('d', value * 2)
+
+    stats = entries.get_stats()
+    assert entries.get('b') is None and entries.get('c') is None
+    assert entries.get('a') == value
+    assert (stats['entries'], stats['evictions']) == (2, 2)
+    assert stats['bytes'] == _size(value) + _size(value * 2)
+
+
+def test_value_larger_than_the_byte_cap_is_not_cached(clock):
+    entries = TTLCache(max_bytes=50)
+    entries.set('small', 'ok')
+
+    entries.set('huge', 'x' * 100)
+
+    assert entries.get('huge') is None
+    # Nothing was evicted to make room for it
+    assert entries.get('small') == 'ok'
+    assert entries.get_stats()['evictions'] == 0
+
+
+def test_delete_and_clear_release_their_bytes(clock):
+    entries = TTLCache()
+    entries.set('a', [1, 2, 3])
+    entries.set('b', 'text')
+
+    entries.delete('a')
+    entries.delete('missing')
+    assert entries.get_stats()['bytes'] == _size('text')
+
+    entries.clear()
+    assert entries.get_stats()['entries'] == 0
+    assert entries.get_stats()['bytes'] == 0
+
+
+def test_stats_count_hits_misses_and_ratio(clock):
+    entries = TTLCache(ttl=10)
+    assert entries.get_stats()['hit_ratio'] == 0.0
+
+    entries.set('a', 1)
+    entries.get('a')
+    entries.get('a')
+    entries.get('missing')
+    clock.now += 10
+    entries.get('a')
+
+    stats = entries.get_stats()
+    assert (stats['hits'], stats['misses']) == (2, 2)
+    assert stats['hit_ratio'] == 0.5
@@ -0,0 +1,259 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from utils.concurrency import AsyncConcurrencyLimiter, AsyncSingleFlight, ConcurrencyLimiter, SingleFlight
+
+
+def _run_threads(count, target):
+    threads = [threading.Thread(target=target, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert not any(thread.is_alive() for thread in threads)
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+    results = [None] * 10
+
+    def work():
+        calls.append(threading.get_ident())
+        release.wait(5)
+        return {'answer': 42}
+
+    def caller(index):
+        results[index] = flight.do('key', work)
+
+    threading.Timer(0.2, release.set).start()
+    _run_threads(10, caller)
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.get_stats() == {'in_flight': 0, 'executed': 1, 'coalesced': 9}
+
+
+def test_single_flight_runs_different_keys_separately():
+    flight = SingleFlight()
+
+    assert [flight.do(key, lambda key=key: key * 2) for key in (1, 2, 1)] == [2, 4, 2]
+    # Sequential calls are not coalesced
+    assert flight.get_stats()['executed'] == 3
+
+
+def test_single_flight_raises_the_error_in_every_caller():
+    flight = SingleFlight()
+    release = threading.Event()
+    errors = [None] * 5
+
+    def work():
+        release.wait(5)
+        raise RuntimeError('upstream failed')
+
+    def caller(index):
+        try:
+            flight.do('key', work)
+        except RuntimeError as e:
+            errors[index] = e
+
+    threading.Timer(0.2, release.set).start()
+    _run_threads(5, caller)
+
+    assert all(str(error) == 'upstream failed' for error in errors)
+    # The failed call is forgotten, so the next caller runs it again
+    assert flight.do('key', lambda: 'recovered') == 'recovered'
+    assert flight.get_stats()['in_flight'] == 0
+
+
+def test_limiter_caps_concurrent_holders():
+    limiter = ConcurrencyLimiter(3)
+    active, peak = 0, 0
+    lock = threading.Lock()
+
+    def caller(index):
+        nonlocal active, peak
+        with limiter:
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.02)
+            with lock:
+                active -= 1
+
+    _run_threads(12, caller)
+
+    stats = limiter.get_stats()
+    assert peak == 3
+    assert (stats['acquired'], stats['active'], stats['queue_depth']) == (12, 0, 0)
+    assert stats['max_wait'] > 0
+
+
+def test_async_single_flight_coalesces_concurrent_calls():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {'answer': 42}
+
+    async def run():
+        return await asyncio.gather(*(flight.do('key', work) for _ in range(20)))
+
+    results = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.get_stats() == {'in_flight': 0, 'executed': 1, 'coalesced': 19}
+
+
+def test_async_single_flight_raises_the_error_in_every_caller():
+    flight = AsyncSingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise RuntimeError('upstream failed')
+
+    async def run():
+        return await asyncio.gather(*(flight.do('key', work) for _ in range(5)), return_exceptions=True)
+
+    errors = asyncio.run(run())
+
+    assert [str(error) for error in errors] == ['upstream failed'] * 5
+    assert flight.get_stats()['in_flight'] == 0
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    flight = AsyncSingleFlight()
+    finished = []
+
+    async def work():
+        await asyncio.sleep(0.05)
+        finished.append(1)
+        return 'done'
+
+    async def run():
+        leader = asyncio.ensure_future(flight.do('key', work))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(flight.do('key', work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        results = await asyncio.gather(*followers)
+        return leader, results
+
+    leader, results = asyncio.run(run())
+
+    assert leader.cancelled()
+    assert results == ['done'] * 3
+    assert finished == [1]
+
+
+def test_async_single_flight_does_not_share_work_between_loops():
+    flight = AsyncSingleFlight()
+    gate = {}
+
+    async def never_finishes():
+        gate['event'] = asyncio.Event()
+        await gate['event'].wait()
+
+    async def abandon():
+        # The loop closes while the work is still in flight
+        task = asyncio.ensure_future(flight.do('key', never_finishes))
+        await asyncio.sleep(0)
+        return task
+
+    asyncio.run(abandon())
+
+    async def fresh():
+        return 'fresh'
+
+    assert asyncio.run(flight.do('key', fresh)) == 'fresh'
+
+
+def test_async_limiter_caps_concurrent_holders():
+    limiter = AsyncConcurrencyLimiter(2)
+    active, peak = 0, 0
+
+    async def caller():
+        nonlocal active, peak
+        async with limiter:
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    async def run():
+        await asyncio.gather(*(caller() for _ in range(10)))
+
+    asyncio.run(run())
+
+    stats = limiter.get_stats()
+    assert peak == 2
+    assert (stats['acquired'], stats['active'], stats['queue_depth']) == (10, 0, 0)
+
+
+def test_async_limiter_works_on_every_event_loop():
+    # Module-level limiters are built before any loop exists and are then used
+    # by several loops (test runs, workers); contention binds a semaphore to its loop
+    limiter = AsyncConcurrencyLimiter(1)
+
+    async def contend():
+        async def hold():
+            async with limiter:
+                await asyncio.sleep(0.01)
+        await asyncio.gather(hold(), hold())
+
+    for _ in range(3):
+        asyncio.run(contend())
+
+    results = []
+
+    def in_thread():
+        asyncio.run(contend())
+        results.append('ok')
+
+    thread = threading.Thread(target=in_thread)
+    thread.start()
+    thread.join(5)
+
+    assert results == ['ok']
+    assert limiter.get_stats()['acquired'] == 8
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    limiter = AsyncConcurrencyLimiter(1)
+
+    async def run():
+        holder_entered = asyncio.Event()
+        release = asyncio.Event()
+
+        async def holder():
+            async with limiter:
+                holder_entered.set()
+                await release.wait()
+
+        holding = asyncio.ensure_future(holder())
+        await holder_entered.wait()
+        waiter = asyncio.ensure_future(limiter.__aenter__())
+        await asyncio.sleep(0)
+        assert limiter.get_stats()['queue_depth'] == 1
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert limiter.get_stats()['queue_depth'] == 0
+
+        release.set()
+        await holding
+        # The slot is free again
+        async with limiter:
+            return limiter.get_stats()
+
+    stats = asyncio.run(run())
+
+    assert (stats['active'], stats['acquired']) == (1, 2)
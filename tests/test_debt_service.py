@@ -0,0 +1,125 @@
+import random
+from datetime import date
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from services.debt_service import PAID_OFF_EPSILON, DebtPayoffService
+
+START = date(2026, 1, 1)
+
+
+def _reference(debts, extra, strategy, max_months):
+    """
+    Plain scalar loop over one scenario, debt by debt and month by month
+    """
+    balances = [float(debt['balance']) for debt in debts]
+    rates = [float(debt['apr']) / 100 / 12 for debt in debts]
+    minimums = [float(debt['minimum_payment']) for debt in debts]
+    indexes = range(len(debts))
+    if strategy == 'avalanche':
+        order = sorted(indexes, key=lambda i: (-rates[i], balances[i]))
+    else:
+        order = sorted(indexes, key=lambda i: (balances[i], -rates[i]))
+    budget = sum(minimums) + extra
+
+    total_interest = total_paid = 0.0
+    debt_months = [-1 if balance > PAID_OFF_EPSILON else 0 for balance in balances]
+    owed = sum(balances)
+    schedule = []
+    for month in range(1, max_months + 1):
+        interest = [balance * rate for balance, rate in zip(balances, rates)]
+        balances = [balance + charge for balance, charge in zip(balances, interest)]
+        payments = [min(balance, minimum) for balance, minimum in zip(balances, minimums)]
+        balances = [balance - payment for balance, payment in zip(balances, payments)]
+
+        remaining = budget - sum(payments)
+        for debt in order:
+            amount = max(0.0, min(remaining, balances[debt]))
+            balances[debt] -= amount
+            payments[debt] += amount
+            remaining -= amount
+
+        total_interest += sum(interest)
+        total_paid += sum(payments)
+        balances = [0.0 if balance < PAID_OFF_EPSILON else balance for balance in balances]
+        for debt in indexes:
+            if debt_months[debt] < 0 and balances[debt] == 0:
+                debt_months[debt] = month
+        schedule.append((payments, interest, list(balances)))
+
+        previous_owed, owed = owed, sum(balances)
+        if owed == 0:
+            return month, total_interest, total_paid, debt_months, schedule
+        if owed >= previous_owed:
+            return None, total_interest, total_paid, debt_months, schedule
+    return None, total_interest, total_paid, debt_months, schedule
+
+
+def _random_debts(rng, count):
+    return [
+        {
+            'balance': round(rng.uniform(100, 20000), 2),
+            'apr': round(rng.choice([0, rng.uniform(3, 30)]), 2),
+            'minimum_payment': round(rng.uniform(25, 400), 2)
+        }
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_strategies_match_a_scalar_reference(seed):
+    rng = random.Random(seed)
+    debts = _random_debts(rng, rng.randint(1, 6))
+    extras = [0.0, 50.0, 250.0, 1000.0]
+    service = DebtPayoffService(max_months=360)
+
+    plan = service.simulate(debts, extra_payments=extras, schedule_extra=250, start=START)
+
+    for strategy in ('avalanche', 'snowball'):
+        for scenario in plan['strategies'][strategy]['scenarios']:
+            months, interest, paid, debt_months, _ = _reference(debts, scenario['extra_payment'], strategy, 360)
+            assert scenario['months'] == months
+            assert scenario['paid_off'] is (months is not None)
+            assert scenario['total_interest'] == pytest.approx(interest, abs=0.01)
+            assert scenario['total_paid'] == pytest.approx(paid, abs=0.01)
+            assert scenario['debt_payoff_months'] == [month if month >= 0 else None for month in debt_months]
+
+        *_, schedule = _reference(debts, 250.0, strategy, 360)
+        months = plan['strategies'][strategy]['schedule']['months']
+        assert len(months) == len(schedule)
+        for actual, (payments, interest, balances) in zip(months, schedule):
+            assert actual['payments'] == pytest.approx(payments, abs=0.01)
+            assert actual['interest'] == pytest.approx(interest, abs=0.01)
+            assert actual['balances'] == pytest.approx(balances, abs=0.01)
+
+
+def test_payments_below_interest_are_reported_as_not_paid_off():
+    debts = [{'balance': 10000, 'apr': 24, 'minimum_payment': 100}]
+
+    plan = DebtPayoffService().simulate(debts, extra_payments=[0, 200], start=START)
+
+    stalled, paid = plan['strategies']['avalanche']['scenarios']
+    assert stalled['paid_off'] is False and stalled['months'] is None
+    assert paid['paid_off'] is True
+    assert paid['months'] == _reference(debts, 200.0, 'avalanche', 600)[0]
+
+
+@pytest.mark.parametrize('field', ['balance', 'apr', 'minimum_payment'])
+@pytest.mark.parametrize('value', [float('nan'), float('inf'), float('-inf'), 'NaN', 'Infinity'])
+def test_non_finite_debt_values_are_rejected(field, value):
+    debt = {'balance': 1000, 'apr': 10, 'minimum_payment': 50, field: value}
+
+    with pytest.raises(ValueError, match='finite'):
+        DebtPayoffService().simulate([debt])
+
+
+@pytest.mark.parametrize('value', [float('nan'), float('inf'), 'nan', 'inf'])
+def test_non_finite_extra_payments_are_rejected(value):
+    debts = [{'balance': 1000, 'apr': 10, 'minimum_payment': 50}]
+
+    with pytest.raises(ValueError, match='finite'):
+        DebtPayoffService().simulate(debts, extra_payments=[0, value])
+    with pytest.raises(ValueError, match='finite'):
+        DebtPayoffService().simulate(debts, extra_payments=[0], schedule_extra=value)
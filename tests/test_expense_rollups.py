@@ -0,0 +1,134 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip('firebase_admin')
+
+from firestore_fake import FakeFirestore
+from services.firebase_service import FirebaseService
+
+UID = 'user-1'
+CATEGORIES = ('Food', 'Rent', 'Transport', 'Books')
+EASTERN = timezone(timedelta(hours=-5))
+TOKYO = timezone(timedelta(hours=9))
+
+
+@pytest.fixture
+def service():
+    service = FirebaseService(connect=False)
+    service.db = FakeFirestore()
+    return service
+
+
+def _expenses(count, seed=7):
+    """
+    Expenses spread over two years around month and year boundaries, with
+    naive (UTC) and timezone-aware timestamps
+    """
+    rng = random.Random(seed)
+    start = datetime(2024, 12, 1)
+    expenses = []
+    for _ in range(count):
+        when = start + timedelta(hours=rng.randrange(0, 24 * 400))
+        tz = rng.choice((None, timezone.utc, EASTERN, TOKYO))
+        if tz is not None:
+            when = when.replace(tzinfo=timezone.utc).astimezone(tz)
+        expenses.append({
+            "amount": round(rng.uniform(1, 200), 2),
+            "category": rng.choice(CATEGORIES),
+            "created_at": when
+        })
+    return expenses
+
+
+def _rollups(service):
+    prefix = f"users/{UID}/expense_rollups/"
+    return {
+        path[len(prefix):]: data for path, data in service.db.docs.items() if path.startswith(prefix)
+    }
+
+
+def _assert_same_rollups(actual, expected):
+    assert actual.keys() == expected.keys()
+    for doc_id, rollup in expected.items():
+        assert actual[doc_id]["period"] == rollup["period"]
+        assert actual[doc_id]["start"] == rollup["start"]
+        assert actual[doc_id]["count"] == rollup["count"]
+        assert actual[doc_id]["total"] == pytest.approx(rollup["total"])
+        assert actual[doc_id]["categories"].keys() == rollup["categories"].keys()
+        for category, amount in rollup["categories"].items():
+            assert actual[doc_id]["categories"][category] == pytest.approx(amount)
+
+
+def test_incremental_rollups_match_a_full_rebuild(service):
+    expenses = _expenses(1500)
+
+    # Single adds and batched imports both keep the rollups up to date
+    for expense in expenses[:100]:
+        assert service.add_expense(UID, dict(expense))
+    assert len(service.add_expenses_batch(UID, [dict(e) for e in expenses[100:900]])) == 800
+    assert len(service.add_expenses_batch(UID, [dict(e) for e in expenses[900:]])) == 600
+    incremental = _rollups(service)
+
+    written = service.rebuild_expense_rollups(UID)
+
+    rebuilt = _rollups(service)
+    assert written == len(rebuilt)
+    _assert_same_rollups(incremental, rebuilt)
+
+
+def test_rebuild_removes_stale_rollups(service):
+    service.add_expenses_batch(UID, _expenses(50))
+    service.db.collection('users').document(UID).collection('expense_rollups').document('day-1999-01-01').set(
+        {"period": "day", "total": 5, "count": 1, "categories": {"Food": 5}}
+    )
+
+    service.rebuild_expense_rollups(UID)
+
+    assert 'day-1999-01-01' not in _rollups(service)
+
+
+def test_failed_batch_commit_leaves_rollups_consistent(service):
+    expenses = _expenses(1200, seed=11)
+    # The first group commits, the next one fails
+    service.db.fail_after_commits = service.db.commits + 1
+
+    saved = service.add_expenses_batch(UID, expenses)
+    assert 0 < len(saved) < len(expenses)
+    incremental = _rollups(service)
+
+    service.db.fail_after_commits = None
+    service.rebuild_expense_rollups(UID)
+    _assert_same_rollups(incremental, _rollups(service))
+
+
+@pytest.mark.parametrize('when, month', [
+    # 22:00 on Jan 31 in New York is already February in UTC
+    (datetime(2025, 1, 31, 22, 0, tzinfo=EASTERN), 'month-2025-02-01'),
+    # 08:00 on Mar 1 in Tokyo is still February in UTC
+    (datetime(2025, 3, 1, 8, 0, tzinfo=TOKYO), 'month-2025-02-01'),
+    # Naive timestamps are UTC, as Firestore stores them
+    (datetime(2025, 2, 28, 23, 59), 'month-2025-02-01'),
+])
+def test_rollup_periods_are_utc(service, when, month):
+    doc_id, start = service._rollup_key('month', when)
+
+    assert doc_id == month
+    assert start.tzinfo == timezone.utc
+
+
+def test_summary_reads_the_current_utc_month(service):
+    service.add_expense(UID, {"amount": 12.5, "category": "Food", "created_at": datetime.now(timezone.utc)})
+    service.add_expense(UID, {"amount": 7.5, "category": "Food", "created_at": datetime.now(timezone.utc)})
+    # Not in the current month
+    service.add_expense(UID, {"amount": 100, "category": "Rent", "created_at": datetime(2001, 1, 1)})
+
+    assert service.get_expense_summary(UID, period='month') == {"Food": 20.0}
+
+
+def test_server_timestamp_expenses_count_as_now_in_utc(service):
+    when = service._expense_time({"amount": 1, "category": "Food"})
+
+    assert when.tzinfo == timezone.utc
+    assert abs(datetime.now(timezone.utc) - when) < timedelta(minutes=1)
@@ -0,0 +1,219 @@
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip('quart')
+pytest.importorskip('firebase_admin')
+
+import firebase_admin.firestore
+from werkzeug.datastructures import FileStorage
+
+from app_fake import AUTH, UID, FakeFirebase, call, make_app
+from config.settings import TestingConfig
+
+ROWS = [
+    {'amount': '12.50', 'category': 'Food', 'description': 'Lunch', 'date': '2030-03-05'},
+    {'amount': '40', 'category': 'Books', 'date': '2030-03-06T09:30:00'},
+    {'amount': '7.25', 'category': 'Transport'},
+]
+
+CSV = (
+    "amount,category,description,date\n"
+    "12.50,Food,Lunch,2030-03-05\n"
+    "40,Books,,2030-03-06T09:30:00\n"
+    "7.25,Transport,,\n"
+)
+NDJSON = "\n".join(json.dumps(row) for row in ROWS) + "\n"
+
+
+class ImportFirebase(FakeFirebase):
+    """
+    Stores imported expenses; batches fail from the fail_after-th saved expense on
+    """
+
+    def __init__(self, fail_after=None):
+        super().__init__()
+        self.expenses = []
+        self.fail_after = fail_after
+
+    async def add_expenses_batch(self, uid, expenses):
+        assert uid == UID
+        if self.fail_after is not None:
+            expenses = expenses[:max(self.fail_after - len(self.expenses), 0)]
+        self.expenses.extend(expenses)
+        return [f'expense-{len(self.expenses) - len(expenses) + index}' for index in range(len(expenses))]
+
+
+class Analytics:
+    def __init__(self):
+        self.invalidated = []
+
+    def invalidate(self, uid):
+        self.invalidated.append(uid)
+
+
+class FiveRowConfig(TestingConfig):
+    EXPENSE_IMPORT_MAX_ROWS = 5
+
+
+def _import(body, content_type=None, query='', firebase=None, settings=TestingConfig, **kwargs):
+    firebase = firebase or ImportFirebase()
+    analytics = Analytics()
+    app = make_app(settings, firebase_service=firebase, analytics_service=analytics)
+    headers = dict(AUTH)
+    if content_type:
+        headers['Content-Type'] = content_type
+    if body is not None:
+        kwargs['data'] = body
+    status, text, _ = call(app, 'POST', f'/api/expenses/import{query}', headers=headers, **kwargs)
+    return status, json.loads(text), firebase.expenses, analytics.invalidated
+
+
+def _summary(result):
+    return result['accepted'], result['rejected'], result['failed']
+
+
+def test_csv_and_ndjson_import_the_same_expenses():
+    csv_status, csv_result, csv_expenses, invalidated = _import(CSV, 'text/csv')
+    ndjson_status, ndjson_result, ndjson_expenses, _ = _import(NDJSON, 'application/x-ndjson')
+
+    assert (csv_status, ndjson_status) == (200, 200)
+    assert _summary(csv_result) == _summary(ndjson_result) == (3, 0, 0)
+    assert csv_expenses == ndjson_expenses
+    assert [expense['amount'] for expense in csv_expenses] == [12.5, 40.0, 7.25]
+    assert csv_expenses[0]['description'] == 'Lunch'
+    # Empty CSV cells are dropped, not stored as empty strings
+    assert 'description' not in csv_expenses[1]
+    assert invalidated == [UID]
+
+
+@pytest.mark.parametrize('query, content_type, filename', [
+    ('?format=csv', 'application/octet-stream', None),
+    ('', None, 'expenses.csv'),
+])
+def test_format_comes_from_the_query_or_the_file_name(query, content_type, filename):
+    if filename:
+        files = {'file': FileStorage(io.BytesIO(CSV.encode()), filename=filename)}
+        status, result, expenses, _ = _import(None, query=query, files=files)
+    else:
+        status, result, expenses, _ = _import(CSV, content_type, query=query)
+
+    assert status == 200
+    assert len(expenses) == 3
+
+
+def test_unsupported_format_is_rejected():
+    status, result, expenses, _ = _import(NDJSON, 'application/json')
+
+    assert status == 400
+    assert 'Unsupported format' in result['error']
+    assert expenses == []
+
+
+def test_bad_rows_are_reported_and_good_rows_imported():
+    body = "\n".join([
+        json.dumps({'amount': 5, 'category': 'Food'}),
+        '{"amount": 3,',
+        '[1, 2]',
+        json.dumps({'amount': -2, 'category': 'Food'}),
+        json.dumps({'amount': 'ten', 'category': 'Food'}),
+        json.dumps({'amount': 4}),
+        '',
+        json.dumps({'amount': 8, 'category': 'Fun', 'date': '05/03/2030'}),
+        json.dumps({'amount': 9, 'category': 'Fun'}),
+    ])
+
+    status, result, expenses, _ = _import(body, 'application/x-ndjson')
+
+    assert status == 200
+    assert _summary(result) == (2, 6, 0)
+    assert [error['row'] for error in result['errors']] == [2, 3, 4, 5, 6, 8]
+    assert 'Invalid JSON' in result['errors'][0]['details']['row']
+    assert result['errors'][2]['details'] == {'amount': 'Amount must be positive'}
+    assert 'category' in result['errors'][4]['details']
+    assert 'date' in result['errors'][5]['details']
+    assert [expense['amount'] for expense in expenses] == [5.0, 9.0]
+
+
+def test_csv_rows_are_numbered_after_the_header():
+    status, result, _, _ = _import("amount,category\n5,Food\n,Food\n", 'text/csv')
+
+    assert status == 200
+    assert result['errors'] == [{'row': 3, 'details': {'amount': 'amount is required'}}]
+
+
+def test_reported_errors_are_capped():
+    class TwoErrorConfig(TestingConfig):
+        EXPENSE_IMPORT_MAX_REPORTED_ERRORS = 2
+
+    body = "amount,category\n" + "oops,Food\n" * 5
+
+    status, result, _, _ = _import(body, 'text/csv', settings=TwoErrorConfig)
+
+    assert status == 200
+    assert result['rejected'] == 5
+    assert len(result['errors']) == 2
+
+
+def test_import_stops_at_the_row_limit_with_a_partial_success():
+    body = "amount,category\n" + "".join(f"{index + 1},Food\n" for index in range(8))
+
+    status, result, expenses, _ = _import(body, 'text/csv', settings=FiveRowConfig)
+
+    assert status == 207
+    assert result['message'] == 'Import stopped'
+    assert _summary(result) == (5, 0, 0)
+    # Row 7 is the sixth data row
+    assert 'max 5' in result['error'] and 'from 7 on' in result['error']
+    assert [expense['amount'] for expense in expenses] == [1.0, 2.0, 3.0, 4.0, 5.0]
+
+
+def test_rejected_rows_count_towards_the_row_limit():
+    body = "amount,category\n" + "oops,Food\n" * 3 + "1,Food\n" * 3
+
+    status, result, expenses, _ = _import(body, 'text/csv', settings=FiveRowConfig)
+
+    assert status == 207
+    assert _summary(result) == (2, 3, 0)
+
+
+def test_exactly_the_row_limit_is_a_full_success():
+    body = "amount,category\n" + "1,Food\n" * 5
+
+    status, result, _, _ = _import(body, 'text/csv', settings=FiveRowConfig)
+
+    assert status == 200
+    assert _summary(result) == (5, 0, 0)
+
+
+def test_failed_write_stops_the_import():
+    body = "amount,category\n" + "1,Food\n" * 4
+
+    status, result, expenses, _ = _import(body, 'text/csv', firebase=ImportFirebase(fail_after=2))
+
+    assert status == 207
+    assert _summary(result) == (2, 0, 2)
+    assert 'rows from 4 on' in result['error']
+
+
+def test_dates_are_stored_as_utc_datetimes():
+    body = "\n".join(json.dumps({'amount': 1, 'category': 'Food', **date}) for date in [
+        {'date': '2030-03-05'},
+        {'date': '2030-03-06T09:30:00'},
+        {'date': '2030-03-06T09:30:00+02:00'},
+        {},
+    ])
+
+    status, _, expenses, _ = _import(body, 'application/x-ndjson')
+
+    assert status == 200
+    # Naive dates are taken as UTC instead of the server's local time
+    assert expenses[0]['created_at'] == datetime(2030, 3, 5, tzinfo=timezone.utc)
+    assert expenses[1]['created_at'] == datetime(2030, 3, 6, 9, 30, tzinfo=timezone.utc)
+    assert expenses[1]['created_at'].utcoffset() == timedelta(0)
+    # Explicit offsets are kept
+    assert expenses[2]['created_at'] == datetime(2030, 3, 6, 7, 30, tzinfo=timezone.utc)
+    assert expenses[2]['created_at'].utcoffset() == timedelta(hours=2)
+    assert expenses[3]['created_at'] is firebase_admin.firestore.SERVER_TIMESTAMP
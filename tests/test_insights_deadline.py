@@ -0,0 +1,257 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip('openai')
+
+import openai
+from openai.openai_object import OpenAIObject
+
+from services import openai_service as openai_module
+from services.openai_service import OpenAIService
+from utils.admission import AdmissionController
+
+DEADLINE = 0.05
+SLOW = 0.3
+
+AI_TEXT = (
+    "BUDGET_TIP: Cook at home.\nSAVINGS_TIP: Save $5 a day.\nEXPLANATION: Interest grows.\n"
+    "SCHOLARSHIP: Try FAFSA.\nEARN_EXTRA: Sell old books."
+)
+REQUEST = {'budget': 500, 'spent': 200, 'goal': 100, 'debt': 0, 'topic': 'saving'}
+
+
+class FakeCompletions:
+    """
+    Stands in for openai.ChatCompletion.acreate: answers after delay seconds,
+    or raises error; release() finishes calls that wait for it
+    """
+
+    def __init__(self, delay=0.0, error=None, wait=False):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self._wait = wait
+        self._released = None
+
+    def release(self):
+        self._released.set()
+
+    async def acreate(self, **params):
+        self.calls += 1
+        if self._wait:
+            self._released = self._released or asyncio.Event()
+            await self._released.wait()
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return OpenAIObject.construct_from({
+            "choices": [{"message": {"role": "assistant", "content": AI_TEXT}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 120, "completion_tokens": 40}
+        })
+
+
+@pytest.fixture
+def completions(monkeypatch):
+    fake = FakeCompletions()
+    monkeypatch.setattr(openai.ChatCompletion, 'acreate', fake.acreate)
+    return fake
+
+
+def _service(monkeypatch, **kwargs):
+    kwargs.setdefault('deadline', DEADLINE)
+    service = OpenAIService(api_key='test', **kwargs)
+    # No HTTP session is needed with the client stubbed out
+    monkeypatch.setattr(service, '_get_aiosession', lambda: None)
+    return service
+
+
+def _insights(service, **kwargs):
+    return service.get_financial_insights_async(**REQUEST, **kwargs)
+
+
+def test_answer_within_the_deadline_comes_from_openai(monkeypatch, completions):
+    service = _service(monkeypatch)
+    settled = []
+
+    async def run():
+        response = await _insights(service, on_settled=lambda: settled.append(1))
+        await asyncio.sleep(0)
+        return response
+
+    response = asyncio.run(run())
+
+    assert response['budget_tip'] == 'Cook at home.'
+    assert 'upgrade_pending' not in response
+    assert settled == [1]
+    assert service.get_concurrency_stats()['deadline']['misses'] == 0
+
+
+def test_missed_deadline_answers_locally_then_caches_the_upgrade(monkeypatch, completions):
+    completions.delay = SLOW
+    service = _service(monkeypatch)
+    settled = []
+
+    async def run():
+        response = await _insights(service, on_settled=lambda: settled.append(1))
+        # Answered before OpenAI; the completion is still running
+        assert settled == []
+        assert service.get_concurrency_stats()['deadline']['pending_upgrades'] == 1
+        await asyncio.sleep(SLOW + 0.1)
+        return response, await _insights(service)
+
+    local, upgraded = asyncio.run(run())
+
+    assert local['upgrade_pending'] is True
+    assert local['budget_tip'] and local['budget_tip'] != 'Cook at home.'
+    assert upgraded['budget_tip'] == 'Cook at home.'
+    assert 'upgrade_pending' not in upgraded
+    # The second request was served from the cache the upgrade filled
+    assert completions.calls == 1
+    assert settled == [1]
+    deadline = service.get_concurrency_stats()['deadline']
+    assert (deadline['misses'], deadline['pending_upgrades'], deadline['fallbacks']) == (1, 0, 0)
+
+
+def test_requests_during_an_upgrade_join_it(monkeypatch, completions):
+    completions.delay = SLOW
+    service = _service(monkeypatch)
+
+    async def run():
+        first = await _insights(service)
+        second = await _insights(service)
+        await asyncio.sleep(SLOW + 0.1)
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first['upgrade_pending'] and second['upgrade_pending']
+    assert completions.calls == 1
+    assert service.get_concurrency_stats()['async_single_flight']['coalesced'] == 1
+
+
+def test_failed_upgrade_is_not_cached(monkeypatch, completions):
+    completions.delay = SLOW
+    completions.error = openai.error.APIError('upstream failed')
+    service = _service(monkeypatch)
+    settled = []
+
+    async def run():
+        response = await _insights(service, on_settled=lambda: settled.append(1))
+        await asyncio.sleep(SLOW + 0.1)
+        return response
+
+    assert asyncio.run(run())['upgrade_pending'] is True
+
+    assert settled == [1]
+    assert service.get_concurrency_stats()['deadline']['pending_upgrades'] == 0
+    assert service.get_cache_stats()['entries'] == 0
+
+
+def test_failure_before_the_deadline_answers_locally_with_the_error(monkeypatch, completions):
+    completions.error = openai.error.APIError('upstream failed')
+    service = _service(monkeypatch)
+    settled = []
+
+    async def run():
+        response = await _insights(service, on_settled=lambda: settled.append(1))
+        await asyncio.sleep(0)
+        return response
+
+    response = asyncio.run(run())
+
+    assert 'upstream failed' in response['error']
+    assert 'upgrade_pending' not in response
+    assert settled == [1]
+    assert service.get_concurrency_stats()['deadline']['fallbacks'] == 1
+
+
+def test_cache_hit_settles_right_away(monkeypatch, completions):
+    service = _service(monkeypatch)
+
+    async def run():
+        await _insights(service)
+        settled = []
+        await _insights(service, on_settled=lambda: settled.append(1))
+        return settled
+
+    assert asyncio.run(run()) == [1]
+    assert completions.calls == 1
+
+
+def _route_app(service, max_in_flight):
+    pytest.importorskip('quart')
+    from app_fake import make_app
+    controller = AdmissionController(rate_per_minute=600, burst=50, max_in_flight=max_in_flight)
+    return make_app(admission_controller=controller, openai_service=service), controller
+
+
+async def _post(app, path, body):
+    from app_fake import AUTH, LOOPBACK
+    response = await app.test_client().post(path, json=body, headers=AUTH, scope_base=LOOPBACK)
+    return response.status_code, json.loads(await response.get_data())
+
+
+def test_route_holds_its_slot_until_the_upgrade_finishes(monkeypatch, completions):
+    completions._wait = True
+    service = _service(monkeypatch)
+    app, controller = _route_app(service, max_in_flight=1)
+
+    async def run():
+        status, body = await _post(app, '/api/insights', REQUEST)
+        assert status == 200
+        assert body['insights']['upgrade_pending'] is True
+
+        # The upgrade still holds the only slot
+        assert controller.get_stats()['in_flight'] == 1
+        status, _ = await _post(app, '/api/insights', dict(REQUEST, topic='rent'))
+        assert status == 429
+
+        completions.release()
+        await asyncio.sleep(0.1)
+        assert controller.get_stats()['in_flight'] == 0
+        return await _post(app, '/api/insights', REQUEST)
+
+    status, body = asyncio.run(run())
+
+    assert status == 200
+    assert body['insights']['budget_tip'] == 'Cook at home.'
+    assert controller.get_stats()['in_flight'] == 0
+
+
+def test_batch_holds_its_slot_until_every_upgrade_finishes(monkeypatch, completions):
+    completions._wait = True
+    service = _service(monkeypatch)
+    app, controller = _route_app(service, max_in_flight=1)
+    items = [dict(REQUEST, topic=f'topic {index}') for index in range(6)] + [{'budget': -1}]
+
+    async def run():
+        status, body = await _post(app, '/api/insights/batch', {'requests': items})
+        assert status == 200
+        assert [bool(result.get('insights', {}).get('upgrade_pending')) for result in body['results']] == [True] * 6 + [False]
+        assert controller.get_stats()['in_flight'] == 1
+
+        completions.release()
+        await asyncio.sleep(0.1)
+        return controller.get_stats()['in_flight'], service.get_concurrency_stats()['deadline']
+
+    in_flight, deadline = asyncio.run(run())
+
+    assert in_flight == 0
+    assert (deadline['misses'], deadline['pending_upgrades']) == (6, 0)
+
+
+def test_batch_without_openai_calls_releases_its_slot(monkeypatch, completions):
+    service = _service(monkeypatch)
+    app, controller = _route_app(service, max_in_flight=1)
+
+    async def run():
+        return await _post(app, '/api/insights/batch', {'requests': [{'budget': -1}, 'nope']})
+
+    status, body = asyncio.run(run())
+
+    assert status == 200
+    assert all(result['error'] == 'Validation Error' for result in body['results'])
+    assert controller.get_stats()['in_flight'] == 0
+    assert completions.calls == 0
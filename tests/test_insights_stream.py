@@ -0,0 +1,115 @@
+import random
+
+import pytest
+
+pytest.importorskip('openai')
+
+from services.openai_service import SECTION_MARKERS, InsightsStreamParser, OpenAIService
+
+RESPONSE = (
+    "Here are your tips:\n"
+    "BUDGET_TIP: Plan three cheap dinners for the week.\n"
+    "SAVINGS_TIP:   Move $10 to savings every Friday.  \n"
+    "EXPLANATION: Compound interest pays interest on interest: $100 at 5% is $105, then $110.25.\n"
+    "SCHOLARSHIP: Look into the Pell Grant.\n"
+    "EARN_EXTRA: Tutor first-years online."
+)
+SECTIONS = {
+    "budget_tip": "Plan three cheap dinners for the week.",
+    "savings_tip": "Move $10 to savings every Friday.",
+    "explanation": "Compound interest pays interest on interest: $100 at 5% is $105, then $110.25.",
+    "scholarship_suggestion": "Look into the Pell Grant.",
+    "earn_extra_suggestion": "Tutor first-years online."
+}
+
+
+def _parse(chunks):
+    """
+    Feed chunks one at a time, returning the sections in the order they were emitted
+    """
+    parser = InsightsStreamParser()
+    found = []
+    for chunk in chunks:
+        found.extend(parser.feed(chunk))
+    found.extend(parser.close())
+    assert parser.text == "".join(chunks)
+    return found, parser.sections
+
+
+def _split(text, cuts):
+    cuts = sorted(set(cuts))
+    return [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+
+
+def test_whole_response_is_parsed_in_order():
+    found, sections = _parse([RESPONSE])
+
+    assert sections == SECTIONS
+    assert [key for key, _ in found] == [key for _, key in SECTION_MARKERS]
+
+
+def test_section_value_split_across_chunks_is_emitted_once_complete():
+    parser = InsightsStreamParser()
+
+    assert parser.feed("BUDGET_TIP: Plan three ") == []
+    assert parser.feed("cheap dinners") == []
+    assert parser.feed(" for the week.\nSAVINGS") == [("budget_tip", SECTIONS["budget_tip"])]
+    assert parser.sections == {"budget_tip": SECTIONS["budget_tip"]}
+
+
+def test_marker_split_across_chunks_is_recognized():
+    parser = InsightsStreamParser()
+
+    assert parser.feed("SCHOLAR") == []
+    assert parser.feed("SHIP") == []
+    assert parser.feed(": Look into the Pell Grant.") == []
+    assert parser.feed("\n") == [("scholarship_suggestion", SECTIONS["scholarship_suggestion"])]
+
+
+def test_trailing_section_without_a_newline_is_flushed_on_close():
+    parser = InsightsStreamParser()
+
+    assert parser.feed("EXPLANATION: Short.\nEARN_EXTRA: Tutor first-years") == [("explanation", "Short.")]
+    assert parser.feed(" online.") == []
+
+    assert parser.close() == [("earn_extra_suggestion", SECTIONS["earn_extra_suggestion"])]
+    # Closing again finds nothing new
+    assert parser.close() == []
+
+
+def test_first_occurrence_of_a_marker_wins():
+    found, sections = _parse(["BUDGET_TIP: first\nBUDGET_TIP: second\n"])
+
+    assert found == [("budget_tip", "first")]
+    assert sections == {"budget_tip": "first"}
+
+
+def test_every_two_chunk_split_parses_the_same():
+    expected = _parse([RESPONSE])
+
+    for cut in range(1, len(RESPONSE)):
+        assert _parse(_split(RESPONSE, [cut])) == expected
+
+
+def test_random_chunkings_parse_the_same():
+    rng = random.Random(7)
+    expected = _parse([RESPONSE])
+
+    assert _parse(list(RESPONSE)) == expected
+    for _ in range(200):
+        cuts = rng.sample(range(1, len(RESPONSE)), rng.randint(1, 40))
+        assert _parse(_split(RESPONSE, cuts)) == expected
+
+
+def test_stream_recovers_sections_of_an_unformatted_response():
+    service = OpenAIService(api_key='test', cache_ttl=0)
+    parser = InsightsStreamParser()
+    lines = ["Cook at home.", "Save $5 a day.", "Interest grows.", "Try FAFSA.", "Sell old books."]
+    for chunk in _split("\n".join(lines), [3, 20, 41]):
+        assert parser.feed(chunk) == []
+
+    events = list(service._finish_stream(parser, None))
+
+    assert [payload["value"] for event, payload in events if event == "section"] == lines
+    assert events[-1][0] == "done"
+    assert events[-1][1]["budget_tip"] == lines[0]
@@ -0,0 +1,179 @@
+import json
+
+import pytest
+
+pytest.importorskip('cryptography')
+pytest.importorskip('firebase_admin')
+
+from cryptography.fernet import Fernet
+
+from firestore_fake import FakeFirestore
+from services.key_rotation import SSNKeyRotation
+
+NEW_KEY = Fernet.generate_key()
+OLD_KEY = Fernet.generate_key()
+UNKNOWN_KEY = Fernet.generate_key()
+
+
+def _ssn(index):
+    return f'{index:09d}'
+
+
+def _encrypt(key, value):
+    return Fernet(key).encrypt(value.encode()).decode()
+
+
+def _seed(db, rows):
+    """
+    rows: (user ID, key the SSN is encrypted with or None for no SSN)
+    """
+    for index, (user_id, key) in enumerate(rows):
+        data = {'firstName': user_id}
+        if key is not None:
+            data['ssn_encrypted'] = _encrypt(key, _ssn(index))
+        db.collection('users').document(user_id).set(data)
+
+
+def _ssn_of(db, user_id, key=NEW_KEY):
+    return Fernet(key).decrypt(db.docs[f'users/{user_id}']['ssn_encrypted'].encode()).decode()
+
+
+def _job(db, **kwargs):
+    kwargs.setdefault('workers', 1)
+    kwargs.setdefault('page_size', 3)
+    return SSNKeyRotation(db, [NEW_KEY, OLD_KEY], **kwargs)
+
+
+def test_rotates_old_rows_and_skips_rotated_and_unreadable_ones():
+    db = FakeFirestore()
+    rows = [
+        ('u0', OLD_KEY), ('u1', NEW_KEY), ('u2', None), ('u3', OLD_KEY),
+        ('u4', UNKNOWN_KEY), ('u5', OLD_KEY), ('u6', NEW_KEY)
+    ]
+    _seed(db, rows)
+    unreadable = db.docs['users/u4']['ssn_encrypted']
+    already_rotated = {user_id: db.update_times[f'users/{user_id}'] for user_id in ('u1', 'u6')}
+
+    stats = _job(db).run()
+
+    assert (stats['scanned'], stats['rotated'], stats['failed'], stats['conflicts']) == (7, 3, 1, 0)
+    for index, (user_id, key) in enumerate(rows):
+        if key in (OLD_KEY, NEW_KEY):
+            assert _ssn_of(db, user_id) == _ssn(index)
+    # Rows on the primary key are not rewritten; others are left alone
+    assert {user_id: db.update_times[f'users/{user_id}'] for user_id in ('u1', 'u6')} == already_rotated
+    assert db.docs['users/u4']['ssn_encrypted'] == unreadable
+    assert 'ssn_encrypted' not in db.docs['users/u2']
+    assert db.docs['users/u0']['firstName'] == 'u0'
+
+
+def test_second_run_rotates_nothing():
+    db = FakeFirestore()
+    _seed(db, [(f'u{index}', OLD_KEY) for index in range(5)])
+
+    assert _job(db).run()['rotated'] == 5
+    stats = _job(db).run()
+
+    assert (stats['scanned'], stats['rotated'], stats['failed']) == (5, 0, 0)
+
+
+def test_interrupted_run_resumes_from_the_checkpoint(tmp_path):
+    db = FakeFirestore()
+    _seed(db, [(f'u{index}', OLD_KEY) for index in range(8)])
+    checkpoint = tmp_path / 'rotation.json'
+
+    def interrupt(stats):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        _job(db, checkpoint_path=str(checkpoint)).run(progress=interrupt)
+
+    saved = json.loads(checkpoint.read_text())
+    assert saved['last_id'] == 'u2'
+    assert saved['rotated'] == 3
+
+    # The committed first page is still rotated; the rest is not
+    assert [_ssn_of(db, f'u{index}') for index in range(3)] == [_ssn(index) for index in range(3)]
+    assert [_ssn_of(db, f'u{index}', OLD_KEY) for index in range(3, 8)] == [_ssn(index) for index in range(3, 8)]
+
+    stats = _job(db, checkpoint_path=str(checkpoint)).run()
+
+    # Only the users after the checkpoint are read again
+    assert (stats['scanned'], stats['rotated']) == (5, 5)
+    assert [_ssn_of(db, f'u{index}') for index in range(8)] == [_ssn(index) for index in range(8)]
+    assert not checkpoint.exists()
+    assert not (tmp_path / 'rotation.json.tmp').exists()
+
+
+def test_completed_run_clears_the_checkpoint(tmp_path):
+    db = FakeFirestore()
+    _seed(db, [(f'u{index}', OLD_KEY) for index in range(4)])
+    checkpoint = tmp_path / 'rotation.json'
+    checkpoint.write_text(json.dumps({'last_id': 'u1'}))
+
+    assert _job(db, checkpoint_path=str(checkpoint)).run()['rotated'] == 2
+    assert not checkpoint.exists()
+
+    # The next run starts from the beginning
+    assert _job(db, checkpoint_path=str(checkpoint)).run()['rotated'] == 2
+
+
+def _concurrent_write(job, db, writes):
+    """
+    Apply the next of writes each time the job has read (and encrypted) a page
+    but not yet committed it
+    """
+    collect = job._collect
+
+    def collect_then_write(futures):
+        results = collect(futures)
+        if writes:
+            user_id, data = writes.pop(0)
+            if data is None:
+                db.collection('users').document(user_id).delete()
+            else:
+                db.collection('users').document(user_id).set(data, merge=True)
+        return results
+
+    job._collect = collect_then_write
+
+
+def test_concurrent_profile_write_is_not_overwritten():
+    db = FakeFirestore()
+    _seed(db, [(f'u{index}', OLD_KEY) for index in range(3)])
+    job = _job(db)
+    # The user changes their SSN after the job read the old one
+    _concurrent_write(job, db, [('u1', {'ssn_encrypted': _encrypt(OLD_KEY, '999999999')})])
+
+    stats = job.run()
+
+    # u1 was re-read and rotated from the value it holds now
+    assert (stats['scanned'], stats['rotated'], stats['conflicts']) == (3, 3, 0)
+    assert [_ssn_of(db, f'u{index}') for index in range(3)] == [_ssn(0), '999999999', _ssn(2)]
+
+
+def test_user_that_keeps_changing_is_reported_as_a_conflict():
+    db = FakeFirestore()
+    _seed(db, [(f'u{index}', OLD_KEY) for index in range(3)])
+    job = _job(db, max_conflict_retries=1)
+    newer = _encrypt(OLD_KEY, '999999999')
+    _concurrent_write(job, db, [('u1', {'ssn_encrypted': newer}), ('u1', {'ssn_encrypted': newer})])
+
+    stats = job.run()
+
+    assert (stats['rotated'], stats['conflicts']) == (2, 1)
+    # The concurrent write wins and stays on the old key for the next run
+    assert _ssn_of(db, 'u1', OLD_KEY) == '999999999'
+    assert _ssn_of(db, 'u0') == _ssn(0) and _ssn_of(db, 'u2') == _ssn(2)
+
+
+def test_user_deleted_during_rotation_is_skipped():
+    db = FakeFirestore()
+    _seed(db, [(f'u{index}', OLD_KEY) for index in range(3)])
+    job = _job(db)
+    _concurrent_write(job, db, [('u1', None)])
+
+    stats = job.run()
+
+    assert (stats['scanned'], stats['rotated'], stats['conflicts'], stats['failed']) == (3, 2, 0, 0)
+    assert 'users/u1' not in db.docs
@@ -0,0 +1,166 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from utils.lazy import LazyService, get_readiness, is_ready, requires_services, wait_ready
+
+
+class _Factory:
+    """
+    Service factory that records the threads it ran on
+    """
+
+    def __init__(self, delay=0.0, failures=0):
+        self.delay = delay
+        self.failures = failures
+        self.threads = []
+
+    def __call__(self):
+        self.threads.append(threading.get_ident())
+        time.sleep(self.delay)
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError('client unavailable')
+        return object()
+
+
+def test_wait_ready_keeps_the_event_loop_responsive():
+    factory = _Factory(delay=0.2)
+    service = LazyService('slow', factory)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while not is_ready(service):
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        tick_task = asyncio.create_task(ticker())
+        failed = await wait_ready({'slow': service})
+        await tick_task
+        return failed, ticks, threading.get_ident()
+
+    failed, ticks, loop_thread = asyncio.run(run())
+
+    assert failed == {}
+    assert ticks >= 5
+    assert factory.threads and loop_thread not in factory.threads
+
+
+def test_concurrent_waiters_share_one_initialization():
+    factory = _Factory(delay=0.1)
+    service = LazyService('shared', factory)
+
+    async def run():
+        return await asyncio.gather(*(wait_ready({'shared': service}) for _ in range(50)))
+
+    assert asyncio.run(run()) == [{}] * 50
+    assert len(factory.threads) == 1
+
+
+def test_failed_initialization_is_reported_and_retried():
+    factory = _Factory(failures=1)
+    service = LazyService('flaky', factory)
+    services = {'flaky': service, 'plain': object()}
+
+    assert asyncio.run(wait_ready(services)) == {'flaky': 'client unavailable'}
+    assert get_readiness(services)['flaky']['state'] == 'failed'
+
+    assert asyncio.run(wait_ready(services)) == {}
+    assert get_readiness(services)['flaky']['state'] == 'ready'
+    assert len(factory.threads) == 2
+
+
+@pytest.fixture
+def gated_app():
+    """
+    App from create_app() with fake service factories and a probe route
+    """
+    pytest.importorskip('quart')
+    pytest.importorskip('firebase_admin')
+    import main
+    from config.settings import TestingConfig
+
+    app = main.create_app(TestingConfig, start_clients=False)
+    factories = {}
+    for name, service in app.extensions['velora'].items():
+        factories[name] = service._lazy_factory = _Factory(delay=0.05)
+
+    @app.route('/api/probe')
+    async def probe():
+        return {'loop_thread': threading.get_ident()}
+
+    @app.route('/api/probe/debt')
+    @requires_services('debt')
+    async def debt_probe():
+        return {'loop_thread': threading.get_ident()}
+
+    return app, factories
+
+
+def _get(app, path):
+    async def get():
+        response = await app.test_client().get(path)
+        return response.status_code, await response.get_json(), response.headers
+    return asyncio.run(get())
+
+
+def test_requests_wait_for_services_off_the_loop(gated_app):
+    app, factories = gated_app
+
+    status, body, _ = _get(app, '/api/probe')
+
+    assert status == 200
+    assert all(is_ready(service) for service in app.extensions['velora'].values())
+    for factory in factories.values():
+        assert len(factory.threads) == 1
+        assert body['loop_thread'] not in factory.threads
+
+
+def test_failed_service_answers_503_until_it_initializes(gated_app):
+    app, factories = gated_app
+    factories['openai'].failures = 1
+
+    status, body, headers = _get(app, '/api/probe')
+    assert status == 503
+    assert 'openai' in body['message']
+    assert headers['Retry-After'] == '5'
+
+    # Retried on the next request
+    assert _get(app, '/api/probe')[0] == 200
+
+
+def test_requests_only_wait_for_the_services_their_view_declares(gated_app):
+    app, factories = gated_app
+    factories['firebase'].failures = 1
+
+    assert _get(app, '/api/probe/debt')[0] == 200
+
+    assert len(factories['debt'].threads) == 1
+    assert all(not factory.threads for name, factory in factories.items() if name != 'debt')
+
+
+def test_every_route_declares_its_services(gated_app):
+    app, _ = gated_app
+    services = app.extensions['velora']
+
+    for endpoint, view in app.view_functions.items():
+        if endpoint in ('static', 'probe'):
+            continue
+        names = getattr(view, 'required_services', None)
+        assert names is not None, endpoint
+        assert set(names) <= set(services), endpoint
+
+
+def test_health_does_not_wait_for_services(gated_app):
+    app, factories = gated_app
+
+    status, body, _ = _get(app, '/api/health')
+
+    assert status == 200
+    assert body['ready'] is False
+    assert all(not factory.threads for factory in factories.values())
@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('quart')
+pytest.importorskip('firebase_admin')
+
+import main
+from config.settings import TestingConfig
+
+LOOPBACK = {'client': ('127.0.0.1', 50000)}
+REMOTE = {'client': ('203.0.113.7', 50000)}
+
+
+class TokenConfig(TestingConfig):
+    METRICS_TOKEN = 'scrape-secret'
+
+
+def _get(app, path, scope=LOOPBACK, headers=None):
+    async def get():
+        response = await app.test_client().get(path, scope_base=scope, headers=headers)
+        return response.status_code, (await response.get_data()).decode()
+    return asyncio.run(get())
+
+
+def test_collectors_belong_to_their_app():
+    main.create_app(TestingConfig, start_clients=False)
+    app = main.create_app(TestingConfig, start_clients=False)
+
+    status, text = _get(app, '/api/metrics')
+
+    assert status == 200
+    types = [line for line in text.splitlines() if line.startswith('# TYPE')]
+    assert len(types) == len(set(types))
+    assert sum(line.startswith('velora_insights_admission_') for line in text.splitlines()) > 0
+
+
+@pytest.mark.parametrize('path', ['/api/metrics', '/api/insights/admission'])
+def test_operational_endpoints_are_internal_only(path):
+    app = main.create_app(TestingConfig, start_clients=False)
+
+    assert _get(app, path)[0] == 200
+    assert _get(app, path, scope=REMOTE)[0] == 403
+    # Relayed through a reverse proxy on the same host
+    assert _get(app, path, headers={'X-Forwarded-For': '203.0.113.7'})[0] == 403
+
+
+@pytest.mark.parametrize('path', ['/api/metrics', '/api/insights/admission'])
+def test_operational_endpoints_require_the_token_when_configured(path):
+    app = main.create_app(TokenConfig, start_clients=False)
+
+    assert _get(app, path, scope=REMOTE, headers={'Authorization': 'Bearer scrape-secret'})[0] == 200
+    assert _get(app, path, scope=REMOTE, headers={'Authorization': 'Bearer wrong'})[0] == 403
+    # Loopback is not enough once a token is configured
+    assert _get(app, path)[0] == 403
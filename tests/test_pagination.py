@@ -0,0 +1,148 @@
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip('firebase_admin')
+
+from firestore_fake import FakeFirestore
+from services.firebase_service import FirebaseService
+from utils.pagination import decode_cursor, encode_cursor
+
+UID = 'user-1'
+SAME_TIME = datetime(2025, 3, 14, 9, 26, 53, 589793, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def service():
+    service = FirebaseService(connect=False)
+    service.db = FakeFirestore()
+    return service
+
+
+def _seed(service, collection, rows):
+    for doc_id, data in rows:
+        service.db.collection('users').document(UID).collection(collection).document(doc_id).set(data)
+
+
+def _raw(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+def _all_pages(fetch, limit):
+    items, cursor, pages = [], None, 0
+    while True:
+        page, cursor = fetch(limit=limit, cursor=cursor)
+        assert len(page) <= limit
+        items.extend(page)
+        pages += 1
+        if cursor is None:
+            return items, pages
+        assert pages < 100, "pagination did not terminate"
+
+
+@pytest.mark.parametrize('created_at', [
+    SAME_TIME,
+    datetime(2025, 3, 14, 9, 26, 53, 589793, tzinfo=timezone(timedelta(hours=-5))),
+    datetime(2025, 3, 14, 9, 26, 53, 589793),
+])
+def test_cursor_round_trip(created_at):
+    cursor = encode_cursor(created_at, 'AbC-123_x')
+
+    assert '=' not in cursor
+    assert decode_cursor(cursor) == (created_at, 'AbC-123_x')
+
+
+@pytest.mark.parametrize('cursor', [
+    'not a cursor!',
+    base64.urlsafe_b64encode(b'not json').decode(),
+    base64.urlsafe_b64encode(b'\xff\xfe\xfd').decode(),
+    _raw(['2025-03-14T09:26:53', 'abc']),
+    _raw({'t': '2025-03-14T09:26:53'}),
+    _raw({'id': 'abc'}),
+    _raw({'t': 'yesterday', 'id': 'abc'}),
+    _raw({'t': 1710408413, 'id': 'abc'}),
+    _raw({'t': '2025-03-14T09:26:53', 'id': ''}),
+    _raw({'t': '2025-03-14T09:26:53', 'id': 42}),
+    _raw({'t': '2025-03-14T09:26:53', 'id': '../other-user/expenses/abc'}),
+])
+def test_invalid_cursor_is_rejected(service, cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+    with pytest.raises(ValueError):
+        service.get_expenses(UID, cursor=cursor)
+    with pytest.raises(ValueError):
+        service.get_ai_tips_history(UID, cursor=cursor)
+
+
+@pytest.mark.parametrize('tamper', [
+    lambda cursor: cursor[:-4],
+    lambda cursor: cursor[4:],
+    lambda cursor: cursor + 'x',
+])
+def test_tampered_cursor_is_rejected(service, tamper):
+    cursor = tamper(encode_cursor(SAME_TIME, 'abc'))
+
+    with pytest.raises(ValueError):
+        service.get_expenses(UID, cursor=cursor)
+
+
+@pytest.mark.parametrize('limit', [1, 7, 50])
+def test_pages_cover_equal_timestamps_without_gaps_or_duplicates(service, limit):
+    rows = [(f'exp{index:03d}', {'amount': index, 'created_at': SAME_TIME}) for index in range(40)]
+    # A few older and newer expenses around the tied block
+    rows += [(f'old{index}', {'amount': index, 'created_at': SAME_TIME - timedelta(days=index + 1)}) for index in range(5)]
+    rows += [(f'new{index}', {'amount': index, 'created_at': SAME_TIME + timedelta(seconds=index + 1)}) for index in range(5)]
+    _seed(service, 'expenses', rows)
+
+    items, pages = _all_pages(lambda **kw: service.get_expenses(UID, **kw), limit)
+
+    ids = [item['id'] for item in items]
+    assert sorted(ids) == sorted(doc_id for doc_id, _ in rows)
+    assert len(set(ids)) == len(ids)
+    keys = [(item['created_at'], item['id']) for item in items]
+    assert keys == sorted(keys, reverse=True)
+    assert pages == len(rows) // limit + 1
+
+
+def test_filters_apply_across_pages(service):
+    rows = [
+        (f'exp{index:03d}', {'amount': index, 'category': 'Food' if index % 3 else 'Rent', 'created_at': SAME_TIME})
+        for index in range(30)
+    ]
+    _seed(service, 'expenses', rows)
+
+    items, _ = _all_pages(lambda **kw: service.get_expenses(UID, category='Food', **kw), 4)
+
+    assert sorted(item['id'] for item in items) == sorted(doc_id for doc_id, data in rows if data['category'] == 'Food')
+
+
+def test_projection_keeps_the_cursor_fields(service):
+    _seed(service, 'expenses', [
+        (f'exp{index:03d}', {'amount': index, 'category': 'Food', 'note': 'x', 'created_at': SAME_TIME})
+        for index in range(5)
+    ])
+
+    page, cursor = service.get_expenses(UID, limit=2, fields=['amount'])
+
+    assert [set(item) for item in page] == [{'amount', 'created_at', 'id'}] * 2
+    assert decode_cursor(cursor) == (SAME_TIME, page[-1]['id'])
+
+
+def test_short_page_has_no_next_cursor(service):
+    _seed(service, 'expenses', [('exp1', {'amount': 1, 'created_at': SAME_TIME})])
+
+    page, cursor = service.get_expenses(UID, limit=5)
+
+    assert [item['id'] for item in page] == ['exp1']
+    assert cursor is None
+
+
+def test_ai_tips_history_pages_through_equal_timestamps(service):
+    rows = [(f'tip{index:03d}', {'tip': f'Tip {index}', 'created_at': SAME_TIME}) for index in range(23)]
+    _seed(service, 'ai_tips', rows)
+
+    items, _ = _all_pages(lambda **kw: service.get_ai_tips_history(UID, **kw), 5)
+
+    assert [item['id'] for item in items] == sorted((doc_id for doc_id, _ in rows), reverse=True)
@@ -0,0 +1,171 @@
+import math
+import sys
+
+import pytest
+
+from utils import prompts
+from utils.prompts import PromptTemplate, count_message_tokens, count_tokens
+
+
+class FakeEncoding:
+    """
+    One token per word
+    """
+
+    def encode(self, text):
+        return text.split()
+
+
+@pytest.fixture
+def no_tiktoken(monkeypatch):
+    # A None entry makes `import tiktoken` raise ImportError
+    monkeypatch.setitem(sys.modules, 'tiktoken', None)
+    monkeypatch.setattr(prompts, '_encoding', None)
+    monkeypatch.setattr(prompts, '_encoding_loaded', False)
+
+
+def _template(**kwargs):
+    return PromptTemplate('test', """
+        Budget: ${budget}
+          Topic: {topic} ({topic})
+        """, section_tokens={'tip': 100, 'explanation': 60}, **kwargs)
+
+
+def test_template_is_compiled_once():
+    template = _template()
+
+    assert template.text == "Budget: ${budget}\n  Topic: {topic} ({topic})"
+    assert template.fields == ('budget', 'topic')
+    assert template.sections == ('tip', 'explanation')
+    assert template.ceiling == 160
+    assert template.static_tokens == count_tokens("Budget: $\n  Topic:  ()")
+    assert template.render(budget=500, topic='rent') == "Budget: $500\n  Topic: rent (rent)"
+
+
+def test_render_requires_every_field():
+    with pytest.raises(KeyError):
+        _template().render(budget=500)
+
+
+def test_floor_never_exceeds_the_ceiling():
+    assert _template(floor=500).floor == 160
+
+
+def test_max_tokens_is_the_ceiling_until_enough_history():
+    template = _template(min_samples=5)
+
+    for _ in range(4):
+        template.record_completion(20)
+        assert template.max_tokens() == 160
+
+    template.record_completion(20)
+    assert template.max_tokens() == 64
+
+
+def test_max_tokens_follows_the_p95_with_headroom():
+    template = _template(min_samples=20, floor=10)
+    for length in range(1, 101):
+        template.record_completion(length)
+
+    # p95 of 1..100 is 96; 96 * 1.25 = 120
+    assert template.max_tokens() == 120
+
+    for _ in range(100):
+        template.record_completion(200)
+    assert template.max_tokens() == 160
+
+
+def test_history_window_forgets_old_completions():
+    template = _template(window=10, min_samples=10, floor=10)
+    for _ in range(10):
+        template.record_completion(150)
+    for _ in range(10):
+        template.record_completion(40)
+
+    assert template.max_tokens() == 50
+    assert template.get_stats()['samples'] == 10
+
+
+def test_truncated_completions_grow_the_budget_back():
+    template = _template(window=20, min_samples=20, floor=10)
+    for _ in range(20):
+        template.record_completion(40)
+    assert template.max_tokens() == 50
+
+    # Cut off at 50 tokens: recorded as the ceiling, not as 50
+    for _ in range(2):
+        template.record_completion(50, truncated=True)
+
+    stats = template.get_stats()
+    assert stats['max_tokens'] == 160
+    assert stats['truncated'] == 2
+
+
+def test_insights_prompt_fields_and_budget():
+    pytest.importorskip('openai')
+    from services.openai_service import INSIGHTS_PROMPT, SECTION_MARKERS
+
+    assert INSIGHTS_PROMPT.fields == ('budget', 'spent', 'goal', 'debt', 'topic')
+    # Every section the response is parsed into has an output budget
+    assert set(INSIGHTS_PROMPT.sections) == {key for _, key in SECTION_MARKERS}
+    assert INSIGHTS_PROMPT.ceiling == 350
+
+
+def test_token_count_falls_back_to_an_estimate_without_tiktoken(no_tiktoken):
+    assert count_tokens('') == 0
+    assert count_tokens('abc') == 1
+    assert count_tokens('x' * 401) == math.ceil(401 / 4)
+    assert prompts._get_encoding() is None
+    # The failed import is not retried on every call
+    assert prompts._encoding_loaded
+
+
+def test_token_count_uses_the_encoding_when_available(monkeypatch):
+    monkeypatch.setattr(prompts, '_encoding', FakeEncoding())
+    monkeypatch.setattr(prompts, '_encoding_loaded', True)
+
+    assert count_tokens('save a little every week') == 5
+
+
+def test_message_tokens_include_the_chat_overhead(no_tiktoken):
+    messages = [{'role': 'system', 'content': 'x' * 40}, {'role': 'user', 'content': 'x' * 8}]
+
+    # 3 for the reply, then 3 + role + content per message
+    assert count_message_tokens(messages) == 3 + (3 + 2 + 10) + (3 + 1 + 2)
+
+
+def test_completion_params_never_ask_for_more_than_the_context(monkeypatch, no_tiktoken):
+    pytest.importorskip('openai')
+    from services import openai_service
+
+    monkeypatch.setattr(openai_service, 'INSIGHTS_PROMPT', _template())
+    service = openai_service.OpenAIService(api_key='test', cache_ttl=0)
+    prompt = service._create_financial_prompt(500, 100, 50, 0, 'rent')
+
+    params, prompt_tokens = service._completion_params(prompt)
+    assert params['max_tokens'] == 160
+    assert prompt_tokens == count_message_tokens(params['messages'])
+
+    monkeypatch.setattr(openai_service, 'MODEL_CONTEXT_TOKENS', prompt_tokens + 30)
+    assert service._completion_params(prompt)[0]['max_tokens'] == 30
+
+    monkeypatch.setattr(openai_service, 'MODEL_CONTEXT_TOKENS', prompt_tokens - 5)
+    assert service._completion_params(prompt)[0]['max_tokens'] == 1
+
+
+def test_completion_usage_feeds_the_budget(monkeypatch, no_tiktoken):
+    pytest.importorskip('openai')
+    from services import openai_service
+
+    template = _template(min_samples=2, floor=10)
+    monkeypatch.setattr(openai_service, 'INSIGHTS_PROMPT', template)
+    service = openai_service.OpenAIService(api_key='test', cache_ttl=0)
+    params, prompt_tokens = service._completion_params('prompt')
+
+    # Reported usage wins; streams without usage count the text
+    service._record_usage(params, prompt_tokens, {'prompt_tokens': 90, 'completion_tokens': 40}, 'ignored', 'stop')
+    service._record_usage(params, prompt_tokens, None, 'x' * 160, 'stop')
+
+    assert template.max_tokens() == 50
+    service._record_usage(params, prompt_tokens, None, 'x' * 40, 'length')
+    assert template.get_stats()['truncated'] == 1
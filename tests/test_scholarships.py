@@ -0,0 +1,217 @@
+import json
+import random
+import re
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from services.scholarship_service import NEED_LEVELS, ScholarshipService
+
+NAME_WORDS = ['Future', 'Leaders', 'STEM', 'Grant', 'Scholarship', 'Award', 'Golden', 'State',
+              'Community', 'Service', 'First', 'Generation', 'Engineering', 'Nursing', 'Arts']
+ELIGIBILITY_WORDS = ['students', 'residents', 'volunteer', 'financial', 'need', 'gpa', 'transfer',
+                     'veterans', 'women', 'rural', 'engineers', 'engine']
+MAJORS = ['computer science', 'engineering', 'nursing', 'biology', 'music']
+STATES = ['CA', 'NY', 'TX', 'wa']
+CATEGORIES = ['Merit', 'Need-based', 'Diversity', 'Service']
+START = date(2030, 1, 1)
+
+
+def _catalog(seed=11, count=150):
+    rng = random.Random(seed)
+    items = []
+    for index in range(count):
+        items.append({
+            "id": f"sch-{index:04d}",
+            "name": " ".join(rng.sample(NAME_WORDS, rng.randint(2, 4))),
+            # Repeated amounts and deadlines exercise the tie-breaks
+            "amount": rng.choice([500, 1000, 1000, 2500, 5000, 7500]),
+            "deadline": None if rng.random() < 0.1 else (START + timedelta(days=rng.randrange(0, 60))).isoformat(),
+            "eligibility": " ".join(rng.sample(ELIGIBILITY_WORDS, 3)),
+            "category": rng.choice(CATEGORIES),
+            "need_level": rng.choice(NEED_LEVELS),
+            "majors": rng.sample(MAJORS, rng.choice([0, 0, 1, 2])),
+            "states": rng.sample(STATES, rng.choice([0, 0, 1])),
+            "link": "#"
+        })
+    return items
+
+
+CATALOG = _catalog()
+
+
+@pytest.fixture(scope='module')
+def service(tmp_path_factory):
+    path = tmp_path_factory.mktemp('catalog') / 'scholarships.json'
+    path.write_text(json.dumps(CATALOG))
+    return ScholarshipService(str(path))
+
+
+def _tokens(text):
+    return set(re.findall(r'[a-z0-9]+', text.lower()))
+
+
+def _brute_force(query=None, need=None, major=None, state=None, category=None,
+                 deadline_after=None, deadline_before=None, min_amount=None, sort='relevance'):
+    """
+    Filter and order the fixture catalog one scholarship at a time
+    """
+    words = re.findall(r'[a-z0-9]+', (query or '').lower())
+    matches = []
+    for item in CATALOG:
+        deadline = date.fromisoformat(item['deadline']) if item['deadline'] else date.max
+        if deadline < date.fromisoformat(deadline_after):
+            continue
+        if deadline_before and deadline > date.fromisoformat(deadline_before):
+            continue
+        if need is not None and NEED_LEVELS.index(item['need_level']) > NEED_LEVELS.index(need):
+            continue
+        if major and item['majors'] and major.lower() not in [m.lower() for m in item['majors']]:
+            continue
+        if state and item['states'] and state.upper() not in [s.upper() for s in item['states']]:
+            continue
+        if category and item['category'].lower() != category.lower():
+            continue
+        if min_amount is not None and item['amount'] < min_amount:
+            continue
+
+        text = _tokens(" ".join([item['name'], item['eligibility'], item['category']] + item['majors']))
+        name = _tokens(item['name'])
+        score = 0
+        for position, word in enumerate(words):
+            def has(tokens):
+                if position == len(words) - 1:
+                    return any(token.startswith(word) for token in tokens)
+                return word in tokens
+            if not has(text):
+                break
+            score += 1 + has(name)
+        else:
+            matches.append((item, deadline, score))
+
+    # Catalog order is deadline order with the ID as tie-break
+    matches.sort(key=lambda match: (match[1], match[0]['id']))
+    if sort == 'amount' or (sort == 'relevance' and not words):
+        matches.sort(key=lambda match: -match[0]['amount'])
+    elif sort == 'relevance':
+        matches.sort(key=lambda match: (-match[2], -match[0]['amount']))
+    return [match[0]['id'] for match in matches]
+
+
+def _all_pages(service, limit, **filters):
+    ids, offset, total = [], 0, None
+    while offset is not None:
+        page = service.search(limit=limit, offset=offset, **filters)
+        assert total is None or page['total'] == total
+        total = page['total']
+        assert len(page['scholarships']) <= limit
+        ids.extend(item['id'] for item in page['scholarships'])
+        offset = page['next_offset']
+    assert len(ids) == total
+    return ids
+
+
+FILTERS = [
+    {},
+    {'need': 'low'},
+    {'need': 'high', 'major': 'Nursing'},
+    {'state': 'wa'},
+    {'state': 'CA', 'category': 'merit'},
+    {'min_amount': 2500},
+    {'min_amount': 0, 'deadline_before': (START + timedelta(days=20)).isoformat()},
+    {'deadline_after': (START + timedelta(days=30)).isoformat()},
+    {'query': 'grant'},
+    {'query': 'eng'},
+    {'query': 'golden sta'},
+    {'query': 'students engine', 'need': 'medium'},
+    {'query': 'scholarship', 'major': 'music', 'state': 'NY', 'min_amount': 1000},
+    {'query': 'nothingmatches'},
+]
+
+
+@pytest.mark.parametrize('sort', ['relevance', 'amount', 'deadline'])
+@pytest.mark.parametrize('filters', FILTERS)
+def test_search_matches_a_brute_force_filter(service, filters, sort):
+    filters = dict(filters, sort=sort)
+    filters.setdefault('deadline_after', START.isoformat())
+
+    expected = _brute_force(**filters)
+
+    assert _all_pages(service, 1000, **filters) == expected
+    # Paging with small pages gives the same order without gaps or repeats
+    assert _all_pages(service, 7, **filters) == expected
+
+
+def test_offset_past_the_end_is_empty(service):
+    page = service.search(deadline_after=START.isoformat(), offset=len(CATALOG) + 5)
+
+    assert page['scholarships'] == []
+    assert page['total'] == len(CATALOG)
+    assert page['next_offset'] is None
+
+
+def test_sqlite_catalog_matches_json(service, tmp_path):
+    path = tmp_path / 'scholarships.db'
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE scholarships (id TEXT, name TEXT, amount REAL, deadline TEXT, eligibility TEXT,"
+        " category TEXT, need_level TEXT, majors TEXT, states TEXT, link TEXT)"
+    )
+    connection.executemany(
+        "INSERT INTO scholarships VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [(item['id'], item['name'], item['amount'], item['deadline'], item['eligibility'], item['category'],
+          item['need_level'], ",".join(item['majors']), ",".join(item['states']), item['link'])
+         for item in CATALOG]
+    )
+    connection.commit()
+    connection.close()
+
+    sqlite_service = ScholarshipService(str(path))
+
+    for filters in FILTERS:
+        filters = dict(filters, deadline_after=START.isoformat())
+        assert _all_pages(sqlite_service, 1000, **filters) == _all_pages(service, 1000, **filters)
+
+
+@pytest.mark.parametrize('filters', [
+    {'need': 'extreme'},
+    {'sort': 'newest'},
+    {'deadline_after': '2030-02-30'},
+    {'deadline_before': 'soon'},
+    {'min_amount': float('nan')},
+    {'min_amount': float('inf')},
+])
+def test_invalid_filters_are_rejected(service, filters):
+    with pytest.raises(ValueError):
+        service.search(**filters)
+
+
+@pytest.mark.parametrize('min_amount', ['inf', '-inf', 'nan', '-5', 'lots'])
+def test_endpoint_rejects_bad_min_amounts(service, min_amount):
+    pytest.importorskip('quart')
+    from app_fake import call, make_app
+
+    status, body, _ = call(make_app(scholarship_service=service), 'GET', f'/api/scholarships?min_amount={min_amount}')
+
+    assert status == 400
+    assert 'min_amount' in json.loads(body)['error']
+
+
+def test_endpoint_pages_through_the_catalog(service):
+    pytest.importorskip('quart')
+    from app_fake import call, make_app
+    app = make_app(scholarship_service=service)
+    query = f'deadline_after={START.isoformat()}&min_amount=1000&sort=amount&limit=25'
+
+    ids, offset = [], 0
+    while offset is not None:
+        status, body, _ = call(app, 'GET', f'/api/scholarships?{query}&offset={offset}')
+        assert status == 200
+        page = json.loads(body)
+        ids.extend(item['id'] for item in page['scholarships'])
+        offset = page['next_offset']
+
+    assert ids == _brute_force(deadline_after=START.isoformat(), min_amount=1000, sort='amount')
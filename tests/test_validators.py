@@ -0,0 +1,155 @@
+import pytest
+
+from utils import schema
+from utils.validators import (
+    EXPENSE_SCHEMA, INSIGHTS_REQUEST_SCHEMA, USER_SCHEMA,
+    validate_expense_batch, validate_expense_data, validate_insights_request, validate_user_data
+)
+
+VALID_USER = {
+    'firstName': 'Ada',
+    'lastName': 'Lovelace',
+    'email': 'ada@example.com',
+    'password': 'correct horse'
+}
+
+_MISSING = object()
+
+
+def _user(**changes):
+    data = dict(VALID_USER)
+    for key, value in changes.items():
+        if value is _MISSING:
+            data.pop(key, None)
+        else:
+            data[key] = value
+    return data
+
+
+USER_CASES = [
+    # Valid input
+    (VALID_USER, {}),
+    (_user(phone='(555) 123-4567', ssn='123-45-6789', budget='2500', savingsGoal=0), {}),
+    (_user(phone='', ssn=None, budget='', savingsGoal=None), {}),
+    # Missing fields
+    ({}, {
+        'firstName': 'firstName is required',
+        'lastName': 'lastName is required',
+        'email': 'email is required',
+        'password': 'password is required'
+    }),
+    (_user(firstName=_MISSING, password=''), {
+        'firstName': 'firstName is required',
+        'password': 'password is required'
+    }),
+    # Wrong types
+    (_user(email=12345), {'email': 'Invalid email format'}),
+    (_user(password=12345678), {'password': 'Password must be at least 8 characters long'}),
+    (_user(budget='lots'), {'budget': 'Budget must be a number'}),
+    (_user(budget=[100]), {'budget': 'Budget must be a number'}),
+    (_user(savingsGoal={'amount': 5}), {'savingsGoal': 'Savings goal must be a number'}),
+    (_user(budget='nan'), {'budget': 'Budget must be a number'}),
+    (_user(savingsGoal='inf'), {'savingsGoal': 'Savings goal must be a number'}),
+    # Format and boundary values
+    (_user(email='ada@example'), {'email': 'Invalid email format'}),
+    (_user(email='a@b.co'), {}),
+    (_user(password='1234567'), {'password': 'Password must be at least 8 characters long'}),
+    (_user(password='12345678'), {}),
+    (_user(phone='555-123-456'), {'phone': 'Phone number must be 10 digits'}),
+    (_user(phone='555-123-45678'), {'phone': 'Phone number must be 10 digits'}),
+    (_user(phone=5551234567), {}),
+    (_user(ssn='12345678'), {'ssn': 'SSN must be 9 digits'}),
+    (_user(budget='-0.01'), {'budget': 'Budget cannot be negative'}),
+    (_user(budget='0.0'), {}),
+    (_user(savingsGoal=-1), {'savingsGoal': 'Savings goal cannot be negative'}),
+]
+
+INSIGHTS_CASES = [
+    # Valid input
+    ({}, {}),
+    ({'budget': 1000, 'spent': '250.5', 'goal': 0, 'debt': '0', 'topic': 'saving'}, {}),
+    # Wrong types
+    ({'budget': None}, {'budget': 'Budget must be a number'}),
+    ({'spent': 'a lot'}, {'spent': 'Spent amount must be a number'}),
+    ({'goal': []}, {'goal': 'Goal amount must be a number'}),
+    ({'debt': '-inf'}, {'debt': 'Debt amount must be a number'}),
+    ({'topic': ['budgeting'] * 101}, {'topic': 'Topic is too long (max 100 characters)'}),
+    # Boundary values
+    ({'budget': -0.01, 'spent': -1, 'goal': '-5', 'debt': -100}, {
+        'budget': 'Budget cannot be negative',
+        'spent': 'Spent amount cannot be negative',
+        'goal': 'Goal amount cannot be negative',
+        'debt': 'Debt amount cannot be negative'
+    }),
+    ({'topic': 'x' * 100}, {}),
+    ({'topic': 'x' * 101}, {'topic': 'Topic is too long (max 100 characters)'}),
+]
+
+EXPENSE_CASES = [
+    # Valid input
+    ({'amount': 12.5, 'category': 'Food'}, {}),
+    ({'amount': '0.01', 'category': 'Food', 'date': '2025-01-31'}, {}),
+    ({'amount': 1, 'category': 'Food', 'date': '2025-01-31T22:00:00+00:00'}, {}),
+    # Missing fields
+    ({}, {'amount': 'amount is required', 'category': 'category is required'}),
+    ({'amount': '', 'category': ''}, {'amount': 'Amount must be a number', 'category': 'category is required'}),
+    ({'amount': None, 'category': 'Food'}, {'amount': 'Amount must be a number'}),
+    # Wrong types
+    ({'amount': 'twelve', 'category': 'Food'}, {'amount': 'Amount must be a number'}),
+    ({'amount': {'value': 1}, 'category': 'Food'}, {'amount': 'Amount must be a number'}),
+    ({'amount': 'NaN', 'category': 'Food'}, {'amount': 'Amount must be a number'}),
+    ({'amount': float('inf'), 'category': 'Food'}, {'amount': 'Amount must be a number'}),
+    ({'amount': 1, 'category': 'Food', 'date': 20250131},
+     {'date': 'Invalid date format. Use ISO format (YYYY-MM-DD)'}),
+    # Boundary values
+    ({'amount': 0, 'category': 'Food'}, {'amount': 'Amount must be positive'}),
+    ({'amount': '-0.01', 'category': 'Food'}, {'amount': 'Amount must be positive'}),
+    ({'amount': 1, 'category': 'Food', 'date': '2025-02-30'},
+     {'date': 'Invalid date format. Use ISO format (YYYY-MM-DD)'}),
+    ({'amount': 1, 'category': 'Food', 'date': ''}, {}),
+]
+
+
+def _interpret(rules_schema, data):
+    """
+    Run a schema rule by rule, without compiling it
+    """
+    errors = {}
+    for name, rules in rules_schema:
+        for rule in rules:
+            if rule.condition == schema.ALWAYS:
+                if name not in data or not data[name]:
+                    errors[name] = rule(None, name)
+                continue
+            if name not in data or (rule.condition == schema.TRUTHY and not data[name]):
+                continue
+            message = rule(data[name], name)
+            if message:
+                errors[name] = message
+    return errors
+
+
+@pytest.mark.parametrize('data, expected', USER_CASES)
+def test_user_schema(data, expected):
+    assert validate_user_data(data) == expected
+    assert _interpret(USER_SCHEMA, data) == expected
+
+
+@pytest.mark.parametrize('data, expected', INSIGHTS_CASES)
+def test_insights_request_schema(data, expected):
+    assert validate_insights_request(data) == expected
+    assert _interpret(INSIGHTS_REQUEST_SCHEMA, data) == expected
+
+
+@pytest.mark.parametrize('data, expected', EXPENSE_CASES)
+def test_expense_schema(data, expected):
+    assert validate_expense_data(data) == expected
+    assert _interpret(EXPENSE_SCHEMA, data) == expected
+
+
+def test_expense_batch_matches_single_records():
+    records = [data for data, _ in EXPENSE_CASES] + ['not a record', None]
+
+    errors = validate_expense_batch(records)
+
+    assert errors == [expected for _, expected in EXPENSE_CASES] + [{'record': 'Must be an object'}] * 2
@@ -0,0 +1,160 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip('firebase_admin')
+
+from firestore_fake import FakeAsyncFirestore, FakeFirestore
+from services.async_firebase_service import AsyncFirebaseService
+from services.firebase_service import FirebaseService
+from services.write_behind import AsyncWriteBehindQueue, WriteBehindQueue
+
+UID = 'user-1'
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _tips(db):
+    return db.collection('users').document(UID).collection('ai_tips')
+
+
+def _expenses(count):
+    return [
+        {
+            "amount": float(index % 50 + 1),
+            "category": ('Food', 'Rent', 'Books')[index % 3],
+            "created_at": START + timedelta(hours=index * 7)
+        }
+        for index in range(count)
+    ]
+
+
+def test_full_queue_writes_directly():
+    db = FakeFirestore()
+    write_queue = WriteBehindQueue(db, max_queue_size=2)
+
+    for index in range(3):
+        write_queue.enqueue(_tips(db).document(f'tip{index}'), {'tip': index})
+
+    # Only the overflowing write has landed; the flusher was never started
+    assert list(db.docs) == [f'users/{UID}/ai_tips/tip2']
+    assert write_queue.get_stats()['queue_depth'] == 2
+
+
+def test_async_queue_is_bounded_like_the_thread_queue():
+    db = FakeAsyncFirestore()
+    write_queue = AsyncWriteBehindQueue(db, max_queue_size=2)
+
+    async def run():
+        # No await between the first enqueues, so the flusher has not run yet
+        for index in range(3):
+            await write_queue.enqueue(_tips(db).document(f'tip{index}'), {'tip': index})
+        assert list(db.sync.docs) == [f'users/{UID}/ai_tips/tip2']
+        await write_queue.stop()
+
+    asyncio.run(run())
+
+    assert sorted(db.sync.docs) == [f'users/{UID}/ai_tips/tip{index}' for index in range(3)]
+    stats = write_queue.get_stats()
+    assert stats['queue_depth'] == 0
+    assert (stats['enqueued'], stats['written'], stats['commits'], stats['failed']) == (2, 2, 1, 0)
+
+
+def test_async_queue_commits_at_most_one_batch_per_500_writes():
+    db = FakeAsyncFirestore()
+    write_queue = AsyncWriteBehindQueue(db)
+
+    async def run():
+        for index in range(1200):
+            await write_queue.enqueue(_tips(db).document(f'tip{index:04d}'), {'tip': index})
+        await write_queue.stop()
+
+    asyncio.run(run())
+
+    # FakeBatch rejects commits of more than 500 writes
+    assert len(db.sync.docs) == 1200
+    assert db.sync.commits == 3
+    assert write_queue.get_stats()['written'] == 1200
+
+
+def test_async_queue_counts_writes_dropped_after_retries(monkeypatch):
+    db = FakeAsyncFirestore()
+    db.sync.fail_after_commits = 0
+    write_queue = AsyncWriteBehindQueue(db, max_retries=3)
+    attempts = []
+    monkeypatch.setattr(write_queue, '_backoff', lambda attempt: attempts.append(attempt) or 0)
+
+    async def run():
+        for index in range(4):
+            await write_queue.enqueue(_tips(db).document(f'tip{index}'), {'tip': index})
+        await write_queue.stop()
+
+    asyncio.run(run())
+
+    assert attempts == [0, 1, 2]
+    assert db.sync.docs == {}
+    stats = write_queue.get_stats()
+    assert (stats['enqueued'], stats['written'], stats['failed']) == (4, 0, 4)
+
+
+def test_async_queue_groups_writes_that_arrive_during_a_commit():
+    db = FakeAsyncFirestore()
+    write_queue = AsyncWriteBehindQueue(db)
+
+    async def run():
+        await write_queue.enqueue(_tips(db).document('first'), {'tip': 0})
+        await asyncio.sleep(0)
+        for index in range(1, 10):
+            await write_queue.enqueue(_tips(db).document(f'tip{index}'), {'tip': index})
+        await write_queue.stop()
+
+    asyncio.run(run())
+
+    assert len(db.sync.docs) == 10
+    assert db.sync.commits == 2
+
+
+def test_async_service_matches_the_sync_service():
+    sync_service = FirebaseService(connect=False)
+    sync_service.db = FakeFirestore()
+    async_service = AsyncFirebaseService(db=FakeAsyncFirestore())
+    expenses = _expenses(700)
+
+    async def run():
+        ids = await async_service.add_expenses_batch(UID, [dict(e) for e in expenses[1:]])
+        first = await async_service.add_expense(UID, dict(expenses[0]))
+        pages, cursor = [], None
+        while True:
+            page, cursor = await async_service.get_expenses(UID, limit=64, category='Food', cursor=cursor)
+            pages.append(page)
+            if cursor is None:
+                break
+        summary = await async_service.get_expense_summary(UID, 'year')
+        history = await async_service.get_expense_history(UID, start_date=START + timedelta(days=30))
+        written = await async_service.rebuild_expense_rollups(UID)
+        tip_ids = await async_service.save_ai_tips_batch(UID, [{'tip': index, 'created_at': START} for index in range(3)])
+        tips, _ = await async_service.get_ai_tips_history(UID, limit=10)
+        await async_service.close()
+        return ids, first, pages, summary, history, written, tip_ids, tips
+
+    ids, first, pages, summary, history, written, tip_ids, tips = asyncio.run(run())
+
+    assert len(ids) == 699 and first
+    sync_service.add_expenses_batch(UID, [dict(e) for e in expenses])
+    expected_pages, cursor = [], None
+    while True:
+        page, cursor = sync_service.get_expenses(UID, limit=64, category='Food', cursor=cursor)
+        expected_pages.append(page)
+        if cursor is None:
+            break
+
+    def strip(pages):
+        return [[{k: v for k, v in item.items() if k != 'id'} for item in page] for page in pages]
+
+    assert strip(pages) == strip(expected_pages)
+    assert summary == sync_service.get_expense_summary(UID, 'year')
+    expected_history = sync_service.get_expense_history(UID, start_date=START + timedelta(days=30))
+    assert sorted(history['amounts']) == sorted(expected_history['amounts'])
+    assert written == sync_service.rebuild_expense_rollups(UID)
+    assert len(tip_ids) == 3
+    assert sorted(tip['id'] for tip in tips) == sorted(tip_ids)
@@ -0,0 +1,183 @@
+import math
+import time
+import threading
+from collections import OrderedDict
+
+
+class MemoryBucketStore:
+    """
+    In-process token bucket store, keyed by client (e.g. uid)
+
+    Any object with the same consume() / get_stats() methods can replace it,
+    e.g. a Redis-backed store that shares buckets between workers.
+    """
+
+    def __init__(self, max_keys=100000):
+        """
+        Initialize the store
+
+        Args:
+            max_keys (int, optional): Buckets kept before the least recently used
+                one is dropped (a dropped bucket starts full again)
+        """
+        self.max_keys = max_keys
+
+        # key -> (tokens, updated_at)
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.evictions = 0
+
+    def consume(self, key, rate, capacity, cost=1):
+        """
+        Refill a bucket for the time elapsed and take cost tokens from it
+
+        A cost larger than the capacity is taken once the bucket is full and
+        leaves it in debt, so the client waits for the whole cost to refill.
+
+        Args:
+            key (hashable): Bucket key
+            rate (float): Tokens added per second (must be positive)
+            capacity (float): Bucket size (burst allowance)
+            cost (float, optional): Tokens this request needs
+
+        Returns:
+            float: 0.0 if the tokens were taken, otherwise seconds until enough
+                tokens will be available
+
+        Raises:
+            ValueError: If rate is not positive
+        """
+        if not rate > 0:
+            raise ValueError(f"Token bucket rate must be positive, got {rate}")
+
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+
+            needed = min(cost, capacity)
+            if tokens >= needed:
+                tokens -= cost
+                wait = 0.0
+            else:
+                wait = (needed - tokens) / rate
+
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+            return wait
+
+    def get_stats(self):
+        """
+        Get store statistics
+
+        Returns:
+            dict: Tracked buckets and evictions
+        """
+        with self._lock:
+            return {
+                "buckets": len(self._buckets),
+                "evictions": self.evictions
+            }
+
+
+class AdmissionController:
+    """
+    Admission control for expensive endpoints: a token bucket per client
+    plus a cap on requests in flight in this process. Rejections are
+    immediate so callers can answer 429 instead of queueing.
+    """
+
+    def __init__(self, store=None, rate_per_minute=10, burst=5, max_in_flight=64, shed_retry_after=1):
+        """
+        Initialize the controller
+
+        Args:
+            store (object, optional): Bucket store (defaults to MemoryBucketStore)
+            rate_per_minute (float, optional): Sustained requests per client per minute
+            burst (int, optional): Requests a client may make back to back
+            max_in_flight (int, optional): Admitted requests running at once in this process
+            shed_retry_after (int, optional): Retry-After seconds when the in-flight cap is hit
+
+        Raises:
+            ValueError: If rate_per_minute is not positive or burst is below 1
+                (a misconfiguration fails at startup, not on the first request)
+        """
+        if not rate_per_minute > 0:
+            raise ValueError(f"rate_per_minute must be positive, got {rate_per_minute}")
+        if burst < 1:
+            raise ValueError(f"burst must be at least 1, got {burst}")
+
+        self.store = store or MemoryBucketStore()
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.shed_retry_after = shed_retry_after
+        self._lock = threading.Lock()
+
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected_rate = 0
+        self.rejected_in_flight = 0
+
+    def try_acquire(self, key, cost=1):
+        """
+        Admit a request or tell the caller how long to back off
+
+        Admitted requests hold an in-flight slot until release() is called.
+
+        Args:
+            key (hashable): Client key (e.g. uid)
+            cost (int, optional): Tokens to charge (e.g. one per batch item); a cost
+                above the burst size puts the client's bucket into debt
+
+        Returns:
+            int: 0 if admitted, otherwise the Retry-After value in seconds
+        """
+        # Shed on the global cap first so a rejected request costs no tokens
+        with self._lock:
+            if self.in_flight >= self.max_in_flight:
+                self.rejected_in_flight += 1
+                return self.shed_retry_after
+            self.in_flight += 1
+
+        wait = self.store.consume(key, self.rate, self.burst, cost)
+        if wait > 0:
+            with self._lock:
+                self.in_flight -= 1
+                self.rejected_rate += 1
+            return max(1, math.ceil(wait))
+
+        with self._lock:
+            self.admitted += 1
+        return 0
+
+    def release(self):
+        """
+        Free the in-flight slot taken by an admitted request
+        """
+        with self._lock:
+            self.in_flight -= 1
+
+    def get_stats(self):
+        """
+        Get admission statistics
+
+        Returns:
+            dict: Limits, in-flight requests, admitted/rejected counts and store stats
+        """
+        with self._lock:
+            stats = {
+                "rate_per_minute": self.rate * 60,
+                "burst": self.burst,
+                "max_in_flight": self.max_in_flight,
+                "in_flight": self.in_flight,
+                "admitted": self.admitted,
+                "rejected_rate": self.rejected_rate,
+                "rejected_in_flight": self.rejected_in_flight
+            }
+        stats.update(self.store.get_stats())
+        return stats
@@ -0,0 +1,255 @@
+import asyncio
+import time
+import weakref
+import threading
+
+
+class ConcurrencyLimiter:
+    """
+    Semaphore that caps concurrent work and records queue depth and wait time
+    """
+
+    def __init__(self, limit):
+        """
+        Initialize the limiter
+
+        Args:
+            limit (int): Maximum number of concurrent holders
+        """
+        self.limit = limit
+        self._semaphore = threading.Semaphore(limit)
+        self._lock = threading.Lock()
+
+        self.waiting = 0
+        self.active = 0
+        self.acquired = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def __enter__(self):
+        start = time.perf_counter()
+        with self._lock:
+            self.waiting += 1
+
+        self._semaphore.acquire()
+        wait = time.perf_counter() - start
+
+        with self._lock:
+            self.waiting -= 1
+            self.active += 1
+            self.acquired += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        with self._lock:
+            self.active -= 1
+        self._semaphore.release()
+        return False
+
+    def get_stats(self):
+        """
+        Get limiter statistics
+
+        Returns:
+            dict: Limit, queue depth, active holders and wait times (seconds)
+        """
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "queue_depth": self.waiting,
+                "active": self.active,
+                "acquired": self.acquired,
+                "avg_wait": self.total_wait / self.acquired if self.acquired else 0.0,
+                "max_wait": self.max_wait
+            }
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into a single execution
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """
+        Run fn once for all concurrent callers that share the same key
+
+        Args:
+            key (hashable): Key identifying identical work
+            fn (callable): Zero-argument function doing the work
+
+        Returns:
+            object: Result of fn (shared by all callers)
+
+        Raises:
+            Exception: Whatever fn raised, re-raised in every caller
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def get_stats(self):
+        """
+        Get coalescing statistics
+
+        Returns:
+            dict: In-flight keys, executed and coalesced call counts
+        """
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "executed": self.executed,
+                "coalesced": self.coalesced
+            }
+
+
+class AsyncConcurrencyLimiter(ConcurrencyLimiter):
+    """
+    asyncio version of ConcurrencyLimiter: waiting callers suspend instead
+    of blocking a thread
+
+    An asyncio.Semaphore belongs to the loop it is first used on, so each
+    event loop gets its own, created inside it on first use; the limit
+    applies per loop (one per worker) and the statistics cover all of them.
+    """
+
+    def __init__(self, limit):
+        """
+        Initialize the limiter (safe at import time; no loop is needed)
+
+        Args:
+            limit (int): Maximum number of concurrent holders per event loop
+        """
+        super().__init__(limit)
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _loop_semaphore(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = self._semaphores[loop] = asyncio.Semaphore(self.limit)
+            return semaphore
+
+    async def __aenter__(self):
+        semaphore = self._loop_semaphore()
+        start = time.perf_counter()
+        with self._lock:
+            self.waiting += 1
+
+        try:
+            await semaphore.acquire()
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        wait = time.perf_counter() - start
+
+        with self._lock:
+            self.active += 1
+            self.acquired += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, tb):
+        with self._lock:
+            self.active -= 1
+        self._loop_semaphore().release()
+        return False
+
+
+class AsyncSingleFlight:
+    """
+    asyncio version of SingleFlight: concurrent coroutines with the same key
+    await a single execution
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        """
+        Await fn once for all concurrent callers that share the same key
+
+        Args:
+            key (hashable): Key identifying identical work
+            fn (callable): Zero-argument function returning an awaitable
+
+        Returns:
+            object: Result of fn (shared by all callers)
+
+        Raises:
+            Exception: Whatever fn raised, re-raised in every caller
+        """
+        task = self._calls.get(key)
+        if task is not None and task.get_loop() is not asyncio.get_running_loop():
+            # Left over from another event loop; it cannot be awaited from this one
+            task = None
+        if task is not None:
+            self.coalesced += 1
+        else:
+            # Run as a task so a cancelled leader does not cancel the followers
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self.executed += 1
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    def get_stats(self):
+        """
+        Get coalescing statistics
+
+        Returns:
+            dict: In-flight keys, executed and coalesced call counts
+        """
+        return {
+            "in_flight": len(self._calls),
+            "executed": self.executed,
+            "coalesced": self.coalesced
+        }
@@ -0,0 +1,69 @@
+import io
+import csv
+import json
+
+
+def detect_import_format(content_type, filename=None, explicit=None):
+    """
+    Work out the format of an expense upload
+
+    Args:
+        content_type (str): Content-Type of the upload
+        filename (str, optional): Uploaded file name
+        explicit (str, optional): Format given by the client ('csv' or 'ndjson')
+
+    Returns:
+        str: 'csv' or 'ndjson', or None if the format is not supported
+    """
+    if explicit:
+        explicit = explicit.lower()
+        return explicit if explicit in ('csv', 'ndjson') else None
+
+    content_type = (content_type or '').lower()
+    filename = (filename or '').lower()
+
+    if 'csv' in content_type or filename.endswith('.csv'):
+        return 'csv'
+    if 'ndjson' in content_type or 'jsonl' in content_type or filename.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    return None
+
+
+def iter_import_rows(stream, fmt, encoding='utf-8'):
+    """
+    Stream-parse an uploaded CSV or NDJSON file one row at a time
+
+    Args:
+        stream (file-like): Binary stream of the upload
+        fmt (str): 'csv' or 'ndjson'
+        encoding (str, optional): Text encoding of the upload
+
+    Yields:
+        tuple: (row_number, row_dict, parse_error) where exactly one of
+            row_dict and parse_error is None
+    """
+    text = io.TextIOWrapper(stream, encoding=encoding, errors='replace', newline='')
+
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        # Row 1 is the header
+        for row_number, row in enumerate(reader, start=2):
+            # Drop empty cells and columns beyond the header
+            row = {key.strip(): value.strip() for key, value in row.items()
+                   if key and isinstance(value, str) and value.strip()}
+            yield row_number, row, None
+        return
+
+    for row_number, line in enumerate(text, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield row_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield row_number, None, "Each line must be a JSON object"
+            continue
+        yield row_number, row, None
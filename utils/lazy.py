@@ -0,0 +1,179 @@
+import time
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class LazyService:
+    """
+    Proxy that builds a service on first use (or during warm-up) and then
+    forwards attribute access to it. Heavy imports and client setup live in
+    the factory, so they are not paid at import time.
+
+    Attribute access resolves synchronously; code on the event loop awaits
+    wait_ready() first so the factory runs on a worker thread instead.
+    """
+
+    def __init__(self, name, factory):
+        """
+        Initialize the proxy
+
+        Args:
+            name (str): Service name used in readiness reports
+            factory (callable): Builds and returns the service instance
+        """
+        self._lazy_name = name
+        self._lazy_factory = factory
+        self._lazy_instance = None
+        self._lazy_error = None
+        self._lazy_seconds = None
+        self._lazy_lock = threading.Lock()
+        # Shared by every coroutine waiting on the first resolution
+        self._lazy_task = None
+
+    def __getattr__(self, attr):
+        return getattr(self._lazy_resolve(), attr)
+
+    def _lazy_resolve(self):
+        instance = self._lazy_instance
+        if instance is not None:
+            return instance
+
+        with self._lazy_lock:
+            if self._lazy_instance is None:
+                start = time.perf_counter()
+                try:
+                    self._lazy_instance = self._lazy_factory()
+                    self._lazy_error = None
+                except Exception as e:
+                    # Left unresolved so the next use retries
+                    self._lazy_error = str(e)
+                    raise
+                finally:
+                    self._lazy_seconds = time.perf_counter() - start
+            return self._lazy_instance
+
+    async def _lazy_resolve_async(self):
+        instance = self._lazy_instance
+        if instance is not None:
+            return instance
+
+        # One worker thread per service waits on the factory, however many
+        # requests arrive while it runs
+        loop = asyncio.get_running_loop()
+        task = self._lazy_task
+        if task is None or task.get_loop() is not loop:
+            task = self._lazy_task = loop.create_task(asyncio.to_thread(self._lazy_resolve))
+            task.add_done_callback(self._lazy_task_done)
+        return await asyncio.shield(task)
+
+    def _lazy_task_done(self, task):
+        if self._lazy_task is task:
+            # A failed resolution is retried by the next waiter
+            self._lazy_task = None
+        if not task.cancelled():
+            # Marks the error as retrieved even if every waiter was cancelled
+            task.exception()
+
+
+def is_ready(service):
+    """
+    Whether a service can be used without blocking on initialization
+
+    Args:
+        service: LazyService proxy or plain service instance
+
+    Returns:
+        bool: True for plain instances and resolved proxies
+    """
+    return not isinstance(service, LazyService) or service._lazy_instance is not None
+
+
+def requires_services(*names):
+    """
+    Declare the services a view uses, so requests to it only wait for those
+    during warm-up (views without a declaration wait for every service)
+
+    Args:
+        *names (str): Service names as registered with the app (none: never wait)
+    """
+    def decorator(view):
+        view.required_services = names
+        return view
+    return decorator
+
+
+async def wait_ready(services):
+    """
+    Wait until every lazy service is initialized without blocking the event
+    loop (factories run on worker threads)
+
+    Args:
+        services (dict): Service name -> service (lazy or plain)
+
+    Returns:
+        dict: Service name -> error message for services that failed to initialize
+    """
+    pending = {name: service for name, service in services.items() if not is_ready(service)}
+    if not pending:
+        return {}
+    results = await asyncio.gather(
+        *(service._lazy_resolve_async() for service in pending.values()), return_exceptions=True
+    )
+    return {name: str(result) for name, result in zip(pending, results) if isinstance(result, Exception)}
+
+
+def get_readiness(services):
+    """
+    Report the initialization state of each service
+
+    Args:
+        services (dict): Service name -> service (lazy or plain)
+
+    Returns:
+        dict: Service name -> {"state": "ready"|"pending"|"failed", "init_seconds", "error"}
+    """
+    report = {}
+    for name, service in services.items():
+        if not isinstance(service, LazyService):
+            report[name] = {"state": "ready"}
+            continue
+        if service._lazy_instance is not None:
+            state = "ready"
+        elif service._lazy_error:
+            state = "failed"
+        else:
+            state = "pending"
+        report[name] = {
+            "state": state,
+            "init_seconds": service._lazy_seconds,
+            "error": service._lazy_error
+        }
+    return report
+
+
+def start_warm_up(services):
+    """
+    Initialize every lazy service on a background daemon thread, in order
+
+    Args:
+        services (dict): Service name -> service (lazy or plain)
+
+    Returns:
+        threading.Thread: The warm-up thread
+    """
+    def warm_up():
+        for name, service in services.items():
+            if is_ready(service):
+                continue
+            try:
+                service._lazy_resolve()
+                logger.info("Service %s ready in %.3fs", name, service._lazy_seconds)
+            except Exception as e:
+                logger.error("Error initializing service %s: %s", name, e)
+
+    thread = threading.Thread(target=warm_up, name='service-warm-up', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,185 @@
+import os
+import sys
+import copy
+import json
+import time
+import queue
+import atexit
+import hashlib
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+try:
+    from quart import g, has_request_context
+except ImportError:  # Allows use from scripts without Quart
+    g = None
+
+    def has_request_context():
+        return False
+
+# Attributes every LogRecord has; anything else was passed via `extra=`
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+_listener_pid = None
+
+
+def hash_uid(uid):
+    """
+    Hash a user ID so logs can be correlated without storing the raw ID
+
+    Args:
+        uid (str): Firebase user ID
+
+    Returns:
+        str: First 16 hex characters of the SHA-256 of the uid
+    """
+    return hashlib.sha256(uid.encode()).hexdigest()[:16]
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as one JSON object per line
+    """
+
+    def format(self, record):
+        entry = {
+            "ts": time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Adds the current request ID and hashed uid to records (runs on the
+    request thread, before the record is queued)
+    """
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = g.get('request_id')
+            record.uid_hash = g.get('uid_hash')
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Rate-limits repetitive records: per message template, the first `burst`
+    records in each window are kept, then only one in `sample_every`
+    """
+
+    def __init__(self, burst=10, sample_every=100, window=60.0, level=logging.WARNING):
+        super().__init__()
+        self.burst = burst
+        self.sample_every = sample_every
+        self.window = window
+        self.level = level
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno < self.level:
+            return True
+
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            window_start, count = self._counts.get(key, (now, 0))
+            if now - window_start > self.window:
+                window_start, count = now, 0
+            count += 1
+            self._counts[key] = (window_start, count)
+
+        if count <= self.burst:
+            return True
+        if (count - self.burst) % self.sample_every == 0:
+            record.sampled = True
+            record.suppressed = self.sample_every - 1
+            return True
+        return False
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler that drops records instead of blocking when the queue is full
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Only do the cheap work on the request thread; JSON encoding happens
+        # on the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(level=logging.INFO, stream=None, max_queue_size=10000):
+    """
+    Route all logging through an in-memory queue drained by a background
+    thread that writes JSON lines, so request threads never block on I/O
+
+    Args:
+        level (int, optional): Root log level
+        stream (file-like, optional): Output stream (defaults to stdout)
+        max_queue_size (int, optional): Records buffered before new ones are dropped
+
+    Returns:
+        NonBlockingQueueHandler: Handler installed on the root logger
+    """
+    global _listener, _listener_pid
+
+    log_queue = queue.Queue(maxsize=max_queue_size)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+    queue_handler.addFilter(SamplingFilter())
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, NonBlockingQueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    if _listener is None:
+        atexit.register(stop_logging)
+    else:
+        stop_logging()
+    # Called again in forked workers, where the parent's listener thread no longer exists
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener_pid = os.getpid()
+    _listener.start()
+
+    return queue_handler
+
+
+def stop_logging():
+    """
+    Write out records still in the queue and stop the listener thread
+    """
+    if _listener is not None and _listener_pid == os.getpid() and _listener._thread is not None:
+        _listener.stop()
@@ -0,0 +1,236 @@
+import time
+import bisect
+import inspect
+import itertools
+import logging
+import threading
+from functools import wraps
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from sub-millisecond CPU work up to slow LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    """
+    Monotonic counter with optional labels
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {value}" for key, value in items]
+
+
+class Gauge(Counter):
+    """
+    Gauge that can go up and down
+    """
+
+    kind = "gauge"
+
+    def dec(self, *label_values, amount=1):
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, value, *label_values):
+        with self._lock:
+            self._values[label_values] = value
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed buckets and optional labels
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [bucket counts..., +Inf count, sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+
+        lines = []
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                labels = _format_labels(self.labels + ("le",), key + (bound,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {series[-1]}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Process-wide registry of metrics rendered in Prometheus text format
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+        self.stage_latency = self.histogram(
+            'velora_stage_duration_seconds', 'Latency of instrumented stages', ['stage']
+        )
+        self.stage_in_flight = self.gauge(
+            'velora_stage_in_flight', 'Stage executions currently running', ['stage']
+        )
+        self.stage_errors = self.counter(
+            'velora_stage_errors_total', 'Stage executions that raised an exception', ['stage']
+        )
+
+    def counter(self, name, help_text, labels=()):
+        return self._register(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=()):
+        return self._register(Gauge(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def register_collector(self, collector):
+        """
+        Register a callable evaluated at scrape time
+
+        Args:
+            collector (callable): Returns a dict of gauge name -> numeric value
+        """
+        self._collectors.append(collector)
+
+    def span(self, stage):
+        """
+        Context manager that records latency, in-flight count and errors for a stage
+        """
+        return _Span(self, stage)
+
+    def timed(self, stage):
+        """
+        Decorator form of span() (coroutine functions are timed until they
+        complete, not just until the coroutine is created)
+        """
+        def decorator(func):
+            if inspect.iscoroutinefunction(func):
+                @wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with _Span(self, stage):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with _Span(self, stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def render(self, collectors=()):
+        """
+        Render every metric in the Prometheus text exposition format
+
+        Args:
+            collectors (list, optional): Scrape-time collectors owned by the
+                caller (e.g. one app's services), evaluated after the registry's own
+
+        Returns:
+            str: Exposition text
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+
+        for collector in itertools.chain(self._collectors, collectors):
+            try:
+                values = collector()
+            except Exception as e:
+                logger.error("Error collecting metrics: %s", e)
+                continue
+            for name, value in values.items():
+                if value is None:
+                    continue
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {float(value)}")
+
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+
+class _Span:
+    __slots__ = ('registry', 'stage', 'start')
+
+    def __init__(self, registry, stage):
+        self.registry = registry
+        self.stage = stage
+
+    def __enter__(self):
+        self.registry.stage_in_flight.inc(self.stage)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        elapsed = time.perf_counter() - self.start
+        self.registry.stage_latency.observe(elapsed, self.stage)
+        self.registry.stage_in_flight.dec(self.stage)
+        # A generator closed early by its consumer is not a failure
+        if exc_type is not None and not issubclass(exc_type, GeneratorExit):
+            self.registry.stage_errors.inc(self.stage)
+        return False
+
+
+# Default registry shared by the whole process
+metrics = MetricsRegistry()
+
+http_latency = metrics.histogram(
+    'velora_http_request_duration_seconds', 'HTTP request latency by route', ['method', 'route', 'status']
+)
+http_in_flight = metrics.gauge('velora_http_requests_in_flight', 'HTTP requests currently being handled')
+http_errors = metrics.counter(
+    'velora_http_request_errors_total', 'HTTP requests answered with a 5xx status', ['method', 'route']
+)
@@ -0,0 +1,61 @@
+import json
+import base64
+from datetime import datetime
+
+
+def encode_cursor(created_at, doc_id):
+    """
+    Encode the position of the last document in a page as an opaque cursor
+
+    Args:
+        created_at (datetime): created_at value of the last document
+        doc_id (str): ID of the last document
+
+    Returns:
+        str: URL-safe cursor string
+    """
+    payload = json.dumps({"t": created_at.isoformat(), "id": doc_id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor
+
+    Args:
+        cursor (str): Cursor string from a previous page
+
+    Returns:
+        tuple: (created_at datetime, document ID)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = datetime.fromisoformat(payload['t'])
+        doc_id = payload['id']
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+    # The ID becomes a document path segment, so it must be a single segment
+    if not isinstance(doc_id, str) or not doc_id or '/' in doc_id:
+        raise ValueError("Invalid cursor: bad document ID")
+    return created_at, doc_id
+
+
+def parse_fields(fields):
+    """
+    Parse a comma-separated field projection
+
+    Args:
+        fields (str): Comma-separated field names (e.g. "amount,category")
+
+    Returns:
+        list: Field names, or None when no projection was requested
+    """
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    return names or None
@@ -0,0 +1,164 @@
+import math
+import string
+import textwrap
+import threading
+from collections import deque
+
+# Chat format overhead (gpt-3.5-turbo): per message, and for priming the reply
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """
+    Load the tiktoken encoding once; None when tiktoken (an optional
+    dependency) or its cached BPE files are unavailable
+    """
+    global _encoding, _encoding_loaded
+    if _encoding_loaded:
+        return _encoding
+
+    with _encoding_lock:
+        if not _encoding_loaded:
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding('cl100k_base')
+            except Exception:
+                _encoding = None
+            _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text):
+    """
+    Count the tokens in a string, offline
+
+    Args:
+        text (str): Text to count
+
+    Returns:
+        int: Exact count with tiktoken, otherwise an estimate (~4 characters per token)
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+def count_message_tokens(messages):
+    """
+    Count the prompt tokens a list of chat messages will be billed for
+
+    Args:
+        messages (list): Chat messages ({"role", "content"} dicts)
+
+    Returns:
+        int: Prompt token count
+    """
+    return TOKENS_PER_REPLY + sum(
+        TOKENS_PER_MESSAGE + count_tokens(message['role']) + count_tokens(message['content'])
+        for message in messages
+    )
+
+
+class PromptTemplate:
+    """
+    Prompt compiled once at import: dedented format string, its fields and
+    the output budget for the sections it asks for. max_tokens() shrinks
+    the completion budget to what past responses actually used.
+    """
+
+    def __init__(self, name, template, section_tokens, floor=64, window=200, min_samples=20, headroom=1.25):
+        """
+        Compile the template
+
+        Args:
+            name (str): Template name used in logs and stats
+            template (str): str.format template
+            section_tokens (dict): Section key -> most tokens its answer should need;
+                the sum is the max_tokens ceiling
+            floor (int, optional): Smallest max_tokens ever requested
+            window (int, optional): Recent completions kept for the history-based budget
+            min_samples (int, optional): Completions needed before history is used
+            headroom (float, optional): Multiplier applied to the p95 completion length
+        """
+        self.name = name
+        self.text = textwrap.dedent(template).strip()
+        self.fields = tuple(dict.fromkeys(
+            field for _, field, _, _ in string.Formatter().parse(self.text) if field
+        ))
+        self.sections = tuple(section_tokens)
+        self.ceiling = sum(section_tokens.values())
+        self.floor = min(floor, self.ceiling)
+        self.min_samples = min_samples
+        self.headroom = headroom
+        self.static_tokens = count_tokens(self.text.format_map({field: '' for field in self.fields}))
+
+        self._history = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+        self.truncated = 0
+
+    def render(self, **values):
+        """
+        Fill in the template
+
+        Returns:
+            str: Rendered prompt
+        """
+        return self.text.format_map(values)
+
+    def max_tokens(self):
+        """
+        Pick the completion budget: the section ceiling until enough history
+        exists, then the p95 of recent completions plus headroom
+
+        Returns:
+            int: max_tokens for the next call
+        """
+        with self._lock:
+            if len(self._history) < self.min_samples:
+                return self.ceiling
+            lengths = sorted(self._history)
+        p95 = lengths[min(int(len(lengths) * 0.95), len(lengths) - 1)]
+        return max(self.floor, min(self.ceiling, math.ceil(p95 * self.headroom)))
+
+    def record_completion(self, completion_tokens, truncated=False):
+        """
+        Record the length of a completion made from this template
+
+        Args:
+            completion_tokens (int): Tokens the model generated
+            truncated (bool, optional): The completion hit max_tokens; the
+                ceiling is recorded instead so the budget grows back
+        """
+        with self._lock:
+            if truncated:
+                self.truncated += 1
+                completion_tokens = self.ceiling
+            self._history.append(completion_tokens)
+
+    def get_stats(self):
+        """
+        Get template statistics
+
+        Returns:
+            dict: Static prompt tokens, current max_tokens, history size and truncations
+        """
+        with self._lock:
+            samples = len(self._history)
+            average = sum(self._history) / samples if samples else 0.0
+        return {
+            "static_tokens": self.static_tokens,
+            "max_tokens": self.max_tokens(),
+            "ceiling": self.ceiling,
+            "samples": samples,
+            "avg_completion_tokens": average,
+            "truncated": self.truncated
+        }